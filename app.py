@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, jsonify
 from flask_jwt_extended import jwt_required, verify_jwt_in_request, get_jwt_identity
 from flask_migrate import Migrate
 
@@ -9,7 +9,12 @@ import logging
 
 from repositories.user_repository import UserRepository
 from repositories.tender_repository import TenderRepository
+from services.analysis_cache import AnalysisCache
 from services.auth_service import AuthService
+from services.complaint_analysis_queue import ComplaintAnalysisQueue
+from services.complaint_backlog_service import ComplaintBacklogService
+from services.datetime_provider import DatetimeProvider
+from services.metrics_service import MetricsService
 from services.password_service import PasswordService
 from services.report_generation_service import ReportGenerationService
 
@@ -49,6 +54,10 @@ tender_repository = TenderRepository(db.session)
 report_generation_service = ReportGenerationService(db.session)
 password_service = PasswordService()
 auth_service = AuthService(app, user_repository, password_service)
+complaint_backlog_service = ComplaintBacklogService(tender_repository,
+                                                    ComplaintAnalysisQueue.from_url(Config.NLP_QUEUE_REDIS_URL),
+                                                    DatetimeProvider(), max_sweeps=Config.NLP_SWEEP_MAX_ATTEMPTS)
+metrics_service = MetricsService(AnalysisCache.from_url(Config.ANALYSIS_CACHE_REDIS_URL), complaint_backlog_service)
 
 
 def init_crawler_service():
@@ -113,5 +122,9 @@ def user_tenders():
     tenders = tender_repository.get_subscribed_tenders(user_id)
     return render_template('user_tenders.html', tenders=tenders)
 
+@app.route('/metrics')
+def metrics():
+    return Response(metrics_service.render(), content_type=MetricsService.CONTENT_TYPE)
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Benchmark: corpus cleaning throughput of TextProcessingService.process_and_store (one text at a time)
+vs. process_many with nlp.pipe over 1, 2, ... os.cpu_count() processes, vs. a TextCleaningPool of as many
+processes fed clean_batch_size texts at a time, as the crawler does.
+
+Texts are read from a file with one raw text per line, or synthesized from keywords.json.
+Needs the uk_core_news_sm model. Corpus files are written to a temporary directory.
+Run from the project root:
+
+    python -m benchmarks.bench_corpus_cleaning [texts.txt] [--texts N] [--clean-batch-size N]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from services.text_cleaning_pool import TextCleaningPool
+from services.text_processing_service import TextProcessingService
+
+TOP_LEVEL_DIR = Path(__file__).resolve().parent.parent
+
+
+def synthesize_texts(count: int):
+    with open(TOP_LEVEL_DIR / "keywords.json", "r", encoding="utf-8") as f:
+        words = sorted({kw for keywords in json.load(f).values() for kw in keywords})
+    rng = random.Random(42)
+    filler = "скаржник вважає що замовник безпідставно відхилив тендерну пропозицію та порушив вимоги".split()
+    return [" ".join(rng.choice(words) if rng.random() < 0.3 else rng.choice(filler) for _ in range(200))
+            for _ in range(count)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", help="File with one raw text per line.")
+    parser.add_argument("--texts", type=int, default=2000, help="Number of texts to clean.")
+    parser.add_argument("--clean-batch-size", type=int, default=256, help="Texts per batch handed to the pool.")
+    args = parser.parse_args()
+
+    if args.path:
+        with open(args.path, "r", encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()][:args.texts]
+    else:
+        texts = synthesize_texts(args.texts)
+
+    def run(label, process):
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            service = TextProcessingService(corpus_dir, max_lines_per_file=1000)
+            started = time.perf_counter()
+            process(service)
+            seconds = time.perf_counter() - started
+        print(f"{label:<32}{len(texts) / seconds:>10.1f} texts/s")
+
+    print(f"{len(texts)} texts")
+    run("process_and_store", lambda service: [service.process_and_store(text) for text in texts])
+    n_process = 1
+    while n_process <= (os.cpu_count() or 1):
+        run(f"process_many n_process={n_process}", lambda service: service.process_many(texts, n_process=n_process))
+        n_process *= 2
+
+    def run_pool(service, processes):
+        # includes starting the workers, which the crawler pays once per run
+        with TextCleaningPool(processes, cleaner=service.cleaner) as pool:
+            batches = ((texts[i:i + args.clean_batch_size], None) for i in range(0, len(texts), args.clean_batch_size))
+            for _, _, cleaned in pool.clean_batches(batches):
+                service.store_cleaned(cleaned)
+
+    processes = 1
+    while processes <= (os.cpu_count() or 1):
+        run(f"TextCleaningPool processes={processes}", lambda service: run_pool(service, processes))
+        processes *= 2
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark: legacy per-domain list scan vs. KeywordMatcher over long complaint texts.
+
+Token streams are synthesized from keywords.json and filler lemmas, so the benchmark
+does not need the spaCy model. Run from the project root:
+
+    python -m benchmarks.bench_keyword_matcher
+"""
+import json
+import random
+import timeit
+from pathlib import Path
+from typing import Dict, List
+
+from services.keyword_matcher import KeywordMatcher
+
+TOP_LEVEL_DIR = Path(__file__).resolve().parent.parent
+N_TEXTS = 50
+TOKENS_PER_TEXT = 5000
+KEYWORD_RATIO = 0.1
+REPEATS = 5
+
+
+def legacy_match(tokens, lemmatized_keywords: Dict[str, List[str]]) -> List[Dict]:
+    """The matching loop ComplaintAnalysisService used before KeywordMatcher."""
+    textual_occurrences = {}
+    for lemma, start, length in tokens:
+        for domain, domain_keyword_lemmas in lemmatized_keywords.items():
+            if lemma in domain_keyword_lemmas:
+                key = (start, length)
+                if key not in textual_occurrences:
+                    textual_occurrences[key] = {"lemma": lemma, "domains": set()}
+                textual_occurrences[key]["domains"].add(domain)
+    return [
+        {"keyword": data["lemma"], "domains": list(data["domains"]), "startPosition": start, "length": length}
+        for (start, length), data in textual_occurrences.items()
+    ]
+
+
+def make_token_stream(keyword_lemmas: List[str], rng: random.Random):
+    filler = [f"слово{i}" for i in range(500)]
+    tokens, offset = [], 0
+    for _ in range(TOKENS_PER_TEXT):
+        lemma = rng.choice(keyword_lemmas) if rng.random() < KEYWORD_RATIO else rng.choice(filler)
+        tokens.append((lemma, offset, len(lemma)))
+        offset += len(lemma) + 1
+    return tokens
+
+
+def normalized(highlights: List[Dict]) -> List[Dict]:
+    return [{**h, "domains": sorted(h["domains"])} for h in highlights]
+
+
+if __name__ == "__main__":
+    with open(TOP_LEVEL_DIR / "keywords.json", "r", encoding="utf-8") as f:
+        keywords = json.load(f)
+
+    rng = random.Random(42)
+    keyword_lemmas = sorted({kw for words in keywords.values() for kw in words})
+    texts = [make_token_stream(keyword_lemmas, rng) for _ in range(N_TEXTS)]
+    matcher = KeywordMatcher(keywords)
+
+    for tokens in texts:
+        assert normalized(legacy_match(tokens, keywords)) == normalized(matcher.match(tokens)), \
+            "highlight output differs"
+
+    legacy_seconds = min(timeit.repeat(lambda: [legacy_match(t, keywords) for t in texts], number=1, repeat=REPEATS))
+    matcher_seconds = min(timeit.repeat(lambda: [matcher.match(t) for t in texts], number=1, repeat=REPEATS))
+
+    print(f"{N_TEXTS} texts x {TOKENS_PER_TEXT} tokens, {len(keyword_lemmas)} keyword lemmas, "
+          f"{len(keywords)} domains")
+    print(f"legacy scan:     {legacy_seconds * 1000:.1f} ms")
+    print(f"KeywordMatcher:  {matcher_seconds * 1000:.1f} ms")
+    print(f"speedup:         {legacy_seconds / matcher_seconds:.1f}x (identical highlights)")
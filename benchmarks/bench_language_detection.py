@@ -0,0 +1,131 @@
+"""
+Benchmark and agreement report: UkrainianLanguageDetector vs. seeded langdetect.
+
+Reads the raw title and description of the first complaints stored in the database, as the
+analysis pipeline sees them, or one raw text per line from a file. A corpus directory (see
+corpus_main.py) can be given too, but its lines are already cleaned and lemmatized, so they do
+not show how the detector does on raw text. Built-in samples of other Cyrillic languages are
+added so that both outcomes are exercised. Reports the time per text of each detector, how often
+they agree, how many texts needed the langdetect fallback and the first disagreements.
+Run from the project root:
+
+    python -m benchmarks.bench_language_detection [path] [--limit N] [--report report.json]
+"""
+import argparse
+import json
+import time
+from itertools import islice
+from pathlib import Path
+from typing import List, Optional
+
+from langdetect import DetectorFactory, detect, LangDetectException
+
+from services.language_detector import UkrainianLanguageDetector
+from util.corpus_shards import iter_corpus_lines
+
+SAMPLES = [
+    ("uk", "Скаржник вважає, що замовник безпідставно відхилив його тендерну пропозицію та порушив вимоги "
+           "тендерної документації щодо кваліфікаційних критеріїв і досвіду виконання аналогічних договорів."),
+    ("uk", "Учасник оскаржує рішення уповноваженої особи про визначення переможця, оскільки переможець не "
+           "надав довідку про відсутність заборгованості зі сплати податків."),
+    ("ru", "Заявитель считает, что заказчик необоснованно отклонил его предложение и нарушил требования "
+           "тендерной документации относительно квалификационных критериев участника."),
+    ("ru", "Участник обжалует решение уполномоченного лица об определении победителя, так как победитель "
+           "не предоставил справку об отсутствии задолженности по уплате налогов."),
+    ("be", "Удзельнік абскарджвае рашэнне ўпаўнаважанай асобы аб вызначэнні пераможцы, бо пераможца не "
+           "падаў даведку аб адсутнасці запазычанасці па падатках."),
+    ("bg", "Участникът обжалва решението на възложителя за определяне на изпълнител, тъй като "
+           "класираният участник не е представил удостоверение за липса на задължения."),
+]
+
+
+def load_complaint_texts(limit: int) -> List[str]:
+    """Title and description of the first complaints in the database, joined as the analysis pipeline does."""
+    # imported here, reading a file or corpus needs no database configuration
+    from app import app
+    from repositories.tender_repository import TenderRepository
+    from util.db_context_manager import session_scope
+
+    with app.app_context(), session_scope() as session:
+        rows = islice(TenderRepository(session).iter_complaint_texts(batch_size=min(limit, 1000)), limit)
+        return [f"{row.title} {row.description}" for row in rows]
+
+
+def load_texts(path: Optional[Path], limit: int) -> List[str]:
+    if path is None:
+        return load_complaint_texts(limit)
+    if path.is_dir():
+        lines = iter_corpus_lines(path)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return list(islice((line.strip() for line in lines if line.strip()), limit))
+
+
+def langdetect_is_ukrainian(text: str) -> bool:
+    try:
+        return detect(text) == "uk"
+    except LangDetectException:
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", type=Path,
+                        help="Text file with one raw text per line, or a corpus directory of lemmatized texts. "
+                             "Complaints stored in the database by default.")
+    parser.add_argument("--limit", type=int, default=5000, help="Read at most this many texts.")
+    parser.add_argument("--report", help="Also write the report as JSON to this file.")
+    args = parser.parse_args()
+
+    corpus = load_texts(args.path, args.limit)
+    texts = corpus + [text for _, text in SAMPLES]
+    print(f"{len(corpus)} texts from {args.path or 'the complaints table'}, {len(SAMPLES)} built-in samples")
+    if args.path is not None and args.path.is_dir():
+        print("Corpus lines are cleaned and lemmatized, not the raw text the detector sees in the pipeline.")
+
+    # langdetect loads its language profiles on first use, keep that out of both timings
+    langdetect_is_ukrainian(SAMPLES[0][1])
+
+    detector = UkrainianLanguageDetector()
+    started = time.perf_counter()
+    ours = [detector.is_ukrainian(text) for text in texts]
+    ours_seconds = time.perf_counter() - started
+
+    DetectorFactory.seed = 0
+    started = time.perf_counter()
+    theirs = [langdetect_is_ukrainian(text) for text in texts]
+    theirs_seconds = time.perf_counter() - started
+
+    disagreements = [
+        {"text": text[:120], "detector": mine, "langdetect": other}
+        for text, mine, other in zip(texts, ours, theirs) if mine != other
+    ]
+    report = {
+        "texts": len(texts),
+        "detector_ms_per_text": 1000 * ours_seconds / len(texts),
+        "langdetect_ms_per_text": 1000 * theirs_seconds / len(texts),
+        "speedup": theirs_seconds / ours_seconds if ours_seconds else None,
+        "agreement": 1 - len(disagreements) / len(texts),
+        "decided_by_markers": detector.stats["ukrainian"] + detector.stats["other"],
+        "langdetect_fallbacks": detector.stats["fallback"],
+        "confusion": {
+            f"detector_{'uk' if mine else 'other'}__langdetect_{'uk' if other else 'other'}":
+                sum(1 for a, b in zip(ours, theirs) if a == mine and b == other)
+            for mine in (True, False) for other in (True, False)
+        },
+        "disagreements": disagreements,
+    }
+
+    print(f"{'detector':<12}{report['detector_ms_per_text']:>10.3f} ms/text")
+    print(f"{'langdetect':<12}{report['langdetect_ms_per_text']:>10.3f} ms/text")
+    print(f"speedup {report['speedup']:.1f}x, agreement {report['agreement']:.2%}, "
+          f"{report['decided_by_markers']} decided by markers, {report['langdetect_fallbacks']} fell back")
+    for name, count in report["confusion"].items():
+        print(f"  {name:<36}{count:>8}")
+    for row in disagreements[:10]:
+        print(f"  detector={row['detector']!s:<5} langdetect={row['langdetect']!s:<5} {row['text']}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
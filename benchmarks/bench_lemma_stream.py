@@ -0,0 +1,96 @@
+"""
+Benchmark: rescoring complaints from stored lemma streams vs. re-running the spaCy model.
+
+Complaint texts are synthesized from keywords.json and filler words. The model side needs
+uk_core_news_sm; without it only the lemma stream side is measured. Run from the project root:
+
+    python -m benchmarks.bench_lemma_stream
+"""
+import json
+import random
+import time
+from pathlib import Path
+
+from services.keyword_matcher import KeywordMatcher
+from util.keyword_sets import lemmatize_keywords
+from util.lemma_stream import encode_tokens, decode_lemma_stream
+
+TOP_LEVEL_DIR = Path(__file__).resolve().parent.parent
+N_TEXTS = 200
+WORDS_PER_TEXT = 400
+KEYWORD_RATIO = 0.05
+BATCH_SIZE = 32
+
+
+def make_texts(keywords, rng: random.Random):
+    keyword_words = sorted({kw for words in keywords.values() for kw in words})
+    filler = ["замовник", "учасник", "тендерна", "документація", "вимога", "закупівля", "пропозиція",
+              "відповідно", "пункту", "договору", "строк", "постачання", "товару", "було", "встановлено"]
+    return [
+        " ".join(rng.choice(keyword_words) if rng.random() < KEYWORD_RATIO else rng.choice(filler)
+                 for _ in range(WORDS_PER_TEXT)) + "."
+        for _ in range(N_TEXTS)
+    ]
+
+
+def tokens_of(doc):
+    return [(token.lemma_.lower(), token.idx, len(token.text)) for token in doc]
+
+
+def whitespace_tokens(text):
+    tokens, offset = [], 0
+    for word in text.split(" "):
+        tokens.append((word, offset, len(word)))
+        offset += len(word) + 1
+    return tokens
+
+
+def rescore_from_streams(streams, lemmas_by_id, matcher):
+    results = []
+    for stream in streams:
+        lemma_ids, starts, lengths = decode_lemma_stream(stream)
+        results.append(matcher.match([(lemmas_by_id[i], s, l) for i, s, l in zip(lemma_ids, starts, lengths)]))
+    return results
+
+
+if __name__ == "__main__":
+    with open(TOP_LEVEL_DIR / "keywords.json", "r", encoding="utf-8") as f:
+        keywords = json.load(f)
+    texts = make_texts(keywords, random.Random(42))
+
+    try:
+        import spacy
+        nlp = spacy.load("uk_core_news_sm", disable=["parser", "ner"])
+    except (ImportError, OSError):
+        nlp = None
+        print("uk_core_news_sm is not installed, measuring the lemma stream side only "
+              "(streams built with a whitespace tokenizer).")
+
+    lemmatized_keywords = lemmatize_keywords(nlp, keywords) if nlp else keywords
+    matcher = KeywordMatcher(lemmatized_keywords)
+    token_lists = [tokens_of(doc) for doc in nlp.pipe(texts, batch_size=BATCH_SIZE)] if nlp \
+        else [whitespace_tokens(text) for text in texts]
+
+    vocabulary = {}
+    for tokens in token_lists:
+        for lemma, _, _ in tokens:
+            vocabulary.setdefault(lemma, len(vocabulary) + 1)
+    lemmas_by_id = {i: lemma for lemma, i in vocabulary.items()}
+    streams = [encode_tokens(tokens, vocabulary) for tokens in token_lists]
+    total_tokens = sum(len(tokens) for tokens in token_lists)
+
+    started = time.perf_counter()
+    stream_results = rescore_from_streams(streams, lemmas_by_id, matcher)
+    stream_seconds = time.perf_counter() - started
+
+    print(f"{N_TEXTS} texts, {total_tokens} tokens, {len(vocabulary)} distinct lemmas, "
+          f"{sum(map(len, streams)) / total_tokens:.1f} bytes per token stored")
+    print(f"lemma streams:  {stream_seconds * 1000:8.1f} ms  ({N_TEXTS / stream_seconds:8.0f} complaints/s)")
+
+    if nlp:
+        started = time.perf_counter()
+        model_results = [matcher.match(tokens_of(doc)) for doc in nlp.pipe(texts, batch_size=BATCH_SIZE)]
+        model_seconds = time.perf_counter() - started
+        assert model_results == stream_results, "highlight output differs"
+        print(f"spaCy nlp.pipe: {model_seconds * 1000:8.1f} ms  ({N_TEXTS / model_seconds:8.0f} complaints/s)")
+        print(f"speedup:        {model_seconds / stream_seconds:.1f}x (identical highlights)")
@@ -0,0 +1,87 @@
+"""
+Benchmark: per-child memory and startup time of prefork workers that load the NLP model themselves
+vs. inherit it from a parent that preloaded it, with and without gc.freeze.
+
+Each mode forks CHILDREN processes the way the Celery prefork pool does. Children run a few full
+garbage collections, as a long-running worker would, and report RSS, PSS and the time until their
+NLP resources were ready. Uses uk_core_news_sm when installed, otherwise a synthetic object graph
+of similar shape (many small dicts and strings). Linux only. Run from the project root:
+
+    python -m benchmarks.bench_prefork_memory
+"""
+import gc
+import json
+import os
+import time
+
+from util.process_memory import read_memory_usage
+
+CHILDREN = 4
+SYNTHETIC_ENTRIES = 400_000
+
+
+def load_resources():
+    try:
+        import spacy
+        nlp = spacy.load("uk_core_news_sm", disable=["parser", "ner"])
+        nlp("прогрів моделі")
+        return nlp
+    except (ImportError, OSError):
+        return {f"лема{i}": {"id": i, "forms": [f"форма{i}_{j}" for j in range(3)]} for i in range(SYNTHETIC_ENTRIES)}
+
+
+def run_child(preloaded, write_fd):
+    started = time.perf_counter()
+    resources = preloaded if preloaded is not None else load_resources()
+    ready_seconds = time.perf_counter() - started
+    for _ in range(3):
+        gc.collect()
+    usage = read_memory_usage()
+    os.write(write_fd, json.dumps({"ready_seconds": ready_seconds, **usage, "size": len(resources)}).encode())
+    os._exit(0)
+
+
+def run_mode(preload: bool, freeze: bool):
+    preloaded = load_resources() if preload else None
+    if freeze:
+        gc.collect()
+        gc.freeze()
+
+    pipes = []
+    for _ in range(CHILDREN):
+        read_fd, write_fd = os.pipe()
+        if os.fork() == 0:
+            os.close(read_fd)
+            run_child(preloaded, write_fd)
+        os.close(write_fd)
+        pipes.append(read_fd)
+
+    # every child must be alive when PSS is read, so they report before any of them exits
+    reports = []
+    for read_fd in pipes:
+        with os.fdopen(read_fd, "rb") as pipe:
+            reports.append(json.loads(pipe.read()))
+    for _ in pipes:
+        os.wait()
+
+    if freeze:
+        gc.unfreeze()
+    return reports
+
+
+if __name__ == "__main__":
+    if not read_memory_usage():
+        raise SystemExit("/proc/<pid>/smaps_rollup is not available on this system.")
+
+    modes = [("load per child", False, False), ("preload", True, False), ("preload + gc.freeze", True, True)]
+    print(f"{CHILDREN} children per mode, mean per child")
+    print(f"{'mode':<22}{'startup s':>10}{'RSS MiB':>10}{'PSS MiB':>10}{'private MiB':>13}")
+    for name, preload, freeze in modes:
+        reports = run_mode(preload, freeze)
+
+        def mean(field):
+            return sum(r.get(field, 0) for r in reports) / len(reports)
+
+        private = mean("private_clean_kb") + mean("private_dirty_kb")
+        print(f"{name:<22}{mean('ready_seconds'):>10.2f}{mean('rss_kb') / 1024:>10.1f}"
+              f"{mean('pss_kb') / 1024:>10.1f}{private / 1024:>13.1f}")
@@ -30,6 +30,10 @@ app.conf.beat_schedule = {
         'task': 'tasks.send_notifications_task',
         'schedule': crontab(minute='2-59/15'),
     },
+    'sweep-unanalyzed-complaints': {
+        'task': 'tasks.sweep_unanalyzed_complaints_task',
+        'schedule': crontab(minute='7-59/15'),
+    },
 }
 
 if __name__ == '__main__':
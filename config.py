@@ -39,3 +39,24 @@ class Config:
     SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
     SMTP_USER = os.environ.get('SMTP_USER', '')
     SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD', '')
+
+    NOTIFICATION_MAX_PARALLEL = int(os.environ.get('NOTIFICATION_MAX_PARALLEL', 4))
+
+    # micro-batched complaint analysis (nlp_worker.py)
+    NLP_QUEUE_REDIS_URL = os.environ.get('NLP_QUEUE_REDIS_URL', CELERY_BROKER_URL)
+    NLP_BATCH_MAX_SIZE = int(os.environ.get('NLP_BATCH_MAX_SIZE', 64))
+    NLP_BATCH_MAX_WAIT_SECONDS = float(os.environ.get('NLP_BATCH_MAX_WAIT_SECONDS', 2.0))
+    NLP_PIPE_BATCH_SIZE = int(os.environ.get('NLP_PIPE_BATCH_SIZE', 32))
+    # longer complaint texts are analyzed in chunks split on paragraph or sentence boundaries
+    NLP_MAX_CHUNK_CHARS = int(os.environ.get('NLP_MAX_CHUNK_CHARS', 5000))
+    # complaints left unanalyzed for this long are re-queued by the backlog sweeper
+    NLP_SWEEP_MIN_AGE_MINUTES = int(os.environ.get('NLP_SWEEP_MIN_AGE_MINUTES', 30))
+    NLP_SWEEP_BATCH_LIMIT = int(os.environ.get('NLP_SWEEP_BATCH_LIMIT', 1000))
+    # times a complaint is re-queued before the sweeper gives up on it
+    NLP_SWEEP_MAX_ATTEMPTS = int(os.environ.get('NLP_SWEEP_MAX_ATTEMPTS', 3))
+
+    # analysis results cached by complaint text and keyword set version
+    ANALYSIS_CACHE_ENABLED = os.environ.get('ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true'
+    ANALYSIS_CACHE_REDIS_URL = os.environ.get('ANALYSIS_CACHE_REDIS_URL', NLP_QUEUE_REDIS_URL)
+    ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', 10000))
+    ANALYSIS_CACHE_TTL_SECONDS = int(os.environ.get('ANALYSIS_CACHE_TTL_SECONDS', 30 * 24 * 3600))
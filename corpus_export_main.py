@@ -0,0 +1,63 @@
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+
+from app import app
+from exceptions import CorpusWatermarkMismatchError
+from repositories.tender_repository import TenderRepository
+from services.corpus_export_service import CorpusExportService
+from services.text_dedup_index import TextDedupIndex
+from services.text_processing_service import TextProcessingService
+from util.db_context_manager import session_scope
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("corpus_export")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Cleans the complaints stored in the database into the topic modeling corpus. "
+                    "Only complaints stored since the previous export are read unless --full is given.")
+    parser.add_argument("--corpus-dir", default="corpus_texts", help="Corpus directory, shared with corpus_main.py.")
+    parser.add_argument("--date-from", type=datetime.fromisoformat, help="Only complaints dated at or after this.")
+    parser.add_argument("--date-to", type=datetime.fromisoformat, help="Only complaints dated before this.")
+    parser.add_argument("--status", action="append", dest="statuses", help="Only complaints with this status, repeatable.")
+    parser.add_argument("--classifier-id", type=int, help="Only complaints of tenders with this general classifier id.")
+    parser.add_argument("--full", action="store_true", help="Ignore the stored watermark.")
+    parser.add_argument("--safety-window-minutes", type=float,
+                        default=CorpusExportService.DEFAULT_SAFETY_WINDOW.total_seconds() / 60,
+                        help="Complaints stored this long before the watermark are read again, in case their "
+                             "transaction committed after the previous export.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows read and cleaned at once.")
+    parser.add_argument("--n-process", type=int, default=os.cpu_count() or 1, help="Worker processes of the cleaning pool, started once for the whole export.")
+    parser.add_argument("--compression", choices=["gzip", "zstd"], default="gzip", help="Compression of new shards.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    text_processor = TextProcessingService(corpus_dir=args.corpus_dir, max_lines_per_file=5000,
+                                           compression=args.compression)
+    dedup_index = TextDedupIndex(os.path.join(args.corpus_dir, "dedup_index.sqlite3"))
+    try:
+        with app.app_context(), session_scope() as session:
+            export_service = CorpusExportService(TenderRepository(session), text_processor, dedup_index)
+            processed = export_service.export(date_from=args.date_from, date_to=args.date_to,
+                                              statuses=args.statuses, general_classifier_id=args.classifier_id,
+                                              full=args.full, batch_size=args.batch_size, n_process=args.n_process,
+                                              safety_window=timedelta(minutes=args.safety_window_minutes))
+    except CorpusWatermarkMismatchError as e:
+        logger.error(str(e))
+        return 1
+    finally:
+        text_processor.close()
+        dedup_index.close()
+
+    logger.info(f"Corpus export finished, {processed} texts processed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
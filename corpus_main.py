@@ -1,7 +1,9 @@
 import logging
+import os
 from pathlib import Path
 
 from services.complaint_crawler_service import ComplaintCrawlerService
+from services.text_dedup_index import TextDedupIndex
 from services.text_processing_service import TextProcessingService
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -13,22 +15,35 @@ corpus_dir_str = str(corpus_dir.resolve())
 number_of_texts = 5000
 
 try:
-    text_processor = TextProcessingService(corpus_dir=corpus_dir_str, max_lines_per_file=number_of_texts)
+    text_processor = TextProcessingService(corpus_dir=corpus_dir_str, max_lines_per_file=number_of_texts,
+                                           compression="gzip")
     logging.info(f"TextProcessingService initialized with corpus directory: {corpus_dir_str}")
 except Exception as e:
     logging.exception("Failed to initialize TextProcessingService. Exiting.")
     exit(1)
 
 
+# texts stored by earlier runs are skipped before cleaning
+dedup_index = TextDedupIndex(str(corpus_dir / "dedup_index.sqlite3"))
+
 crawler = ComplaintCrawlerService(
-    text_processing_service=text_processor
+    text_processing_service=text_processor,
+    n_process=os.cpu_count() or 1,
+    dedup_index=dedup_index
 )
 logging.info("CrawlerService initialized.")
 
 
+# an interrupted run continues after the last tender whose texts were all stored
+checkpoint = text_processor.get_checkpoint(ComplaintCrawlerService.CHECKPOINT_NAME)
+remaining_texts = number_of_texts - (checkpoint["texts_processed"] if checkpoint else 0)
+
 logging.info("Starting complaint/claim text gathering...")
 try:
-    processed_count = crawler.gather_complaint_claim_texts(max_texts=number_of_texts)
+    processed_count = crawler.gather_complaint_claim_texts(max_texts=remaining_texts, resume_from=checkpoint)
     logging.info(f"Finished gathering. Processed {processed_count} texts.")
 except Exception as e:
-    logging.exception("An error occurred during text gathering.")
\ No newline at end of file
+    logging.exception("An error occurred during text gathering.")
+finally:
+    text_processor.close()
+    dedup_index.close()
\ No newline at end of file
@@ -2,4 +2,10 @@ class NlpModelNotAvailableError(Exception):
     pass
 
 class NlpResourcesNotAvailableError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class KeywordSetVersionMismatchError(Exception):
+    pass
+
+class CorpusWatermarkMismatchError(Exception):
+    pass
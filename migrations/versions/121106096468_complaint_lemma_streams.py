@@ -0,0 +1,35 @@
+"""complaint lemma streams
+
+Revision ID: 121106096468
+Revises: de0b650128e1
+Create Date: 2026-10-19 14:21:09.540312
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '121106096468'
+down_revision = 'de0b650128e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('lemma_vocabulary',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('lemma', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('lemma')
+    )
+
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('lemma_stream', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.drop_column('lemma_stream')
+
+    op.drop_table('lemma_vocabulary')
@@ -0,0 +1,26 @@
+"""complaint created_at id index
+
+Revision ID: 3f7a2c9e5d18
+Revises: 8d2f4b6c1a97
+Create Date: 2026-10-19 21:05:47.218640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f7a2c9e5d18'
+down_revision = '8d2f4b6c1a97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.create_index('ix_complaints_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.drop_index('ix_complaints_created_at_id')
@@ -0,0 +1,30 @@
+"""complaint analysis backlog
+
+Revision ID: 5c3e9a71b2d4
+Revises: ff1c4a026d08
+Create Date: 2026-10-19 16:21:07.402913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c3e9a71b2d4'
+down_revision = 'ff1c4a026d08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(timezone=True),
+                                      server_default=sa.text('now()'), nullable=False))
+        batch_op.create_index('ix_complaints_unanalyzed', ['created_at'], unique=False,
+                              postgresql_where=sa.text('highlighted_keywords IS NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.drop_index('ix_complaints_unanalyzed', postgresql_where=sa.text('highlighted_keywords IS NULL'))
+        batch_op.drop_column('created_at')
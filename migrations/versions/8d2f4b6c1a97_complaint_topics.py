@@ -0,0 +1,33 @@
+"""complaint topics
+
+Revision ID: 8d2f4b6c1a97
+Revises: 5c3e9a71b2d4
+Create Date: 2026-10-19 18:42:13.551204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f4b6c1a97'
+down_revision = '5c3e9a71b2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('topic_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('topic_weights', postgresql.ARRAY(sa.Float()), nullable=True))
+        batch_op.add_column(sa.Column('topic_model_version', sa.String(length=16), nullable=True))
+        batch_op.create_index(batch_op.f('ix_complaints_topic_id'), ['topic_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_complaints_topic_id'))
+        batch_op.drop_column('topic_model_version')
+        batch_op.drop_column('topic_weights')
+        batch_op.drop_column('topic_id')
@@ -0,0 +1,26 @@
+"""complaint analysis sweeps
+
+Revision ID: b6e1d4a8f302
+Revises: 3f7a2c9e5d18
+Create Date: 2026-10-19 22:14:09.573821
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1d4a8f302'
+down_revision = '3f7a2c9e5d18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('analysis_sweeps', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.drop_column('analysis_sweeps')
@@ -0,0 +1,46 @@
+"""keyword set versions
+
+Revision ID: de0b650128e1
+Revises: e146d2087f64
+Create Date: 2026-10-19 13:05:27.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'de0b650128e1'
+down_revision = 'e146d2087f64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('keyword_sets',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('version', sa.String(length=16), nullable=False),
+    sa.Column('keywords', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('lemmatized_keywords', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('parent_version', sa.String(length=16), nullable=True),
+    sa.Column('diff', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('version')
+    )
+
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('lemmas', postgresql.ARRAY(sa.Text()), nullable=True))
+        batch_op.add_column(sa.Column('keyword_set_version', sa.String(length=16), nullable=True))
+        batch_op.create_index('ix_complaints_lemmas', ['lemmas'], unique=False, postgresql_using='gin')
+        batch_op.create_index(batch_op.f('ix_complaints_keyword_set_version'), ['keyword_set_version'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_complaints_keyword_set_version'))
+        batch_op.drop_index('ix_complaints_lemmas', postgresql_using='gin')
+        batch_op.drop_column('keyword_set_version')
+        batch_op.drop_column('lemmas')
+
+    op.drop_table('keyword_sets')
@@ -0,0 +1,70 @@
+"""violation score jsonb upsert
+
+Revision ID: e146d2087f64
+Revises: 9d0ae02f8979
+Create Date: 2026-10-19 10:12:41.503218
+
+"""
+import json
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'e146d2087f64'
+down_revision = '9d0ae02f8979'
+branch_labels = None
+depends_on = None
+
+
+def _merge_duplicate_scores(connection):
+    """Concurrent first complaints could create several rows per tender, fold them into the oldest one."""
+    rows = connection.execute(sa.text(
+        "SELECT id, tender_id, scores FROM violation_scores "
+        "WHERE tender_id IN (SELECT tender_id FROM violation_scores GROUP BY tender_id HAVING count(*) > 1) "
+        "ORDER BY tender_id, id"
+    )).fetchall()
+
+    rows_per_tender = defaultdict(list)
+    for row in rows:
+        rows_per_tender[row.tender_id].append(row)
+
+    for tender_id, tender_rows in rows_per_tender.items():
+        merged = {}
+        for row in tender_rows:
+            scores = row.scores if isinstance(row.scores, dict) else json.loads(row.scores or '{}')
+            for domain, data in scores.items():
+                prev = merged.setdefault(domain, {"score": 0.0, "keywords": {}})
+                prev["score"] += data.get("score", 0.0)
+                for kw, cnt in data.get("keywords", {}).items():
+                    prev["keywords"][kw] = prev["keywords"].get(kw, 0) + cnt
+
+        keep_id = tender_rows[0].id
+        connection.execute(sa.text("UPDATE violation_scores SET scores = CAST(:scores AS json) WHERE id = :id"),
+                           {"scores": json.dumps(merged, ensure_ascii=False), "id": keep_id})
+        connection.execute(sa.text("DELETE FROM violation_scores WHERE tender_id = :tender_id AND id <> :id"),
+                           {"tender_id": tender_id, "id": keep_id})
+
+
+def upgrade():
+    _merge_duplicate_scores(op.get_bind())
+
+    with op.batch_alter_table('violation_scores', schema=None) as batch_op:
+        batch_op.alter_column('scores',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(astext_type=sa.Text()),
+               existing_nullable=True,
+               postgresql_using='scores::jsonb')
+        batch_op.create_unique_constraint('uq_violation_scores_tender_id', ['tender_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('violation_scores', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_violation_scores_tender_id', type_='unique')
+        batch_op.alter_column('scores',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               type_=sa.JSON(),
+               existing_nullable=True,
+               postgresql_using='scores::json')
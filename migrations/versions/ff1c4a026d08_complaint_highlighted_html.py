@@ -0,0 +1,26 @@
+"""complaint highlighted html
+
+Revision ID: ff1c4a026d08
+Revises: 121106096468
+Create Date: 2026-10-19 15:02:44.816730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ff1c4a026d08'
+down_revision = '121106096468'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('highlighted_html', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('complaints', schema=None) as batch_op:
+        batch_op.drop_column('highlighted_html')
@@ -7,5 +7,7 @@ from .general_classifiers import GeneralClassifier
 from .users import User
 from .user_subscriptions import UserSubscription
 from .violation_scores import ViolationScore
+from .keyword_sets import KeywordSet
+from .lemma_vocabulary import LemmaVocabulary
 
 from .base import Base
\ No newline at end of file
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime, String, JSON
+from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime, String, JSON, Index, LargeBinary, Float, func, \
+    text
+from sqlalchemy.dialects.postgresql import ARRAY
 
 from db import db
 
@@ -16,12 +18,35 @@ class Complaint(db.Model):
     date_answered = Column(DateTime(timezone=True))
     type = Column(String(50), nullable=False)
     highlighted_keywords = Column(JSON)
+    # description with highlighted_keywords rendered, built at analysis time
+    highlighted_html = Column(Text)
+    # distinct lemmas of the description, lets a keyword set change find the complaints it affects
+    lemmas = Column(ARRAY(Text))
+    keyword_set_version = Column(String(16), index=True)
+    # every token as lemma_vocabulary id, char offset and length, see util.lemma_stream
+    lemma_stream = Column(LargeBinary)
+    # dominant NMF topic (its key in keywords.json) and all topic weights, see util.topic_model
+    topic_id = Column(Integer, index=True)
+    topic_weights = Column(ARRAY(Float))
+    topic_model_version = Column(String(16))
+    # when the row was stored, the age of a complaint still waiting for analysis
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # times the backlog sweeper re-queued the complaint for analysis, it gives up at NLP_SWEEP_MAX_ATTEMPTS
+    analysis_sweeps = Column(Integer, nullable=False, server_default='0')
 
     # Relationships
     tender = db.relationship("Tender", back_populates="complaints")
     changes = db.relationship("ComplaintChange", back_populates="complaint",
                               cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index('ix_complaints_lemmas', 'lemmas', postgresql_using='gin'),
+        # only the few complaints awaiting analysis, for the backlog sweeper
+        Index('ix_complaints_unanalyzed', 'created_at', postgresql_where=text('highlighted_keywords IS NULL')),
+        # every complaint in corpus export order, see TenderRepository.iter_complaint_texts
+        Index('ix_complaints_created_at_id', 'created_at', 'id'),
+    )
+
 class ComplaintChange(db.Model):
     __tablename__ = 'complaint_changes'
 
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from db import db
+
+
+class KeywordSet(db.Model):
+    __tablename__ = 'keyword_sets'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    version = Column(String(16), unique=True, nullable=False)
+    keywords = Column(JSONB, nullable=False)
+    lemmatized_keywords = Column(JSONB, nullable=False)
+    parent_version = Column(String(16))
+    diff = Column(JSONB)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
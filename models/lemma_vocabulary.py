@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, Text
+
+from db import db
+
+
+class LemmaVocabulary(db.Model):
+    __tablename__ = 'lemma_vocabulary'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    lemma = Column(Text, unique=True, nullable=False)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, ForeignKey, Integer, JSON
+from sqlalchemy import Column, String, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 
 from db import db
 
@@ -8,8 +9,9 @@ class ViolationScore(db.Model):
 
     id = Column(Integer, primary_key=True)
     tender_id = Column(String(50), ForeignKey('tenders.id'), nullable=False)
-    scores = Column(JSON)
+    scores = Column(JSONB)
 
     # Relationship
     tender = db.relationship("Tender", back_populates="violation_score")
 
+    __table_args__ = (UniqueConstraint('tender_id', name='uq_violation_scores_tender_id'),)
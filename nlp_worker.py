@@ -0,0 +1,29 @@
+import logging
+import signal
+import threading
+
+from config import Config
+from services.complaint_analysis_queue import ComplaintAnalysisQueue
+from services.nlp_batch_consumer import NlpBatchConsumer
+import signals
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+if __name__ == "__main__":
+    signals.init_nlp_model()
+    if signals.NLP_MODEL is None:
+        logging.error("SpaCy model is not loaded (is LOAD_NLP_MODEL set to 'true'?). Exiting.")
+        exit(1)
+
+    consumer = NlpBatchConsumer(
+        queue=ComplaintAnalysisQueue.from_url(Config.NLP_QUEUE_REDIS_URL),
+        max_batch_size=Config.NLP_BATCH_MAX_SIZE,
+        max_wait_seconds=Config.NLP_BATCH_MAX_WAIT_SECONDS,
+        nlp_batch_size=Config.NLP_PIPE_BATCH_SIZE,
+    )
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    consumer.run(stop_event)
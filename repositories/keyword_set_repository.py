@@ -0,0 +1,28 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from models import KeywordSet
+from repositories.base_repository import BaseRepository
+
+
+class KeywordSetRepository(BaseRepository[KeywordSet]):
+    def __init__(self, session: Session):
+        super().__init__(session)
+
+    def get_by_id(self, id: int) -> Optional[KeywordSet]:
+        """Get KeywordSet by id."""
+        return self._session.query(KeywordSet).filter_by(id=id).first()
+
+    def get_by_version(self, version: str) -> Optional[KeywordSet]:
+        """Get KeywordSet by its content version."""
+        return self._session.query(KeywordSet).filter_by(version=version).first()
+
+    def get_latest(self) -> Optional[KeywordSet]:
+        """Get the most recently registered KeywordSet."""
+        return self._session.query(KeywordSet).order_by(KeywordSet.id.desc()).first()
+
+    def create(self, keyword_set: KeywordSet) -> None:
+        """Add a new KeywordSet and flush the session."""
+        self._session.add(keyword_set)
+        self._session.flush()
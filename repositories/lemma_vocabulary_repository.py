@@ -0,0 +1,48 @@
+from typing import Optional, Dict, Iterable
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models import LemmaVocabulary
+from repositories.base_repository import BaseRepository
+
+
+class LemmaVocabularyRepository(BaseRepository[LemmaVocabulary]):
+    def __init__(self, session: Session):
+        super().__init__(session)
+
+    def get_by_id(self, id: int) -> Optional[LemmaVocabulary]:
+        """Get LemmaVocabulary entry by id."""
+        return self._session.query(LemmaVocabulary).filter_by(id=id).first()
+
+    def get_ids(self, lemmas: Iterable[str]) -> Dict[str, int]:
+        """Maps the given lemmas to their ids, lemmas missing from the vocabulary are left out."""
+        lemmas = list(set(lemmas))
+        if not lemmas:
+            return {}
+        rows = self._session.query(LemmaVocabulary.lemma, LemmaVocabulary.id).filter(LemmaVocabulary.lemma.in_(lemmas))
+        return {row.lemma: row.id for row in rows}
+
+    def get_or_create_ids(self, lemmas: Iterable[str]) -> Dict[str, int]:
+        """
+        Maps the given lemmas to their ids, adding missing lemmas to the vocabulary.
+        Inserts are sorted and ignore conflicts, so concurrent writers neither fail nor deadlock.
+        """
+        lemmas = set(lemmas)
+        ids = self.get_ids(lemmas)
+        missing = sorted(lemmas - ids.keys())
+        if missing:
+            self._session.execute(
+                insert(LemmaVocabulary).values([{"lemma": lemma} for lemma in missing])
+                .on_conflict_do_nothing(index_elements=['lemma'])
+            )
+            ids.update(self.get_ids(missing))
+        return ids
+
+    def get_lemmas(self, lemma_ids: Iterable[int]) -> Dict[int, str]:
+        """Maps the given ids back to their lemmas."""
+        lemma_ids = list(set(lemma_ids))
+        if not lemma_ids:
+            return {}
+        rows = self._session.query(LemmaVocabulary.id, LemmaVocabulary.lemma).filter(LemmaVocabulary.id.in_(lemma_ids))
+        return {row.id: row.lemma for row in rows}
@@ -1,9 +1,9 @@
 from collections import defaultdict
 from datetime import datetime
-from typing import Optional, List, Dict, Tuple
+from typing import Iterator, Optional, List, Dict, Tuple
 
 from sqlalchemy import select
-from sqlalchemy.sql.expression import func, and_
+from sqlalchemy.sql.expression import func, and_, or_
 from sqlalchemy.orm import Session, selectinload
 
 from models import Tender, GeneralClassifier, UserSubscription, Complaint, User
@@ -195,6 +195,143 @@ class TenderRepository(BaseRepository[Tender]):
         """
         return self._session.query(Complaint).filter(Complaint.id == complaint_id).first()
 
+    def get_unanalyzed_complaints_for_update(self, complaint_ids: List[str]) -> List[Complaint]:
+        """
+        Fetches complaints that have not been analyzed yet and locks them.
+        Complaints locked by a concurrent analysis are skipped, so none is scored twice.
+        """
+        if not complaint_ids:
+            return []
+        return (
+            self._session.query(Complaint)
+            .filter(Complaint.id.in_(complaint_ids), Complaint.highlighted_keywords.is_(None))
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+    def get_unanalyzed_complaint_refs(self, created_before: datetime, limit: int,
+                                      max_sweeps: int) -> List[Tuple[str, str, int]]:
+        """
+        Fetches (tender_id, complaint_id, analysis_sweeps) of complaints stored before created_before
+        that are still not analyzed and were re-queued fewer than max_sweeps times, oldest first
+        (partial index ix_complaints_unanalyzed).
+        """
+        rows = (
+            self._session.query(Complaint.tender_id, Complaint.id, Complaint.analysis_sweeps)
+            .filter(Complaint.highlighted_keywords.is_(None), Complaint.created_at < created_before,
+                    Complaint.analysis_sweeps < max_sweeps)
+            .order_by(Complaint.created_at)
+            .limit(limit)
+            .all()
+        )
+        return [(row.tender_id, row.id, row.analysis_sweeps) for row in rows]
+
+    def increment_complaint_analysis_sweeps(self, complaint_ids: List[str]) -> None:
+        """Counts a backlog sweep for every given complaint."""
+        if not complaint_ids:
+            return
+        (self._session.query(Complaint)
+         .filter(Complaint.id.in_(complaint_ids))
+         .update({Complaint.analysis_sweeps: Complaint.analysis_sweeps + 1}, synchronize_session=False))
+
+    def get_unanalyzed_complaint_stats(self, max_sweeps: int) -> Dict:
+        """
+        Counts complaints that are not analyzed yet:
+          - count: those still being retried
+          - oldest_created_at: of those still being retried (None when there are none)
+          - abandoned: those re-queued max_sweeps times, which the backlog sweeper gave up on
+        """
+        retried = Complaint.analysis_sweeps < max_sweeps
+        row = (
+            self._session
+            .query(func.count(Complaint.id).filter(retried).label('count'),
+                   func.min(Complaint.created_at).filter(retried).label('oldest_created_at'),
+                   func.count(Complaint.id).filter(~retried).label('abandoned'))
+            .filter(Complaint.highlighted_keywords.is_(None))
+            .one()
+        )
+        return {'count': row.count, 'oldest_created_at': row.oldest_created_at, 'abandoned': row.abandoned}
+
+    def iter_complaint_texts(self, created_since: Optional[datetime] = None,
+                             date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                             statuses: Optional[List[str]] = None, general_classifier_id: Optional[int] = None,
+                             batch_size: int = 1000) -> Iterator:
+        """
+        Streams (id, created_at, title, description) of complaints in (created_at, id) order
+        through a server-side cursor, batch_size rows at a time (full index ix_complaints_created_at_id).
+        :param created_since: Only complaints stored at or after this.
+        :param date_from: Only complaints dated at or after this...
+        :param date_to: ...and before this.
+        :param statuses: Only complaints with one of these statuses.
+        :param general_classifier_id: Only complaints of tenders with this general classifier.
+        """
+        query = self._session.query(Complaint.id, Complaint.created_at, Complaint.title, Complaint.description)
+        if general_classifier_id is not None:
+            query = query.join(Tender, Tender.id == Complaint.tender_id).filter(
+                Tender.general_classifier_id == general_classifier_id)
+        if created_since:
+            query = query.filter(Complaint.created_at >= created_since)
+        if date_from:
+            query = query.filter(Complaint.date >= date_from)
+        if date_to:
+            query = query.filter(Complaint.date < date_to)
+        if statuses:
+            query = query.filter(Complaint.status.in_(statuses))
+        return iter(query.order_by(Complaint.created_at, Complaint.id).yield_per(batch_size))
+
+    def get_complaint_ids_with_lemmas(self, lemmas: List[str], exclude_version: Optional[str] = None) -> List[str]:
+        """
+        Fetches IDs of analyzed complaints whose lemmas intersect the given ones (GIN index on complaints.lemmas).
+        :param exclude_version: Complaints already analyzed with this keyword set version are skipped.
+        """
+        if not lemmas:
+            return []
+        query = self._session.query(Complaint.id).filter(
+            Complaint.lemmas.overlap(lemmas), Complaint.highlighted_keywords.isnot(None))
+        if exclude_version:
+            query = query.filter(Complaint.keyword_set_version.is_distinct_from(exclude_version))
+        return [row.id for row in query.order_by(Complaint.id)]
+
+    def advance_keyword_set_version(self, from_version: str, to_version: str, changed_lemmas: List[str]) -> int:
+        """
+        Moves analyzed complaints at from_version whose lemmas touch none of changed_lemmas to to_version,
+        their highlights and scores are the same under both keyword sets.
+        :return: The number of complaints moved.
+        """
+        query = self._session.query(Complaint).filter(
+            Complaint.keyword_set_version == from_version, Complaint.highlighted_keywords.isnot(None))
+        if changed_lemmas:
+            # complaints without stored lemmas cannot be told apart, they stay behind and are rescored later
+            query = query.filter(~Complaint.lemmas.overlap(changed_lemmas))
+        return query.update({Complaint.keyword_set_version: to_version}, synchronize_session=False)
+
+    def get_complaint_ids_not_at_versions(self, versions: List[str]) -> List[str]:
+        """
+        Fetches IDs of analyzed complaints whose keyword set version is none of the given ones,
+        including those analyzed before versioning that have no stored lemmas yet.
+        """
+        query = self._session.query(Complaint.id).filter(
+            Complaint.highlighted_keywords.isnot(None),
+            or_(Complaint.keyword_set_version.is_(None), Complaint.keyword_set_version.notin_(versions)))
+        return [row.id for row in query.order_by(Complaint.id)]
+
+    def get_complaints_for_rescore(self, complaint_ids: List[str], keyword_set_version: str) -> List[Complaint]:
+        """
+        Fetches analyzed complaints not yet rescored with the given keyword set version and locks them,
+        in a fixed order so that concurrent rescoring chunks cannot deadlock.
+        """
+        if not complaint_ids:
+            return []
+        return (
+            self._session.query(Complaint)
+            .filter(Complaint.id.in_(complaint_ids),
+                    Complaint.highlighted_keywords.isnot(None),
+                    Complaint.keyword_set_version.is_distinct_from(keyword_set_version))
+            .order_by(Complaint.id)
+            .with_for_update()
+            .all()
+        )
+
     def get_subscribed_tenders(self, user_id: int) -> list[Tender]:
         """
         Fetches all tenders that a user is subscribed to.
@@ -1,14 +1,51 @@
-from typing import Optional, Any, List, Dict
+from typing import Optional, Any, List, Dict, Tuple
 
-from sqlalchemy import Integer
+from sqlalchemy import Integer, literal_column
+from sqlalchemy.dialects.postgresql import insert, JSONB
 from sqlalchemy.orm import Session
 
 from models import Complaint
 from models.violation_scores import ViolationScore
 from repositories.base_repository import BaseRepository
 
+# Adds per-domain scores and keyword counts of the inserted row (EXCLUDED)
+# to the stored ones, so concurrent updates never read-modify-write in Python.
+# Rescoring sends negative deltas: keywords whose count drops to zero are removed,
+# and so are the delta's domains left without keywords.
+MERGE_SCORES_SQL = """
+(COALESCE(violation_scores.scores, '{}'::jsonb) - ARRAY(SELECT jsonb_object_keys(EXCLUDED.scores))) || COALESCE((
+    SELECT jsonb_object_agg(merged.key, merged.value)
+    FROM (
+        SELECT
+            delta.key,
+            jsonb_build_object(
+                'score',
+                COALESCE((violation_scores.scores -> delta.key ->> 'score')::float8, 0)
+                    + (delta.value ->> 'score')::float8,
+                'keywords',
+                COALESCE((
+                    SELECT jsonb_object_agg(kw.key, kw.count)
+                    FROM (
+                        SELECT COALESCE(old_kw.key, new_kw.key) AS key,
+                               COALESCE(old_kw.value::int, 0) + COALESCE(new_kw.value::int, 0) AS count
+                        FROM jsonb_each_text(violation_scores.scores -> delta.key -> 'keywords') AS old_kw
+                        FULL OUTER JOIN jsonb_each_text(delta.value -> 'keywords') AS new_kw
+                            ON old_kw.key = new_kw.key
+                    ) AS kw
+                    WHERE kw.count > 0
+                ), '{}'::jsonb)
+            ) AS value
+        FROM jsonb_each(EXCLUDED.scores) AS delta
+    ) AS merged
+    WHERE merged.value -> 'keywords' <> '{}'::jsonb
+), '{}'::jsonb)
+"""
+
 
 class ViolationScoreRepository(BaseRepository[ViolationScore]):
+    ANALYSIS_COLUMNS = ("highlighted_keywords", "highlighted_html", "lemmas", "lemma_stream")
+    TOPIC_COLUMNS = ("topic_id", "topic_weights", "topic_model_version")
+
     def __init__(self, session: Session):
         super().__init__(session)
 
@@ -17,22 +54,49 @@ class ViolationScoreRepository(BaseRepository[ViolationScore]):
         return self._session.query(ViolationScore).filter_by(id=id).first()
 
     def get_by_tender_id(self, tender_id: str) -> Optional[ViolationScore]:
-        """Get ViolationScore by tender_id with a row-level lock."""
-        return (
-            self._session.query(ViolationScore)
-            .filter_by(tender_id=tender_id)
-            .with_for_update()
-            .first()
-        )
+        """Get ViolationScore by tender_id."""
+        return self._session.query(ViolationScore).filter_by(tender_id=tender_id).first()
 
     def create(self, violation_score: ViolationScore) -> None:
         """Create a new ViolationScore, flush and commit the session."""
         self._session.add(violation_score)
         self._session.flush()
 
+    def add_scores(self, tender_id: str, new_domain_data: Dict) -> Dict:
+        """
+        Atomically adds per-domain scores to the tender's ViolationScore, creating it if needed.
+        A single INSERT ... ON CONFLICT DO UPDATE, the merge happens on the server.
+        :param new_domain_data: {"score": float, "keywords": Dict[strLemma, intCount]} per domain.
+        :return: The merged scores.
+        """
+        stmt = insert(ViolationScore).values(tender_id=tender_id, scores=new_domain_data)
+        stmt = stmt.on_conflict_do_update(
+            constraint='uq_violation_scores_tender_id',
+            set_={'scores': literal_column(MERGE_SCORES_SQL, type_=JSONB)}
+        ).returning(ViolationScore.scores)
+        return self._session.execute(stmt).scalar_one()
+
     def update_complaint_highlighted_keywords(self, complaint: Complaint, highlighted_keywords: List[Dict]) -> None:
         """
         Updates the highlighted keywords in a complaint.
         """
         complaint.highlighted_keywords = highlighted_keywords
-        self._session.flush()
\ No newline at end of file
+        self._session.flush()
+
+    def update_complaints_analysis(self, complaint_results: List[Tuple[Complaint, Dict[str, Any]]],
+                                   keyword_set_version: Optional[str] = None) -> None:
+        """
+        Stores the analysis results of several complaints with a single flush.
+        :param complaint_results: Per complaint, values of its analysis columns: highlighted_keywords,
+                                  highlighted_html, lemmas and lemma_stream, and of its topic columns
+                                  topic_id, topic_weights and topic_model_version. Topic columns are left
+                                  as they are when topic_model_version is missing, i.e. no topic model was loaded.
+        """
+        for complaint, results in complaint_results:
+            for column in self.ANALYSIS_COLUMNS:
+                setattr(complaint, column, results.get(column))
+            if "topic_model_version" in results:
+                for column in self.TOPIC_COLUMNS:
+                    setattr(complaint, column, results.get(column))
+            complaint.keyword_set_version = keyword_set_version
+        self._session.flush()
@@ -0,0 +1,71 @@
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+import spacy
+from celery import group
+
+from app import app
+from repositories.keyword_set_repository import KeywordSetRepository
+from repositories.tender_repository import TenderRepository
+from services.complaint_analysis_service import rescore_complaints_task
+from services.keyword_set_service import KeywordSetService
+from util.db_context_manager import session_scope
+from util.keyword_sets import lemmatize_keywords, load_keyword_artifact
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("rescore")
+
+MODEL_NAME = "uk_core_news_sm"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Registers the current keywords.json and rescores the complaints its changes affect. "
+                    "Restart the NLP workers with the new keywords.json before running this.")
+    parser.add_argument("--keywords", default="keywords.json", help="Path to the keywords file.")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Complaints per rescoring task.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the affected complaints.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with open(args.keywords, 'r', encoding='utf-8') as file:
+        keywords = json.load(file)
+
+    artifact = load_keyword_artifact(str(Path(args.keywords).with_suffix(".lemmatized.json")), keywords, MODEL_NAME)
+    if artifact:
+        lemmatized_keywords = artifact["lemmatized_keywords"]
+    else:
+        lemmatized_keywords = lemmatize_keywords(spacy.load(MODEL_NAME, disable=["parser", "ner"]), keywords)
+
+    with app.app_context(), session_scope() as session:
+        keyword_set_service = KeywordSetService(KeywordSetRepository(session), TenderRepository(session))
+        keyword_set, created = keyword_set_service.register(keywords, lemmatized_keywords)
+        if keyword_set.diff:
+            logger.info(f"Diff against {keyword_set.parent_version}: "
+                        + ", ".join(f"{len(v)} {k}" for k, v in keyword_set.diff.items()))
+        complaint_ids = keyword_set_service.find_affected_complaint_ids(keyword_set)
+        version = keyword_set.version
+        if args.dry_run:
+            session.rollback()
+        else:
+            # committed with the keyword set, before the rescoring tasks are dispatched
+            keyword_set_service.advance_unaffected_complaints(keyword_set)
+
+    logger.info(f"Keyword set {version} ({'new' if created else 'already registered'}): "
+                f"{len(complaint_ids)} complaints to rescore.")
+    if args.dry_run or not complaint_ids:
+        return 0
+
+    chunks = [complaint_ids[i:i + args.chunk_size] for i in range(0, len(complaint_ids), args.chunk_size)]
+    group(rescore_complaints_task.s(chunk, version) for chunk in chunks).apply_async()
+    logger.info(f"Dispatched {len(chunks)} rescoring tasks.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import base64
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import redis
+
+from util.lemma_stream import encode_tokens, decode_tokens
+
+
+class AnalysisCache:
+    """
+    Content-addressed cache of complaint analysis results, keyed by the text's sha256 and the
+    keyword set version. A bounded in-process LRU sits in front of Redis, which is shared by
+    all workers. Hit and miss counts are kept in Redis for the /metrics endpoint.
+    """
+
+    KEY_PREFIX = "nlp:analysis"
+    STATS_KEY = "nlp:analysis_cache:stats"
+    STAT_FIELDS = ("local_hits", "redis_hits", "misses")
+
+    def __init__(self, redis_client: redis.Redis, max_entries: int = 10000, ttl_seconds: int = 30 * 24 * 3600):
+        self.redis = redis_client
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local: "OrderedDict[str, Dict]" = OrderedDict()
+        self.logger = logging.getLogger(type(self).__name__)
+
+    @classmethod
+    def from_url(cls, redis_url: str, max_entries: int = 10000, ttl_seconds: int = 30 * 24 * 3600) -> "AnalysisCache":
+        return cls(redis.Redis.from_url(redis_url), max_entries, ttl_seconds)
+
+    @classmethod
+    def key(cls, text: str, keyword_set_version: Optional[str]) -> str:
+        return f"{cls.KEY_PREFIX}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}:{keyword_set_version}"
+
+    def get_many(self, texts: List[str], keyword_set_version: Optional[str]) -> List[Optional[Dict]]:
+        """
+        Looks the texts up, first in process memory, then in Redis.
+        :return: The cached analysis per text, None where missing.
+        """
+        keys = [self.key(text, keyword_set_version) for text in texts]
+        entries = [self._get_local(key) for key in keys]
+        local_hits = sum(entry is not None for entry in entries)
+
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+        redis_hits = 0
+        if missing:
+            try:
+                raw_entries = self.redis.mget([keys[i] for i in missing])
+            except redis.RedisError as e:
+                self.logger.warning(f"Analysis cache lookup failed, analyzing without it: {e}")
+                raw_entries = [None] * len(missing)
+            for i, raw in zip(missing, raw_entries):
+                if raw is not None:
+                    entries[i] = self._deserialize(raw)
+                    self._put_local(keys[i], entries[i])
+                    redis_hits += 1
+
+        self._count(local_hits=local_hits, redis_hits=redis_hits, misses=len(texts) - local_hits - redis_hits)
+        return [self._to_analysis(entry) if entry is not None else None for entry in entries]
+
+    def put_many(self, texts: List[str], analyses: List[Dict], keyword_set_version: Optional[str]) -> None:
+        """Caches analyses holding "highlighted_keywords", "lemmas" and "tokens"."""
+        if not texts:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for text, analysis in zip(texts, analyses):
+            key = self.key(text, keyword_set_version)
+            entry = self._to_entry(analysis)
+            self._put_local(key, entry)
+            pipe.set(key, self._serialize(entry), ex=self.ttl_seconds)
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            self.logger.warning(f"Could not store {len(texts)} analyses in the cache: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Cache hit and miss counts of all workers."""
+        raw = self.redis.hgetall(self.STATS_KEY)
+        values = {k.decode() if isinstance(k, bytes) else k: int(v) for k, v in raw.items()}
+        return {field: values.get(field, 0) for field in self.STAT_FIELDS}
+
+    def _get_local(self, key: str) -> Optional[Dict]:
+        entry = self._local.get(key)
+        if entry is not None:
+            self._local.move_to_end(key)
+        return entry
+
+    def _put_local(self, key: str, entry: Dict) -> None:
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def _count(self, **counts: int) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        for field, count in counts.items():
+            if count:
+                pipe.hincrby(self.STATS_KEY, field, count)
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            self.logger.debug(f"Could not update analysis cache stats: {e}")
+
+    @staticmethod
+    def _to_entry(analysis: Dict) -> Dict:
+        # tokens are kept as a lemma stream over the text's own lemma list, global vocabulary
+        # ids are not cached since they only exist once the analyzing transaction commits
+        token_lemmas = list(dict.fromkeys(lemma for lemma, _, _ in analysis["tokens"]))
+        return {
+            "highlighted_keywords": analysis["highlighted_keywords"],
+            "lemmas": analysis["lemmas"],
+            "token_lemmas": token_lemmas,
+            "stream": encode_tokens(analysis["tokens"], {lemma: i for i, lemma in enumerate(token_lemmas)}),
+        }
+
+    @staticmethod
+    def _to_analysis(entry: Dict) -> Dict:
+        return {
+            "highlighted_keywords": entry["highlighted_keywords"],
+            "lemmas": entry["lemmas"],
+            "tokens": decode_tokens(entry["stream"], dict(enumerate(entry["token_lemmas"]))),
+        }
+
+    @staticmethod
+    def _serialize(entry: Dict) -> str:
+        return json.dumps({**entry, "stream": base64.b64encode(entry["stream"]).decode("ascii")}, ensure_ascii=False)
+
+    @staticmethod
+    def _deserialize(raw: bytes) -> Dict:
+        entry = json.loads(raw)
+        entry["stream"] = base64.b64decode(entry["stream"])
+        return entry
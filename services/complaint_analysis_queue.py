@@ -0,0 +1,66 @@
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+
+import redis
+
+
+class ComplaintAnalysisQueue:
+    """
+    Redis list of complaints waiting for NLP analysis.
+    Producers push (tender_id, complaint_id) pairs, the NLP batch consumer pops them
+    in micro-batches that are flushed on size or on time, whichever comes first.
+    """
+
+    DEFAULT_KEY = "nlp:pending_complaints"
+
+    def __init__(self, redis_client: redis.Redis, key: str = DEFAULT_KEY, poll_interval_seconds: float = 0.05):
+        self.redis = redis_client
+        self.key = key
+        self.poll_interval_seconds = poll_interval_seconds
+        self.logger = logging.getLogger(type(self).__name__)
+
+    @classmethod
+    def from_url(cls, redis_url: str, key: str = DEFAULT_KEY) -> "ComplaintAnalysisQueue":
+        return cls(redis.Redis.from_url(redis_url), key)
+
+    def push(self, tender_id: str, complaint_id: str, attempts: int = 0) -> None:
+        self.push_many([{"tender_id": tender_id, "complaint_id": complaint_id, "attempts": attempts}])
+
+    def push_many(self, items: List[Dict]) -> None:
+        if not items:
+            return
+        self.redis.rpush(self.key, *(json.dumps(item) for item in items))
+
+    def size(self) -> int:
+        return self.redis.llen(self.key)
+
+    def pop_batch(self, max_size: int, max_wait_seconds: float) -> List[Dict]:
+        """
+        Blocks until at least one item is available (or max_wait_seconds passes),
+        then keeps collecting until the batch holds max_size items or the time is up.
+        """
+        first = self.redis.blpop([self.key], timeout=max_wait_seconds)
+        if not first:
+            return []
+
+        deadline = time.monotonic() + max_wait_seconds
+        raw_items = [first[1]]
+        while len(raw_items) < max_size:
+            popped = self.redis.lpop(self.key, max_size - len(raw_items))
+            if popped:
+                raw_items.extend(popped)
+                continue
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval_seconds)
+
+        return [item for item in (self._decode(raw) for raw in raw_items) if item]
+
+    def _decode(self, raw: bytes) -> Optional[Dict]:
+        try:
+            return json.loads(raw)
+        except (TypeError, ValueError):
+            self.logger.error(f"Dropping malformed queue item: {raw!r}")
+            return None
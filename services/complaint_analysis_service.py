@@ -2,18 +2,25 @@ import json
 import logging
 import os
 from collections import defaultdict
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 import spacy
 from celery_app import app as celery_app
 import math
 
-from exceptions import NlpModelNotAvailableError, NlpResourcesNotAvailableError
+from config import Config
+from exceptions import NlpModelNotAvailableError, NlpResourcesNotAvailableError, KeywordSetVersionMismatchError
 from models import Complaint
-from models import ViolationScore
+from repositories.lemma_vocabulary_repository import LemmaVocabularyRepository
 from repositories.tender_repository import TenderRepository
 from repositories.violation_score_repository import ViolationScoreRepository
+from services.keyword_matcher import KeywordMatcher
+from util.complaint_text_render import render_highlighted_html
 from util.db_context_manager import session_scope
+from util.field_maps import KEYWORD_FIELD_MAP
+from util.lemma_stream import decode_lemma_stream, encode_tokens
+from util.text_chunking import split_text
+from util.topic_model import assign_topics
 
 
 @celery_app.task(autoretry_for=(Exception,), retry_kwargs={'max_retries': 3})
@@ -28,7 +35,8 @@ def analyze_complaint_and_update_score(tender_id: str, complaint_id: str):
                 violation_score_repo = ViolationScoreRepository(session)
                 tender_repo = TenderRepository(session)
 
-                complaint_analysis_service = ComplaintAnalysisService(violation_score_repo)
+                complaint_analysis_service = ComplaintAnalysisService(violation_score_repo,
+                                                                      LemmaVocabularyRepository(session))
 
                 complaint = tender_repo.get_complaint_by_id(complaint_id)
                 complaint_analysis_service.update_violation_scores(tender_id, complaint)
@@ -37,118 +45,305 @@ def analyze_complaint_and_update_score(tender_id: str, complaint_id: str):
             raise
 
 
+@celery_app.task(autoretry_for=(Exception,), retry_kwargs={'max_retries': 3, 'countdown': 30})
+def rescore_complaints_task(complaint_ids: List[str], keyword_set_version: Optional[str] = None):
+    """
+    Re-analyzes a chunk of complaints with a new keyword set and corrects their tenders' scores.
+    Retried (possibly on another worker) while this worker still runs an older keyword set.
+    Without a keyword_set_version the worker's own is used, e.g. for complaints whose description changed.
+    """
+    logger = logging.getLogger(__name__)
+    from app import app
+    with app.app_context(), session_scope() as session:
+        try:
+            complaint_analysis_service = ComplaintAnalysisService(ViolationScoreRepository(session),
+                                                                  LemmaVocabularyRepository(session))
+            worker_version = complaint_analysis_service.keyword_set_version
+            if keyword_set_version is not None and worker_version != keyword_set_version:
+                raise KeywordSetVersionMismatchError(
+                    f"Worker runs keyword set {worker_version}, rescoring requires {keyword_set_version}.")
+
+            complaints = TenderRepository(session).get_complaints_for_rescore(complaint_ids, worker_version)
+            complaint_analysis_service.rescore_complaints(complaints)
+            logger.info(f"Rescored {len(complaints)} of {len(complaint_ids)} complaints "
+                        f"with keyword set {worker_version}.")
+        except Exception as exc:
+            logger.error(f"Error rescoring {len(complaint_ids)} complaints with keyword set "
+                         f"{keyword_set_version}: {exc}", exc_info=True)
+            raise
+
+
 class ComplaintAnalysisService:
-    def __init__(self, violation_score_repo: ViolationScoreRepository):
-        from signals import NLP_MODEL, LEMMATIZED_KEYWORDS
+    def __init__(self, violation_score_repo: ViolationScoreRepository,
+                 lemma_vocabulary_repo: LemmaVocabularyRepository):
+        from signals import NLP_MODEL, LEMMATIZED_KEYWORDS, KEYWORD_MATCHER, KEYWORD_SET_VERSION, ANALYSIS_CACHE, \
+            TOPIC_MODEL
 
         self.logger = logging.getLogger(__name__)
         self.violation_score_repo = violation_score_repo
+        self.lemma_vocabulary_repo = lemma_vocabulary_repo
         self.nlp = NLP_MODEL
         self.lemmatized_keywords = LEMMATIZED_KEYWORDS
+        self.keyword_set_version = KEYWORD_SET_VERSION
+        self.analysis_cache = ANALYSIS_CACHE
+        self.topic_model = TOPIC_MODEL
+        self.max_chunk_chars = Config.NLP_MAX_CHUNK_CHARS
 
-        if not self.nlp:
-            self.logger.critical("CRITICAL: SpaCy model not available. ComplaintAnalysisService cannot function.")
-            raise NlpModelNotAvailableError("SpaCy model (NLP_MODEL) is not loaded.")
         if not self.lemmatized_keywords:
             self.logger.critical(
                 "CRITICAL: Lemmatized keywords not available. ComplaintAnalysisService functionality limited.")
             raise NlpResourcesNotAvailableError("Lemmatized keywords are not loaded.")
 
+        # built once per worker process in signals, built here only if it is missing
+        self.keyword_matcher = KEYWORD_MATCHER or KeywordMatcher(self.lemmatized_keywords)
+
 
     def analyze_complaint_text(self, complaint_text: str) -> List[Dict]:
         """Analyzes complaint text using spaCy lemmatization and returns highlighted keywords."""
-        if not complaint_text:
-            return []
-        doc = self.nlp(complaint_text.lower())
-        
-        # key: ((start_char_offset, length_of_token)
-        # value: {"lemma": "...", "domains": set()}
-        textual_occurrences = {}
-        
-        for token in doc:
-            token_lemma_lower = token.lemma_.lower()
-            for domain, domain_keyword_lemmas in self.lemmatized_keywords.items():
-                if token_lemma_lower in domain_keyword_lemmas:
-                    key = (token.idx, len(token.text))
-                    if key not in textual_occurrences:
-                        textual_occurrences[key] = {
-                            "lemma": token_lemma_lower,
-                            "domains": set()
-                        }
-                    textual_occurrences[key]["domains"].add(domain)
-        
-        highlights = []
-        for (start, length), data in textual_occurrences.items():
-            highlights.append({
-                "keyword": data["lemma"],
-                "domains": list(data["domains"]),
-                "startPosition": start,
-                "length": length
-            })
-        return highlights
-
-    def update_violation_scores(self, tender_id: str, complaint: Complaint) -> ViolationScore:
-        """Updates violation scores by adding new complaint scores to existing ones."""
-        
-        complaint_specific_highlights = self.analyze_complaint_text(complaint.description)
-        
-        self.violation_score_repo.update_complaint_highlighted_keywords(complaint, complaint_specific_highlights)
+        return self.analyze_complaint(complaint_text)["highlighted_keywords"]
+
+    def analyze_complaint_texts(self, complaint_texts: List[str], batch_size: int = 32) -> List[List[Dict]]:
+        """
+        Analyzes several complaint texts with a single nlp.pipe call.
+        Returns highlighted keywords per text, in input order.
+        """
+        return [result["highlighted_keywords"] for result in self.analyze_complaints(complaint_texts, batch_size)]
+
+    def analyze_complaint(self, complaint_text: str) -> Dict:
+        """
+        Analyzes complaint text.
+        :return: {"highlighted_keywords": List[Dict], "lemmas": List[str], "tokens": List[(lemma, start, length)]}
+        """
+        return self.analyze_complaints([complaint_text])[0]
+
+    def analyze_complaints(self, complaint_texts: List[str], batch_size: int = 32) -> List[Dict]:
+        """
+        Like analyze_complaint, for several texts in one nlp.pipe call. Results are in input order.
+        Texts found in the analysis cache are not run through the model.
+        """
+        results = [self._empty_analysis() for _ in complaint_texts]
+        non_empty = [(i, text.lower()) for i, text in enumerate(complaint_texts) if text]
+
+        if self.analysis_cache and non_empty:
+            cached = self.analysis_cache.get_many([text for _, text in non_empty], self.keyword_set_version)
+            for (i, _), analysis in zip(non_empty, cached):
+                if analysis is not None:
+                    results[i] = analysis
+            non_empty = [item for item, analysis in zip(non_empty, cached) if analysis is None]
+
+        if not non_empty:
+            return results
+
+        # long texts go through the model in chunks, so memory per doc stays bounded
+        chunks = [(i, offset, chunk) for i, text in non_empty for offset, chunk in split_text(text, self.max_chunk_chars)]
+        docs = self._require_nlp().pipe((chunk for _, _, chunk in chunks), batch_size=batch_size)
+        tokens_per_text = {i: [] for i, _ in non_empty}
+        for (i, offset, _), doc in zip(chunks, docs):
+            tokens_per_text[i].extend(
+                (token.lemma_.lower(), token.idx + offset, len(token.text)) for token in doc)
+        for i, _ in non_empty:
+            results[i] = self._analyze_tokens(tokens_per_text[i])
+
+        if self.analysis_cache:
+            self.analysis_cache.put_many([text for _, text in non_empty], [results[i] for i, _ in non_empty],
+                                         self.keyword_set_version)
+        return results
+
+    def _require_nlp(self):
+        """The model is only needed for texts missing from the cache and without a lemma stream."""
+        if not self.nlp:
+            self.logger.critical("CRITICAL: SpaCy model not available. ComplaintAnalysisService cannot function.")
+            raise NlpModelNotAvailableError("SpaCy model (NLP_MODEL) is not loaded.")
+        return self.nlp
+
+    def analyze_stored_complaints(self, complaints: List[Complaint], batch_size: int = 32) -> List[Dict]:
+        """
+        Like analyze_complaints, but complaints with a stored lemma stream are matched
+        from it without running the model. Results are in input order.
+        """
+        streams = {i: decode_lemma_stream(c.lemma_stream) for i, c in enumerate(complaints) if c.lemma_stream}
+        lemmas_by_id = self.lemma_vocabulary_repo.get_lemmas(
+            {lemma_id for lemma_ids, _, _ in streams.values() for lemma_id in lemma_ids})
+
+        results = [None] * len(complaints)
+        for i, (lemma_ids, starts, lengths) in streams.items():
+            results[i] = self._analyze_tokens(
+                [(lemmas_by_id[lemma_id], start, length) for lemma_id, start, length in zip(lemma_ids, starts, lengths)])
+            results[i]["lemma_stream"] = complaints[i].lemma_stream
+
+        without_stream = [i for i in range(len(complaints)) if i not in streams]
+        if without_stream:
+            analyses = self.analyze_complaints([complaints[i].description for i in without_stream], batch_size)
+            for i, analysis in zip(without_stream, analyses):
+                results[i] = analysis
+        return results
+
+    @staticmethod
+    def _empty_analysis() -> Dict:
+        return {"highlighted_keywords": [], "lemmas": [], "tokens": []}
+
+    def _analyze_tokens(self, tokens: List[Tuple[str, int, int]]) -> Dict:
+        return {
+            "highlighted_keywords": self.keyword_matcher.match(tokens),
+            # punctuation never forms a keyword, no need to index it
+            "lemmas": sorted({lemma for lemma, _, _ in tokens if any(ch.isalnum() for ch in lemma)}),
+            "tokens": tokens,
+        }
 
+    def assign_topics(self, analyses: List[Dict]) -> List[Dict]:
+        """
+        Topic columns of analyzed complaints, from their lemmas with one projection for the whole batch.
+        :return: Per analysis {"topic_id", "topic_weights", "topic_model_version"}, empty dicts without a topic model.
+        """
+        if not self.topic_model:
+            return [{} for _ in analyses]
+        lemma_texts = [" ".join(lemma for lemma, _, _ in analysis["tokens"]) for analysis in analyses]
+        return [{"topic_id": topic_id, "topic_weights": weights, "topic_model_version": self.topic_model["version"]}
+                for topic_id, weights in assign_topics(self.topic_model, lemma_texts)]
 
+    def _store_analyses(self, complaints: List[Complaint], analyses: List[Dict]) -> None:
+        """
+        Stores highlights, their rendered HTML, lemmas, lemma streams and topics of analyzed complaints in bulk.
+        """
+        vocabulary = self.lemma_vocabulary_repo.get_or_create_ids(
+            {lemma for analysis in analyses if "lemma_stream" not in analysis for lemma, _, _ in analysis["tokens"]})
+        topics = self.assign_topics(analyses)
+        self.violation_score_repo.update_complaints_analysis(
+            [(complaint, {
+                "highlighted_keywords": analysis["highlighted_keywords"],
+                "highlighted_html": render_highlighted_html(complaint.description, analysis["highlighted_keywords"],
+                                                            KEYWORD_FIELD_MAP),
+                "lemmas": analysis["lemmas"],
+                "lemma_stream": analysis.get("lemma_stream") or encode_tokens(analysis["tokens"], vocabulary),
+                **complaint_topics,
+            }) for complaint, analysis, complaint_topics in zip(complaints, analyses, topics)],
+            self.keyword_set_version)
+
+    @staticmethod
+    def score_highlights(highlights: List[Dict]) -> Dict:
+        """
+        Computes per-domain scores of a single complaint.
+        :return: {"score": float, "keywords": Dict[strLemma, intCount]} per domain.
+        """
         lemma_counts_per_domain = defaultdict(lambda: defaultdict(int))
-        
-        for highlight_item in complaint_specific_highlights:
+
+        for highlight_item in highlights:
             lemma = highlight_item["keyword"]
             for domain_from_item in highlight_item["domains"]:
                 lemma_counts_per_domain[domain_from_item][lemma] += 1
-        
-        new_domain_data = {} # {"score": float, "keywords": Dict[strLemma, intCount]} per domain
+
+        new_domain_data = {}
         for domain_name, counts_for_this_domain in lemma_counts_per_domain.items():
             current_domain_score_contribution = 0.0
             current_domain_keywords_map = {} # {"keywords": {"lemma1": count, "lemma2": count}}
-            
+
             for lemma, count in counts_for_this_domain.items():
                 weight = math.log1p(count)
                 current_domain_score_contribution += weight
                 current_domain_keywords_map[lemma] = count
-            
+
             if current_domain_score_contribution > 0:
                  new_domain_data[domain_name] = {
                      "score": current_domain_score_contribution,
                      "keywords": current_domain_keywords_map
                  }
+        return new_domain_data
+
+    @staticmethod
+    def sum_domain_scores(first: Dict, second: Dict) -> Dict:
+        """Adds per-domain scores and keyword counts, which may be negative deltas. Nothing is dropped."""
+        summed = {domain: {"score": data["score"], "keywords": dict(data.get("keywords", {}))}
+                  for domain, data in first.items()}
+        for domain, data in second.items():
+            domain_data = summed.setdefault(domain, {"score": 0.0, "keywords": {}})
+            domain_data["score"] += data["score"]
+            for kw, cnt in data.get("keywords", {}).items():
+                domain_data["keywords"][kw] = domain_data["keywords"].get(kw, 0) + cnt
+        return summed
+
+    @classmethod
+    def subtract_domain_scores(cls, new_domain_data: Dict, old_domain_data: Dict) -> Dict:
+        """
+        Computes the delta turning old per-domain scores into new ones.
+        Domains and keywords left unchanged are omitted.
+        """
+        negated = {domain: {"score": -data["score"], "keywords": {kw: -cnt for kw, cnt in data["keywords"].items()}}
+                   for domain, data in old_domain_data.items()}
+        delta = {}
+        for domain, data in cls.sum_domain_scores(new_domain_data, negated).items():
+            keywords = {kw: cnt for kw, cnt in data["keywords"].items() if cnt != 0}
+            if keywords:
+                delta[domain] = {"score": data["score"], "keywords": keywords}
+        return delta
+
+    @classmethod
+    def merge_domain_scores(cls, existing_scores: Dict, new_domain_data: Dict) -> Dict:
+        """
+        Adds new per-domain scores and keyword counts to existing ones, mirroring the repository's upsert:
+        keywords whose count drops to zero are removed, and so are updated domains left without keywords.
+        """
+        merged_scores = cls.sum_domain_scores(existing_scores, new_domain_data)
+        for domain in new_domain_data:
+            keywords = {kw: cnt for kw, cnt in merged_scores[domain]["keywords"].items() if cnt > 0}
+            if keywords:
+                merged_scores[domain]["keywords"] = keywords
+            else:
+                del merged_scores[domain]
+        return merged_scores
+
+    def update_violation_scores(self, tender_id: str, complaint: Complaint) -> Dict:
+        """Updates violation scores by adding new complaint scores to existing ones."""
+        
+        analysis = self.analyze_complaint(complaint.description)
+        complaint_specific_highlights = analysis["highlighted_keywords"]
+
+        self._store_analyses([complaint], [analysis])
+
+        return self._add_tender_scores(tender_id, self.score_highlights(complaint_specific_highlights))
+
+    def update_violation_scores_batch(self, complaints: List[Complaint], batch_size: int = 32) -> Dict[str, Dict]:
+        """
+        Analyzes complaints of any number of tenders in one nlp.pipe pass, stores their
+        highlights in bulk and applies one aggregated score update per tender.
+        """
+        analyses = self.analyze_complaints([c.description for c in complaints], batch_size)
+        self._store_analyses(complaints, analyses)
+
+        new_data_per_tender = {}
+        for complaint, analysis in zip(complaints, analyses):
+            new_data_per_tender[complaint.tender_id] = self.sum_domain_scores(
+                new_data_per_tender.get(complaint.tender_id, {}), self.score_highlights(analysis["highlighted_keywords"]))
+
+        # fixed order, so that concurrent batches upsert score rows in the same sequence
+        return {
+            tender_id: self._add_tender_scores(tender_id, new_data_per_tender[tender_id])
+            for tender_id in sorted(new_data_per_tender)
+        }
+
+    def rescore_complaints(self, complaints: List[Complaint], batch_size: int = 32) -> Dict[str, Dict]:
+        """
+        Re-analyzes already scored complaints with the current keyword set, from their lemma streams where
+        stored. Each tender's scores are corrected by the difference between the complaints' new and
+        previously stored highlights.
+        :return: The merged scores of the tenders whose scores changed.
+        """
+        analyses = self.analyze_stored_complaints(complaints, batch_size)
+
+        delta_per_tender = {}
+        for complaint, analysis in zip(complaints, analyses):
+            delta = self.subtract_domain_scores(self.score_highlights(analysis["highlighted_keywords"]),
+                                                self.score_highlights(complaint.highlighted_keywords or []))
+            if delta:
+                delta_per_tender[complaint.tender_id] = self.sum_domain_scores(
+                    delta_per_tender.get(complaint.tender_id, {}), delta)
+
+        self._store_analyses(complaints, analyses)
 
+        return {
+            tender_id: self._add_tender_scores(tender_id, delta_per_tender[tender_id])
+            for tender_id in sorted(delta_per_tender)
+        }
 
-        existing = self.violation_score_repo.get_by_tender_id(tender_id)
-        if existing:
-            merged_scores = existing.scores.copy()
-            for domain, new_data in new_domain_data.items():
-                prev_domain_data = merged_scores.get(domain, {"score": 0.0, "keywords": {}})
-                
-                total_score = prev_domain_data["score"] + new_data["score"]
-                
-
-                kw_counts_for_domain = defaultdict(int, prev_domain_data.get("keywords", {}))
-                for kw, cnt in new_data["keywords"].items():
-                    kw_counts_for_domain[kw] += cnt
-                
-                merged_scores[domain] = {
-                    "score": total_score,
-                    "keywords": dict(kw_counts_for_domain)
-                }
-            
-            for domain, prev_data in existing.scores.items():
-                if domain not in merged_scores:
-                    merged_scores[domain] = prev_data
-
-            existing.scores = merged_scores
-            self.violation_score_repo.flush()
-            return existing
-
-
-        created = ViolationScore(
-            tender_id=tender_id,
-            scores=new_domain_data
-        )
-        self.violation_score_repo.create(created)
-        return created
\ No newline at end of file
+    def _add_tender_scores(self, tender_id: str, new_domain_data: Dict) -> Dict:
+        """Adds the scores to the tender's ViolationScore with a server-side upsert, returns the merged scores."""
+        return self.violation_score_repo.add_scores(tender_id, new_domain_data)
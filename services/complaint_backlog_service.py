@@ -0,0 +1,74 @@
+import logging
+from datetime import timedelta
+from typing import Dict
+
+from repositories.tender_repository import TenderRepository
+from services.complaint_analysis_queue import ComplaintAnalysisQueue
+from services.datetime_provider import DatetimeProvider
+
+
+class ComplaintBacklogService:
+    """
+    Finds complaints that were stored but never analyzed, e.g. because enqueueing them failed
+    after commit or their analysis ran out of retries, and sends them back to the NLP batch consumer.
+    Every re-queue is counted on the complaint, one that is still unanalyzed after max_sweeps of
+    them is given up on, so a complaint whose analysis always fails is not retried forever.
+    """
+
+    def __init__(self, tender_repo: TenderRepository, analysis_queue: ComplaintAnalysisQueue,
+                 datetime_provider: DatetimeProvider, min_age_minutes: int = 30, batch_limit: int = 1000,
+                 max_sweeps: int = 3):
+        """
+        :param min_age_minutes: Younger complaints are left alone, they are most likely still queued.
+        :param batch_limit: At most this many complaints are re-queued per sweep.
+        :param max_sweeps: Times a complaint is re-queued before it is given up on.
+        """
+        self.tender_repo = tender_repo
+        self.analysis_queue = analysis_queue
+        self.datetime_provider = datetime_provider
+        self.min_age_minutes = min_age_minutes
+        self.batch_limit = batch_limit
+        self.max_sweeps = max_sweeps
+        self.logger = logging.getLogger(type(self).__name__)
+
+    def sweep(self) -> int:
+        """
+        Re-queues the oldest unanalyzed complaints.
+        :return: The number of complaints re-queued.
+        """
+        created_before = self.datetime_provider.utc_now() - timedelta(minutes=self.min_age_minutes)
+        refs = self.tender_repo.get_unanalyzed_complaint_refs(created_before, self.batch_limit, self.max_sweeps)
+        if not refs:
+            return 0
+
+        # counted before queueing, so the count is not lost if the complaint is analyzed right away
+        self.tender_repo.increment_complaint_analysis_sweeps([complaint_id for _, complaint_id, _ in refs])
+        self.analysis_queue.push_many([
+            {"tender_id": tender_id, "complaint_id": complaint_id, "attempts": 0}
+            for tender_id, complaint_id, _ in refs
+        ])
+        self.logger.warning(f"Re-queued {len(refs)} complaints stored before {created_before.isoformat()} "
+                            f"that were never analyzed.")
+        for tender_id, complaint_id, sweeps in refs:
+            if sweeps + 1 >= self.max_sweeps:
+                self.logger.error(f"Complaint {complaint_id} of tender {tender_id} was re-queued for the last "
+                                  f"time ({self.max_sweeps} sweeps), it is not retried if its analysis fails again.")
+        return len(refs)
+
+    def backlog(self) -> Dict:
+        """
+        Size of the analysis backlog:
+          - unanalyzed: complaints not analyzed yet and still retried
+          - oldest_age_seconds: age of the oldest of them, 0 when there are none
+          - abandoned: complaints not analyzed after max_sweeps re-queues, no longer retried
+          - queued: items waiting in the analysis queue
+        """
+        stats = self.tender_repo.get_unanalyzed_complaint_stats(self.max_sweeps)
+        oldest = stats["oldest_created_at"]
+        oldest_age = (self.datetime_provider.utc_now() - oldest).total_seconds() if oldest else 0.0
+        return {
+            "unanalyzed": stats["count"],
+            "oldest_age_seconds": max(oldest_age, 0.0),
+            "abandoned": stats["abandoned"],
+            "queued": self.analysis_queue.size(),
+        }
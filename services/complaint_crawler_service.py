@@ -1,119 +1,279 @@
 import logging
-import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from api.discovery_prozorro_client import DiscoveryProzorroClient
 from api.legacy_prozorro_client import LegacyProzorroClient
+from services.text_dedup_index import TextDedupIndex
+from services.text_cleaning_pool import TextCleaningPool
 from services.text_processing_service import TextProcessingService
 
 
 class ComplaintCrawlerService:
-    def __init__(self, text_processing_service: TextProcessingService) -> None:
-        self.discovery_client = DiscoveryProzorroClient()
-        self.legacy_client = LegacyProzorroClient()
+    """
+    Gathers complaint/claim texts for the topic modeling corpus as a staged pipeline:
+    a producer thread walks the search pages and hands every tender to a pool of fetcher
+    threads, their pending results wait in a bounded queue, and the calling thread takes them
+    in order and deduplicates the texts. Batches of them are cleaned by a TextCleaningPool whose
+    worker processes live for the whole gathering, while the calling thread collects the next
+    batch; cleaned batches are written in order. A full queue blocks the producer, so fetching
+    never runs more than max_pending tenders ahead of collection, and collection waits while
+    the pool has twice its processes' worth of batches in flight.
+    Every write commits a checkpoint (search page, position and OCID of the last tender whose
+    texts are all stored, texts processed so far) with the corpus, which a later run resumes from.
+    """
+
+    CHECKPOINT_NAME = "crawler"
+
+    QUERY_PARAMS = {
+        "proc_type[0]": "aboveThresholdUA",
+        "proc_type[1]": "aboveThresholdEU",
+        "proc_type[2]": "competitiveOrdering",
+        "sort_by": "value.amount",
+        "order": "desc",
+    }
+
+    def __init__(self, text_processing_service: TextProcessingService, n_process: int = 1,
+                 nlp_batch_size: int = 64, dedup_index: Optional[TextDedupIndex] = None,
+                 fetch_workers: int = 8, max_pending: int = 32, clean_batch_size: int = 256,
+                 page_delay_seconds: float = 0.5,
+                 discovery_client: Optional[DiscoveryProzorroClient] = None,
+                 legacy_client: Optional[LegacyProzorroClient] = None) -> None:
+        """
+        :param n_process: Worker processes of the cleaning pool, each loads the spaCy model once.
+        :param nlp_batch_size: Texts per nlp.pipe batch.
+        :param dedup_index: Texts already in it are skipped, processed texts are added to it.
+        :param fetch_workers: Threads fetching tender details concurrently.
+        :param max_pending: Tenders fetched or being fetched ahead of the cleaning stage.
+        :param clean_batch_size: Collected texts handed to the cleaning stage at once.
+        :param page_delay_seconds: Pause between search page requests, to stay polite to the API.
+        """
+        self.discovery_client = discovery_client or DiscoveryProzorroClient()
+        self.legacy_client = legacy_client or LegacyProzorroClient()
 
         self.text_processor = text_processing_service
+        self.dedup_index = dedup_index
+        self.n_process = n_process
+        self.nlp_batch_size = nlp_batch_size
+        self.fetch_workers = fetch_workers
+        self.max_pending = max_pending
+        self.clean_batch_size = clean_batch_size
+        self.page_delay_seconds = page_delay_seconds
         self.logger = logging.getLogger(type(self).__name__)
 
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        """Asks a running gathering to finish: no new tenders are fetched, collected texts are still stored."""
+        self._stop_event.set()
 
-    def gather_complaint_claim_texts(self, max_texts: int = 1000, start_page: int = 0) -> int:
+    def gather_complaint_claim_texts(self, max_texts: int = 1000, start_page: int = 0,
+                                     resume_from: Optional[Dict] = None) -> int:
+        """
+        Crawls tenders, fetches legacy details, extracts complaint/claim texts, processes them and stores in a corpus.
+        :param max_texts: The target number of complaint/claim texts to collect.
+        :param start_page: The search page to start crawling from.
+        :param resume_from: A checkpoint of an earlier run, crawling continues after its tender instead of start_page.
+        :return: A count of complaint/claim texts processed.
         """
-                Crawls tenders, fetches legacy details, extracts complaint/claim texts, processes them and stores in a corpus.
-                :param max_texts: The target number of complaint/claim texts to collect.
-                :param start_page: The search page to start crawling from.
-                :return: A count of complaint/claim texts processed.
-                """
         self.logger.info(f"Starting complaint/claim text gathering. Target: {max_texts} unique texts.")
+        self._stop_event.clear()
+        if resume_from:
+            self.logger.info(f"Resuming after tender {resume_from['ocid']} on search page {resume_from['page']}.")
 
-        query_params = {
-            "proc_type[0]": "aboveThresholdUA",
-            "proc_type[1]": "aboveThresholdEU",
-            "proc_type[2]": "competitiveOrdering",
-            "sort_by": "value.amount",
-            "order": "desc",
-        }
-
-        seen_raw_texts = set()
+        pending: "queue.Queue[Optional[Tuple[Dict, Future]]]" = queue.Queue(maxsize=self.max_pending)
+        seen_text_hashes = set()
+        collected_texts_count = 0
         processed_texts_count = 0
-        current_page = start_page
-
-        while processed_texts_count < max_texts:
-            self.logger.info(f"Fetching tender OCIDs from search page {current_page} with expensive tender parameters.")
-            tender_ocids = self.discovery_client.fetch_search_page_tender_ids(
-                page=current_page,
-                query_params=query_params
-            )
-
-            if tender_ocids is None:
-                self.logger.error(f"Failed to fetch tender OCIDs from page {current_page}. Stopping gathering.")
-                break
-            if not tender_ocids:
-                self.logger.info(f"No more tender OCIDs found on page {current_page}. Stopping gathering.")
-                break
-
-            self.logger.info(f"Found {len(tender_ocids)} tender OCIDs on page {current_page}.")
-
-            for ocid in tender_ocids:
-                if processed_texts_count >= max_texts:
+        duplicate_texts_count = 0
+        processed_before = resume_from.get("texts_processed", 0) if resume_from else 0
+
+        def collect() -> Iterator[Tuple[List[str], Optional[Dict]]]:
+            """
+            Takes fetched tenders in order and yields batches of their unique texts, each with the
+            position of the last tender whose texts are all collected by then.
+            """
+            nonlocal collected_texts_count, duplicate_texts_count
+            collected_texts: List[str] = []
+            position = resume_from
+            while collected_texts_count < max_texts:
+                item = pending.get()
+                if item is None:
                     break
 
+                tender_position, future = item
+                tender_texts = future.result()
+                # texts added to the corpus by earlier runs, checked before any cleaning is done
+                previously_seen = (self.dedup_index.contains_many(tender_texts) if self.dedup_index is not None
+                                   else [False] * len(tender_texts))
 
-                self.logger.debug(f"Fetching bridge info for OCID: {ocid}")
-                bridge_info = self.discovery_client.fetch_tender_bridge_info(ocid)
-                if not bridge_info:
-                    self.logger.warning(f"Could not fetch bridge info for OCID {ocid}, skipping.")
-                    continue
+                consumed = True
+                for i, (complaint_title_desc, seen_before) in enumerate(zip(tender_texts, previously_seen)):
+                    text_hash = TextDedupIndex.text_hash(complaint_title_desc)
+                    if seen_before or text_hash in seen_text_hashes:
+                        duplicate_texts_count += 1
+                        continue
+                    seen_text_hashes.add(text_hash)
 
-                tender_uuid = bridge_info.get('id')
-                if not tender_uuid:
-                    self.logger.warning(f"Missing UUID in bridge info for OCID {ocid}, skipping.")
-                    continue
+                    self.logger.debug(f"Collected unique complaint/claim text: {complaint_title_desc[:50]}...")
+                    collected_texts.append(complaint_title_desc)
+                    collected_texts_count += 1
+                    if collected_texts_count >= max_texts:
+                        self.logger.info(f"Reached target of {max_texts} texts.")
+                        consumed = i == len(tender_texts) - 1
+                        break
 
-                tender_details = self.legacy_client.fetch_tender_details(tender_uuid)
-                if not tender_details:
-                    self.logger.warning(f"Could not fetch legacy details for UUID {tender_uuid}, skipping.")
-                    continue
+                if consumed:
+                    position = tender_position
+                if len(collected_texts) >= self.clean_batch_size:
+                    yield collected_texts, position
+                    collected_texts = []
 
-                complaint_claim_texts = tender_details.get("complaints", [])
-                if not complaint_claim_texts:
-                    self.logger.warning(f"No complaints found in legacy details for UUID {tender_uuid}, skipping.")
-                    continue
+            # no more tenders are needed while the last batches are cleaned
+            self.stop()
+            # texts collected before the target was reached or the gathering was stopped are kept
+            if collected_texts or position is not None:
+                yield collected_texts, position
 
-                for complaint in complaint_claim_texts:
-                    if processed_texts_count >= max_texts:
-                        seen_raw_texts.clear()
-                        break
+        # the cleaning pool is started before any fetcher thread, its worker processes are forked from this one
+        with TextCleaningPool(self.n_process, self.nlp_batch_size, self.text_processor.cleaner) as cleaning_pool, \
+                ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="complaint-fetcher") as executor:
+            producer = threading.Thread(target=self._produce, args=(executor, pending, start_page, resume_from),
+                                        name="complaint-page-producer", daemon=True)
+            producer.start()
+
+            try:
+                for texts, position, cleaned_texts in cleaning_pool.clean_batches(collect()):
+                    processed_texts_count += self._store_cleaned(
+                        texts, position, cleaned_texts, processed_before + processed_texts_count)
+            finally:
+                self.stop()
+                while producer.is_alive():
+                    self._drain(pending)
+                    producer.join(timeout=0.1)
+                self._drain(pending)
 
-                    title = complaint.get("title")
-                    description = complaint.get("description")
+        self.logger.info(
+            f"Complaint/claim text gathering finished. Found and processed {processed_texts_count} texts, "
+            f"skipped {duplicate_texts_count} duplicates.")
+        return processed_texts_count
 
-                    complaint_title_desc = f"{title} {description}"
-                    if not complaint_title_desc in seen_raw_texts:
-                        seen_raw_texts.add(complaint_title_desc)
+    def _produce(self, executor: ThreadPoolExecutor, pending: "queue.Queue[Optional[Tuple[Dict, Future]]]",
+                 start_page: int, resume_from: Optional[Dict]) -> None:
+        """Walks the search pages, submitting a fetch per tender; put blocks while the queue is full."""
+        current_page = resume_from["page"] if resume_from else start_page
+        try:
+            while not self._stop_event.is_set():
+                self.logger.info(f"Fetching tender OCIDs from search page {current_page} with expensive tender parameters.")
+                tender_ocids = self.discovery_client.fetch_search_page_tender_ids(
+                    page=current_page,
+                    query_params=self.QUERY_PARAMS
+                )
 
-                        self.logger.info(f"Collected tender-unique complaint/claim text: {title[:50]}...")
+                if tender_ocids is None:
+                    self.logger.error(f"Failed to fetch tender OCIDs from page {current_page}. Stopping gathering.")
+                    break
+                if not tender_ocids:
+                    self.logger.info(f"No more tender OCIDs found on page {current_page}. Stopping gathering.")
+                    break
 
-                        # process the title and description
-                        success = self.text_processor.process_and_store(complaint_title_desc)
-                        if not success:
-                            self.logger.warning(f"Failed to process and store text.")
-                        else:
-                            processed_texts_count += 1
-                            self.logger.info(f"Successfully processed and stored text.")
+                self.logger.info(f"Found {len(tender_ocids)} tender OCIDs on page {current_page}.")
+                first_index = 0
+                if resume_from and current_page == resume_from["page"]:
+                    first_index = self._resume_index(tender_ocids, resume_from)
 
-                        if processed_texts_count >= max_texts:
-                            self.logger.info(f"Reached target of {max_texts} texts.")
-                            seen_raw_texts.clear()
-                            break
+                for index in range(first_index, len(tender_ocids)):
+                    ocid = tender_ocids[index]
+                    tender_position = {"page": current_page, "index": index, "ocid": ocid}
+                    if self._stop_event.is_set() or not self._put(
+                            pending, (tender_position, executor.submit(self._fetch_tender_texts, ocid))):
+                        return
 
-                seen_raw_texts.clear()
+                current_page += 1
+                self._stop_event.wait(self.page_delay_seconds)
+        except Exception as e:
+            self.logger.error(f"Error walking search pages at page {current_page}: {e}", exc_info=True)
+        finally:
+            if not self._put(pending, None):
+                # stopped with a full queue: the tenders queued are no longer needed, but the consumer
+                # still waits for the end of the queue
+                self._drain(pending)
+                pending.put(None)
 
-            if processed_texts_count >= max_texts:
-                break
+    def _resume_index(self, tender_ocids: List[str], resume_from: Dict) -> int:
+        """Index of the first tender after the checkpoint's, found by OCID since new tenders can shift the page."""
+        if resume_from["ocid"] in tender_ocids:
+            return tender_ocids.index(resume_from["ocid"]) + 1
+        self.logger.warning(f"Checkpoint tender {resume_from['ocid']} is no longer on page {resume_from['page']}, "
+                            f"resuming after position {resume_from['index']}.")
+        return resume_from["index"] + 1
 
-            current_page += 1
+    def _put(self, pending: "queue.Queue[Optional[Tuple[Dict, Future]]]",
+             item: Optional[Tuple[Dict, Future]]) -> bool:
+        """Waits for room in the queue unless the gathering is stopped. :return: Whether the item was queued."""
+        while True:
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if self._stop_event.is_set():
+                    if item is not None:
+                        item[1].cancel()
+                    return False
 
-            time.sleep(0.5)
+    @staticmethod
+    def _drain(pending: "queue.Queue[Optional[Tuple[Dict, Future]]]") -> None:
+        """Cancels fetches that were queued but are no longer needed."""
+        while True:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[1].cancel()
 
-        self.logger.info(
-            f"Complaint/claim text gathering finished. Found and processed {processed_texts_count} texts.")
-        return processed_texts_count
+    def _fetch_tender_texts(self, ocid: str) -> List[str]:
+        """Runs in a fetcher thread. :return: The tender's complaint/claim texts, empty on any failure."""
+        try:
+            self.logger.debug(f"Fetching bridge info for OCID: {ocid}")
+            bridge_info = self.discovery_client.fetch_tender_bridge_info(ocid)
+            if not bridge_info:
+                self.logger.warning(f"Could not fetch bridge info for OCID {ocid}, skipping.")
+                return []
+
+            tender_uuid = bridge_info.get('id')
+            if not tender_uuid:
+                self.logger.warning(f"Missing UUID in bridge info for OCID {ocid}, skipping.")
+                return []
+
+            tender_details = self.legacy_client.fetch_tender_details(tender_uuid)
+            if not tender_details:
+                self.logger.warning(f"Could not fetch legacy details for UUID {tender_uuid}, skipping.")
+                return []
+
+            complaint_claim_texts = tender_details.get("complaints", [])
+            if not complaint_claim_texts:
+                self.logger.debug(f"No complaints found in legacy details for UUID {tender_uuid}, skipping.")
+            return [f"{complaint.get('title')} {complaint.get('description')}" for complaint in complaint_claim_texts]
+        except Exception as e:
+            self.logger.error(f"Error fetching complaints of tender OCID {ocid}: {e}", exc_info=True)
+            return []
+
+    def _store_cleaned(self, texts: List[str], position: Optional[Dict], cleaned_texts: Optional[List[str]],
+                       processed_before: int) -> int:
+        """
+        Stores a cleaned batch, committing a checkpoint at position with it.
+        :param cleaned_texts: The cleaned texts, None if cleaning the batch failed.
+        :param processed_before: Texts processed before these, by this run and the runs it resumes.
+        :return: The number of texts processed, all of them or none.
+        """
+        checkpoint = {**position, "texts_processed": processed_before + len(texts)} if position else None
+        if cleaned_texts is None or not self.text_processor.store_cleaned(
+                cleaned_texts, checkpoint_name=self.CHECKPOINT_NAME, checkpoint=checkpoint):
+            self.logger.warning(f"Failed to process and store {len(texts)} texts.")
+            return 0
+        if self.dedup_index is not None:
+            self.dedup_index.add_many(texts)
+        return len(texts)
@@ -0,0 +1,140 @@
+import logging
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from exceptions import CorpusWatermarkMismatchError
+from repositories.tender_repository import TenderRepository
+from services.text_cleaning_pool import TextCleaningPool
+from services.text_dedup_index import TextDedupIndex
+from services.text_processing_service import TextProcessingService
+
+
+class CorpusExportService:
+    """
+    Builds the topic modeling corpus from complaints already stored in the database instead of
+    crawling the API. Rows are streamed in (created_at, id) order and cleaned in batches by a
+    TextCleaningPool while the next ones are read; each written batch commits a watermark with the
+    corpus, so the next export only reads complaints stored since.
+
+    created_at is set when a complaint's transaction starts, not when it commits, so a complaint
+    committed late can appear below a watermark already stored. The next export therefore reads
+    again from safety_window before the watermark, and the watermark keeps the ids of the
+    complaints read within that window to skip them.
+    """
+
+    CHECKPOINT_NAME = "complaints_table"
+    DEFAULT_SAFETY_WINDOW = timedelta(hours=1)
+
+    def __init__(self, tender_repo: TenderRepository, text_processing_service: TextProcessingService,
+                 dedup_index: Optional[TextDedupIndex] = None):
+        """
+        :param dedup_index: Texts already in it (e.g. crawled ones) are skipped, exported texts are added to it.
+        """
+        self.tender_repo = tender_repo
+        self.text_processor = text_processing_service
+        self.dedup_index = dedup_index
+        self.logger = logging.getLogger(type(self).__name__)
+
+    def export(self, date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+               statuses: Optional[List[str]] = None, general_classifier_id: Optional[int] = None,
+               full: bool = False, batch_size: int = 1000, nlp_batch_size: int = 64, n_process: int = 1,
+               safety_window: timedelta = DEFAULT_SAFETY_WINDOW) -> int:
+        """
+        Exports complaints newer than the stored watermark.
+        :param date_from: Only complaints dated at or after this...
+        :param date_to: ...and before this.
+        :param statuses: Only complaints with one of these statuses.
+        :param general_classifier_id: Only complaints of tenders with this general classifier.
+        :param full: Ignore the watermark and read every matching complaint.
+        :param batch_size: Rows fetched from the cursor and cleaned at once.
+        :param nlp_batch_size: Texts per nlp.pipe batch.
+        :param n_process: Worker processes of the cleaning pool.
+        :param safety_window: How long a complaint's transaction may take to commit and still be exported.
+        :return: The number of texts processed.
+        """
+        filters = {
+            "date_from": date_from.isoformat() if date_from else None,
+            "date_to": date_to.isoformat() if date_to else None,
+            "statuses": sorted(statuses) if statuses else None,
+            "general_classifier_id": general_classifier_id,
+        }
+        watermark = None if full else self.text_processor.get_checkpoint(self.CHECKPOINT_NAME)
+        if watermark and watermark["filters"] != filters:
+            raise CorpusWatermarkMismatchError(
+                f"The corpus was exported with filters {watermark['filters']}, not {filters}. "
+                f"Export the whole table again or use another corpus directory.")
+
+        watermark_created_at = datetime.fromisoformat(watermark["created_at"]) if watermark else None
+        # complaints already read within safety_window of the watermark, by id
+        recent = ({complaint_id: datetime.fromisoformat(created_at)
+                   for complaint_id, created_at in watermark["recent_complaints"]} if watermark else {})
+        created_since = watermark_created_at - safety_window if watermark else None
+        processed_before = watermark["texts_processed"] if watermark else 0
+        self.logger.info(f"Exporting complaints {'stored since ' + str(created_since) if watermark else 'from the start'} "
+                         f"with filters {filters}.")
+
+        processed = 0
+        duplicates = 0
+        seen_text_hashes = set()
+
+        def collect() -> Iterator[Tuple[List[str], Dict]]:
+            """Yields the new texts of every batch of rows with the watermark to commit with them."""
+            nonlocal duplicates, recent, watermark_created_at
+            rows = iter(self.tender_repo.iter_complaint_texts(created_since=created_since, date_from=date_from,
+                                                              date_to=date_to, statuses=statuses,
+                                                              general_classifier_id=general_classifier_id,
+                                                              batch_size=batch_size))
+            collected = 0
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    return
+                batch = [row for row in batch if row.id not in recent]
+                if not batch:
+                    continue
+
+                texts = self._new_texts([f"{row.title} {row.description}" for row in batch], seen_text_hashes)
+                duplicates += len(batch) - len(texts)
+                # rows re-read from the safety window are older than the watermark, which never moves back
+                if watermark_created_at is None or batch[-1].created_at > watermark_created_at:
+                    watermark_created_at = batch[-1].created_at
+                recent.update((row.id, row.created_at) for row in batch)
+                recent = {complaint_id: created_at for complaint_id, created_at in recent.items()
+                          if created_at >= watermark_created_at - safety_window}
+                collected += len(texts)
+                yield texts, {"created_at": watermark_created_at.isoformat(),
+                              "recent_complaints": sorted([complaint_id, created_at.isoformat()]
+                                                          for complaint_id, created_at in recent.items()),
+                              "filters": filters, "texts_processed": processed_before + collected}
+
+        # one pool for the whole export, its workers load the spaCy model once; started before the
+        # database cursor is opened, as its worker processes are forked from this one
+        with TextCleaningPool(n_process, nlp_batch_size, self.text_processor.cleaner) as cleaning_pool:
+            for texts, checkpoint, cleaned_texts in cleaning_pool.clean_batches(collect()):
+                if cleaned_texts is None or not self.text_processor.store_cleaned(
+                        cleaned_texts, checkpoint_name=self.CHECKPOINT_NAME, checkpoint=checkpoint):
+                    self.logger.error(f"Stopping the export, {len(texts)} texts of the batch ending at "
+                                      f"{checkpoint['created_at']} could not be processed.")
+                    break
+                if self.dedup_index is not None:
+                    self.dedup_index.add_many(texts)
+                processed += len(texts)
+
+        self.logger.info(f"Exported {processed} complaint texts, skipped {duplicates} duplicates.")
+        return processed
+
+    def _new_texts(self, texts: List[str], seen_text_hashes: set) -> List[str]:
+        """
+        Drops texts already in the corpus and those collected before by this export, which may still
+        be cleaned and not in the dedup index yet; the hashes of the new texts are added to seen_text_hashes.
+        """
+        seen_before = (self.dedup_index.contains_many(texts) if self.dedup_index is not None
+                       else [False] * len(texts))
+        new_texts = []
+        for text, seen in zip(texts, seen_before):
+            text_hash = TextDedupIndex.text_hash(text)
+            if not seen and text_hash not in seen_text_hashes:
+                seen_text_hashes.add(text_hash)
+                new_texts.append(text)
+        return new_texts
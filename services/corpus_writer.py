@@ -1,28 +1,53 @@
+import hashlib
 import os
 import logging
-import re
 from pathlib import Path
+from typing import Dict, List, Optional
 
-class CorpusWriter:
-    """Writes cleaned text data to a series of text files in a specified directory."""
+from util.corpus_shards import SHARD_SUFFIXES, check_compression, compress, read_manifest, scan_shard, \
+    shard_pattern, write_manifest
 
-    def __init__(self, corpus_dir: str, max_lines_per_file: int = 1000, file_prefix: str = "corpus_"):
+class CorpusWriter:
+    """
+    Writes cleaned text data to a series of shard files in a specified directory.
+    Lines are buffered and appended in batches, optionally as gzip or zstd compressed shards.
+    manifest.json records the line count, size and sha256 of every shard, so a restart reads
+    the manifest instead of scanning the shards, and always continues in a new shard.
+    Callers' named checkpoints are stored in the same manifest, committed together with the lines they cover.
+    """
+
+    def __init__(self, corpus_dir: str, max_lines_per_file: int = 1000, file_prefix: str = "corpus_",
+                 compression: Optional[str] = None, buffer_lines: int = 500, fsync: bool = False):
         """
         Initializes the CorpusWriter.
 
         :param corpus_dir: The directory where corpus files will be stored.
-        :param max_lines_per_file: The maximum number of lines per text file.
+        :param max_lines_per_file: The maximum number of lines per shard.
         :param file_prefix: The prefix for the corpus filenames.
+        :param compression: None, "gzip" or "zstd" (needs the zstandard package).
+        :param buffer_lines: Buffered lines are written once this many are collected, and on flush/close.
+        :param fsync: Whether every flush is fsynced to disk, shards and manifest alike.
         """
+        check_compression(compression)
         self.corpus_dir = Path(corpus_dir)
         self.max_lines_per_file = max_lines_per_file
         self.file_prefix = file_prefix
+        self.compression = compression
+        self.buffer_lines = buffer_lines
+        self.fsync = fsync
         self.logger = logging.getLogger(type(self).__name__)
 
         self.current_file_index = 0
         self.current_line_count = 0
         self.current_file_path = None
 
+        self._buffer: List[str] = []
+        self._shards: List[Dict] = []
+        self._current_hash = None
+        self._checkpoints: Dict[str, Dict] = {}
+        self._committed_checkpoints: Dict[str, Dict] = {}
+        self._checkpoint_changed = False
+
         try:
             self.corpus_dir.mkdir(parents=True, exist_ok=True)
             self.logger.info(f"Corpus directory set to: '{self.corpus_dir}'")
@@ -32,59 +57,67 @@ class CorpusWriter:
 
         self._initialize_state()
         self.logger.info(f"CorpusWriter initialized. Current state: File index {self.current_file_index}, "
-                         f"Line count {self.current_line_count}, Path '{self.current_file_path}'")
+                         f"{len(self._shards)} existing shards, Path '{self.current_file_path}'")
 
+    def __enter__(self) -> "CorpusWriter":
+        return self
 
-    def _initialize_state(self):
-        """Determines the starting file index and line count based on existing files."""
-        last_file_index = -1
-        file_pattern = re.compile(rf"^{re.escape(self.file_prefix)}(\d+)\.txt$")
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
 
+    def _initialize_state(self):
+        """Restores the shard list from the manifest, reconciled with the files actually on disk."""
+        manifest = read_manifest(self.corpus_dir)
+        shards = manifest["shards"] if manifest else []
+        self._checkpoints = dict(manifest.get("checkpoints") or {}) if manifest else {}
+        self._committed_checkpoints = dict(self._checkpoints)
+        changed = False
+
+        reconciled = []
+        for shard in shards:
+            path = self.corpus_dir / shard["file"]
+            if not path.exists():
+                self.logger.warning(f"Shard '{path}' listed in the manifest is missing, dropping it.")
+                changed = True
+                continue
+            size = path.stat().st_size
+            if size > shard["bytes"]:
+                # a batch was appended but the manifest update recording it never happened
+                self.logger.warning(f"Truncating unrecorded {size - shard['bytes']} bytes from '{path}'.")
+                os.truncate(path, shard["bytes"])
+            elif size < shard["bytes"]:
+                self.logger.warning(f"Shard '{path}' is shorter than recorded in the manifest, rescanning it.")
+                shard = scan_shard(path)
+                changed = True
+            reconciled.append(shard)
+
+        # shards written without a manifest (older corpora) or created right before a crash
+        file_pattern = shard_pattern(self.file_prefix)
+        known = {shard["file"] for shard in reconciled}
         try:
-            for filename in os.listdir(self.corpus_dir):
-                match = file_pattern.match(filename)
-                if match:
-                    index = int(match.group(1))
-                    if index > last_file_index:
-                        last_file_index = index
+            unknown = sorted(name for name in os.listdir(self.corpus_dir)
+                             if file_pattern.match(name) and name not in known)
         except OSError as e:
-             self.logger.error(f"Error listing directory '{self.corpus_dir}' during initialization: {e}")
-
-
+            self.logger.error(f"Error listing directory '{self.corpus_dir}' during initialization: {e}")
+            unknown = []
+        for name in unknown:
+            self.logger.info(f"Adding shard '{name}' missing from the manifest.")
+            reconciled.append(scan_shard(self.corpus_dir / name))
+            changed = True
+
+        self._shards = sorted(reconciled, key=lambda s: int(file_pattern.match(s["file"]).group(1)))
+        if changed:
+            self._write_manifest()
+
+        last_file_index = int(file_pattern.match(self._shards[-1]["file"]).group(1)) if self._shards else -1
         self.current_file_index = last_file_index + 1
-
-        if last_file_index >= 0:
-            # check the last file for line count
-            last_file_path = self._get_file_path(last_file_index)
-            try:
-                with open(last_file_path, 'r', encoding='utf-8') as f:
-                    lines = sum(1 for _ in f)
-                self.logger.info(f"Found existing file '{last_file_path}' with {lines} lines.")
-                if lines < self.max_lines_per_file:
-                    self.current_file_index = last_file_index
-                    self.current_line_count = lines
-                    self.logger.info(f"Resuming writing to '{last_file_path}'.")
-                else:
-                    self.current_line_count = 0
-                    self.logger.info(f"Last file '{last_file_path}' is full. Starting new file.")
-
-            except FileNotFoundError:
-                 self.logger.warning(f"Last detected file index {last_file_index} but file '{last_file_path}' not found. Starting new file.")
-                 self.current_line_count = 0
-            except Exception as e:
-                 self.logger.error(f"Error reading line count from '{last_file_path}': {e}. Starting new file.")
-                 self.current_line_count = 0
-        else:
-            # if no existing files found, starting from index 0, line 0
-            self.current_line_count = 0
-
+        self.current_line_count = 0
         self.current_file_path = self._get_file_path(self.current_file_index)
 
-
     def _get_file_path(self, index: int) -> Path:
         """Generates the file path for a given index."""
         # corpus_0001 format
-        filename = f"{self.file_prefix}{index:04d}.txt"
+        filename = f"{self.file_prefix}{index:04d}{SHARD_SUFFIXES[self.compression]}"
         return self.corpus_dir / filename
 
     def _rollover_file(self):
@@ -94,10 +127,23 @@ class CorpusWriter:
         self.current_file_path = self._get_file_path(self.current_file_index)
         self.logger.info(f"Rolling over to new corpus file: '{self.current_file_path}'")
 
+    def get_checkpoint(self, name: str) -> Optional[Dict]:
+        """The checkpoint last set under name, as restored from the manifest after a restart."""
+        return self._checkpoints.get(name)
+
+    def set_checkpoint(self, name: str, checkpoint: Dict) -> None:
+        """Sets a checkpoint to be committed to the manifest with the next flush, buffered lines included."""
+        self._checkpoints[name] = checkpoint
+        self._checkpoint_changed = True
+
+    @property
+    def line_count(self) -> int:
+        """Lines written to all shards, buffered lines excluded."""
+        return sum(shard["lines"] for shard in self._shards)
+
     def write(self, cleaned_text: str) -> None:
         """
-        Writes a single line of cleaned text to the current corpus file.
-        Handles file rollover when max_lines_per_file is reached.
+        Buffers a single line of cleaned text, writing the buffer once it is full.
 
         :param cleaned_text: The text string to write (should not contain newlines).
         """
@@ -107,21 +153,83 @@ class CorpusWriter:
         if '\n' in cleaned_text:
              self.logger.warning("Cleaned text contains newline characters. Writing as is, but this might indicate an issue.")
 
+        self._buffer.append(cleaned_text)
+        if len(self._buffer) >= self.buffer_lines:
+            self.flush()
 
-        try:
-            if self.current_line_count >= self.max_lines_per_file:
-                self._rollover_file()
+    def write_many(self, cleaned_texts: List[str]) -> int:
+        """
+        Buffers lines of cleaned text, writing the buffer once it is full.
+
+        :param cleaned_texts: The text strings to write, empty ones are skipped.
+        :return: The number of lines accepted.
+        """
+        lines = [text for text in cleaned_texts if isinstance(text, str) and text]
+        self._buffer.extend(lines)
+        if len(self._buffer) >= self.buffer_lines:
+            self.flush()
+        return len(lines)
 
+    def flush(self) -> None:
+        """
+        Appends the buffered lines to the shards, rolling over when max_lines_per_file is reached,
+        then records the new line counts and checksums in the manifest.
+        """
+        if not self._buffer:
+            if self._checkpoint_changed:
+                self._write_manifest()
+            return
+        lines, self._buffer = self._buffer, []
+        written = 0
+
+        try:
             # directory might be deleted externally
             self.corpus_dir.mkdir(parents=True, exist_ok=True)
 
-            with open(self.current_file_path, 'a', encoding='utf-8') as f:
-                f.write(cleaned_text + "\n")
+            while written < len(lines):
+                if self.current_line_count >= self.max_lines_per_file:
+                    self._rollover_file()
+
+                count = min(self.max_lines_per_file - self.current_line_count, len(lines) - written)
+                data = "".join(line + "\n" for line in lines[written:written + count]).encode("utf-8")
+                self._append(compress(data, self.compression), count)
+                written += count
 
-            self.current_line_count += 1
-            self.logger.debug(f"Wrote line {self.current_line_count}/{self.max_lines_per_file} to '{self.current_file_path}'")
+            self._write_manifest()
+            self.logger.debug(f"Flushed {written} lines, {self.current_line_count}/{self.max_lines_per_file} in '{self.current_file_path}'")
 
         except OSError as e:
-            self.logger.error(f"Failed to write to corpus file '{self.current_file_path}': {e}", exc_info=True)
-        except Exception as e:
-            self.logger.error(f"An unexpected error occurred during write: {e}", exc_info=True)
\ No newline at end of file
+            self.logger.error(f"Failed to write to corpus file '{self.current_file_path}', "
+                              f"{len(lines) - written} lines lost: {e}", exc_info=True)
+            # a checkpoint must never cover lost lines
+            self._checkpoints = dict(self._committed_checkpoints)
+            self._checkpoint_changed = False
+
+    def close(self) -> None:
+        """Writes the remaining buffered lines."""
+        self.flush()
+
+    def _append(self, data: bytes, line_count: int) -> None:
+        with open(self.current_file_path, 'ab') as f:
+            f.write(data)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        if not self._shards or self._shards[-1]["file"] != self.current_file_path.name:
+            self._current_hash = hashlib.sha256()
+            self._shards.append({"file": self.current_file_path.name, "compression": self.compression,
+                                 "lines": 0, "bytes": 0, "sha256": self._current_hash.hexdigest()})
+
+        shard = self._shards[-1]
+        self._current_hash.update(data)
+        shard["lines"] += line_count
+        shard["bytes"] += len(data)
+        shard["sha256"] = self._current_hash.hexdigest()
+        self.current_line_count += line_count
+
+    def _write_manifest(self) -> None:
+        write_manifest(self.corpus_dir, {"file_prefix": self.file_prefix, "shards": self._shards,
+                                         "checkpoints": self._checkpoints}, self.fsync)
+        self._committed_checkpoints = dict(self._checkpoints)
+        self._checkpoint_changed = False
@@ -7,6 +7,7 @@ from celery_app import app as celery_app
 from marshmallow import Schema, ValidationError
 
 from api.legacy_prozorro_client import LegacyProzorroClient
+from config import Config
 from models import (TenderChange, TenderDocument, TenderDocumentChange, Award, AwardChange,
                     Bid, BidChange, Complaint, ComplaintChange)
 from models.typing import ChangeT, EntityT
@@ -17,7 +18,8 @@ from schemas.complaint_schema import ComplaintSchema
 from schemas.tender_document_schema import TenderDocumentSchema
 from schemas.tender_schema import TenderSchema
 
-from services.complaint_analysis_service import analyze_complaint_and_update_score
+from services.complaint_analysis_queue import ComplaintAnalysisQueue
+from services.complaint_analysis_service import analyze_complaint_and_update_score, rescore_complaints_task
 from util.db_context_manager import session_scope
 
 
@@ -59,7 +61,8 @@ def process_tender_data_task(tender_uuid: str,
             raise
 
 class DataProcessor:
-    def __init__(self, tender_repo: TenderRepository, high_priority: bool = False) -> None:
+    def __init__(self, tender_repo: TenderRepository, high_priority: bool = False,
+                 analysis_queue: Optional[ComplaintAnalysisQueue] = None) -> None:
         self.logger = logging.getLogger(type(self).__name__)
         self.tender_repo = tender_repo
         self.legacy_client = LegacyProzorroClient()
@@ -70,8 +73,10 @@ class DataProcessor:
         self.award_schema = AwardSchema()
         self.complaint_schema = ComplaintSchema()
         self._new_complaint_ids: List[str] = []
+        self._changed_complaint_ids: List[str] = []
 
         self.high_priority = high_priority
+        self.analysis_queue = analysis_queue or ComplaintAnalysisQueue.from_url(Config.NLP_QUEUE_REDIS_URL)
 
     def _record_change(self,
                        change_model_cls: Type[ChangeT],
@@ -230,6 +235,7 @@ class DataProcessor:
             if existing_entity:
                 # Update existing
                 self.logger.info(f"Updating existing {model_cls.__name__} {entity_id}")
+                old_description = getattr(existing_entity, 'description', None)
                 self._update_entity(
                     existing_entity=existing_entity,
                     tender_uuid=tender_id,
@@ -239,6 +245,8 @@ class DataProcessor:
                     change_date=change_date,
                     entity_fk_name=entity_fk_name
                 )
+                if model_cls == Complaint and existing_entity.description != old_description:
+                    self._invalidate_complaint_analysis(existing_entity)
             else:
                 # Create new
                 self.logger.info(f"Creating new {model_cls.__name__} {entity_id} for tender {tender_id}")
@@ -249,6 +257,49 @@ class DataProcessor:
 
         self.tender_repo.flush()
 
+    def _invalidate_complaint_analysis(self, complaint: Complaint) -> None:
+        """
+        Drops analysis results that no longer match a changed description and schedules a rescore,
+        which replaces the complaint's contribution to the tender scores. Complaints still waiting
+        for their first analysis will be analyzed with the new description anyway.
+        """
+        if getattr(complaint, 'highlighted_keywords', None) is None:
+            return
+        complaint.highlighted_html = None
+        complaint.lemma_stream = None
+        complaint.keyword_set_version = None
+        self._changed_complaint_ids.append(complaint.id)
+
+    def _enqueue_complaint_analysis(self, tender_uuid: str) -> None:
+        """
+        Sends new complaints to the micro-batched NLP consumer.
+        High priority (user-requested) tenders skip the batch and get a dedicated task each.
+        Complaints whose description changed after analysis are rescored.
+        """
+        if self._changed_complaint_ids:
+            rescore_complaints_task.apply_async(args=(list(self._changed_complaint_ids), None), queue='default')
+
+        if not self._new_complaint_ids:
+            return
+
+        if not self.high_priority:
+            try:
+                self.analysis_queue.push_many([
+                    {"tender_id": tender_uuid, "complaint_id": complaint_id, "attempts": 0}
+                    for complaint_id in self._new_complaint_ids
+                ])
+                return
+            except Exception as e:
+                self.logger.error(f"Failed to queue complaints of tender {tender_uuid} for batch analysis, "
+                                  f"falling back to per-complaint tasks: {e}")
+
+        for complaint_id in self._new_complaint_ids:
+            analyze_complaint_and_update_score.apply_async(
+                args=(tender_uuid, complaint_id),
+                queue='default',
+                priority=5 if self.high_priority else 0
+            )
+
     def process_tender_data(self,
                             tender_uuid: str,
                             tender_ocid: Optional[str],
@@ -260,6 +311,7 @@ class DataProcessor:
         """
         self.logger.info(f"Processing tender UUID {tender_uuid} (OCID: {tender_ocid})")
         self._new_complaint_ids.clear()
+        self._changed_complaint_ids.clear()
 
         try:
 
@@ -383,12 +435,7 @@ class DataProcessor:
 
             self.tender_repo.commit()
 
-            for complaint_id in self._new_complaint_ids:
-                analyze_complaint_and_update_score.apply_async(
-                    args=(tender_uuid, complaint_id),
-                    queue='default',
-                    priority=5 if self.high_priority else 0
-                )
+            self._enqueue_complaint_analysis(tender_uuid)
 
             self.logger.info(f"Successfully prepared changes for tender UUID {tender_uuid}")
             return True
@@ -3,47 +3,133 @@ import smtplib
 import ssl
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from email.policy import SMTP
+from typing import List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 class EmailService:
+    """
+    Sends HTML emails over a single authenticated SMTP connection.
+    The connection is kept open between batches and health-checked with NOOP
+    before reuse, so a worker process pays the connect/STARTTLS/login cost once.
+    """
+
     def __init__(self, smtp_server: str, port: int,
                  sender_email: str, password: str,
-                 use_tls: bool = True):
+                 use_tls: bool = True, timeout: int = 10):
         self.smtp_server = smtp_server
         self.port = port
         self.sender_email = sender_email
         self.password = password
         self.use_tls = use_tls
+        self.timeout = timeout
         self.context = ssl.create_default_context()
+        self.server: Optional[smtplib.SMTP] = None
 
     def __enter__(self):
-        self.server = smtplib.SMTP(self.smtp_server, self.port, timeout=10)
-        if self.use_tls:
-            self.server.starttls(context=self.context)
+        self.connect()
+        return self
+
+    def connect(self) -> None:
+        """Opens a new SMTP connection, upgrades it to TLS and logs in."""
         if not self.sender_email or not self.password:
             raise RuntimeError("SMTP credentials are not set")
-        self.server.login(self.sender_email, self.password)
-        return self
+        server = smtplib.SMTP(self.smtp_server, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls(context=self.context)
+            server.login(self.sender_email, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        logger.info(f"SMTP connection to {self.smtp_server}:{self.port} established.")
 
-    def send(self, recipient_email: str,
-             subject: str, html_body: str) -> None:
-        msg = MIMEMultipart("alternative")
+    def is_connected(self) -> bool:
+        """Checks that the current connection is still usable."""
+        if self.server is None:
+            return False
+        try:
+            status, _ = self.server.noop()
+            return status == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def ensure_connected(self) -> None:
+        """Reconnects if the connection was never opened or has been dropped by the server."""
+        if not self.is_connected():
+            if self.server is not None:
+                logger.info("SMTP connection is no longer alive, reconnecting.")
+            self.close()
+            self.connect()
+
+    def close(self) -> None:
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting SMTP server: {e}")
+            self.server.close()
+        finally:
+            self.server = None
+
+    def build_message(self, subject: str, html_body: str) -> bytes:
+        """
+        Encodes the message once, without the 'To' header.
+        The result is shared by every recipient of a batch.
+        """
+        msg = MIMEMultipart("alternative", policy=SMTP)
         msg["From"] = self.sender_email
-        msg["To"] = recipient_email
         msg["Subject"] = subject
-        part = MIMEText(html_body, "html")
-        msg.attach(part)
-
-        self.server.sendmail(
-            self.sender_email,
-            recipient_email,
-            msg.as_string()
-        )
+        msg.attach(MIMEText(html_body, "html", policy=SMTP))
+        return msg.as_bytes()
+
+    def send(self, recipient_email: str,
+             subject: str, html_body: str) -> None:
+        failed, unsent = self.send_batch([recipient_email], subject, html_body)
+        if failed or unsent:
+            raise smtplib.SMTPException(f"Failed to send email to {recipient_email}")
+
+    def send_batch(self, recipients: List[str],
+                   subject: str, html_body: str) -> Tuple[List[str], List[str]]:
+        """
+        Sends the same email to every recipient, one message per recipient.
+        Failing to connect before the first message raises, per-recipient failures are logged and returned.
+        If the connection drops mid-batch and cannot be re-established, the rest of the batch is
+        returned as unsent, so that only those recipients are retried.
+        :return: The recipients the email could not be delivered to, and those it was not sent to.
+        """
+        message = self.build_message(subject, html_body)
+        self.ensure_connected()
+
+        failed = []
+        for index, rcpt in enumerate(recipients):
+            rcpt_message = SMTP.fold_binary("To", rcpt) + message
+            try:
+                self._send_raw(rcpt, rcpt_message)
+            except smtplib.SMTPServerDisconnected:
+                logger.info("SMTP server disconnected mid-batch, reconnecting.")
+                self.close()
+                try:
+                    self.connect()
+                except Exception as e:
+                    logger.error(f"Failed to reconnect mid-batch, {len(recipients) - index} emails not sent: {e}")
+                    return failed, recipients[index:]
+                try:
+                    self._send_raw(rcpt, rcpt_message)
+                except smtplib.SMTPException as e:
+                    logger.error(f"Failed to send email after reconnect: {e}")
+                    failed.append(rcpt)
+            except smtplib.SMTPException as e:
+                logger.error(f"Failed to send email: {e}")
+                failed.append(rcpt)
+        return failed, []
+
+    def _send_raw(self, recipient_email: str, message: bytes) -> None:
+        self.server.sendmail(self.sender_email, recipient_email, message)
         logger.info(f"Email sent to {recipient_email}")
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        try:
-            self.server.quit()
-        except Exception as e:
-            logger.warning(f"Error quitting SMTP server: {e}")
\ No newline at end of file
+        self.close()
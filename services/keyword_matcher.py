@@ -0,0 +1,85 @@
+from typing import Dict, List, Sequence, Tuple
+
+# (lemma, start_char_offset, length_of_token)
+LemmaToken = Tuple[str, int, int]
+
+
+class KeywordMatcher:
+    """
+    Matches lemmatized tokens against violation domain keywords.
+
+    Single-lemma keywords are looked up in a lemma -> domains hash index, multi-word
+    keywords (lemmas separated by spaces) are indexed by their first lemma and
+    compared against the following tokens, similar to spaCy's PhraseMatcher on LEMMA.
+    Matching costs O(tokens) instead of O(tokens x domains x keywords).
+    """
+
+    def __init__(self, lemmatized_keywords: Dict[str, List[str]]):
+        self._lemma_domains: Dict[str, List[str]] = {}
+        self._phrase_domains: Dict[Tuple[str, ...], List[str]] = {}
+
+        for domain, keywords in lemmatized_keywords.items():
+            for keyword in keywords:
+                lemmas = tuple(keyword.lower().split())
+                if not lemmas:
+                    continue
+                if len(lemmas) == 1:
+                    domains = self._lemma_domains.setdefault(lemmas[0], [])
+                else:
+                    domains = self._phrase_domains.setdefault(lemmas, [])
+                if domain not in domains:
+                    domains.append(domain)
+
+        # first lemma -> phrases starting with it, longest first
+        self._phrases_by_first_lemma: Dict[str, List[Tuple[str, ...]]] = {}
+        for phrase in sorted(self._phrase_domains, key=len, reverse=True):
+            self._phrases_by_first_lemma.setdefault(phrase[0], []).append(phrase)
+
+    @property
+    def lemmas(self) -> set:
+        """All lemmas that take part in any keyword."""
+        result = set(self._lemma_domains)
+        for phrase in self._phrase_domains:
+            result.update(phrase)
+        return result
+
+    def match(self, tokens: Sequence[LemmaToken]) -> List[Dict]:
+        """
+        Finds keyword occurrences in a lemmatized token stream.
+        :param tokens: (lowercased lemma, start offset, token length) tuples in text order.
+        :return: Highlights in the format stored in Complaint.highlighted_keywords.
+        """
+        # key: (start_char_offset, length)
+        # value: {"lemma": "...", "domains": [...]}
+        textual_occurrences = {}
+
+        def add_occurrence(start: int, length: int, lemma: str, domains: List[str]) -> None:
+            key = (start, length)
+            if key not in textual_occurrences:
+                textual_occurrences[key] = {"lemma": lemma, "domains": []}
+            known_domains = textual_occurrences[key]["domains"]
+            known_domains.extend(d for d in domains if d not in known_domains)
+
+        for i, (lemma, start, length) in enumerate(tokens):
+            domains = self._lemma_domains.get(lemma)
+            if domains:
+                add_occurrence(start, length, lemma, domains)
+
+            for phrase in self._phrases_by_first_lemma.get(lemma, ()):
+                end = i + len(phrase)
+                if end > len(tokens):
+                    continue
+                if all(tokens[j][0] == phrase[j - i] for j in range(i + 1, end)):
+                    _, last_start, last_length = tokens[end - 1]
+                    add_occurrence(start, last_start + last_length - start, " ".join(phrase),
+                                   self._phrase_domains[phrase])
+
+        return [
+            {
+                "keyword": data["lemma"],
+                "domains": data["domains"],
+                "startPosition": start,
+                "length": length
+            }
+            for (start, length), data in textual_occurrences.items()
+        ]
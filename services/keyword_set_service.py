@@ -0,0 +1,72 @@
+import logging
+from typing import Dict, List, Tuple
+
+from models import KeywordSet
+from repositories.keyword_set_repository import KeywordSetRepository
+from repositories.tender_repository import TenderRepository
+from util.keyword_sets import compute_keyword_set_version, diff_keyword_sets, affected_lemmas
+
+
+class KeywordSetService:
+    """
+    Registers versions of keywords.json and finds the complaints a new version affects.
+    """
+
+    def __init__(self, keyword_set_repo: KeywordSetRepository, tender_repo: TenderRepository):
+        self.keyword_set_repo = keyword_set_repo
+        self.tender_repo = tender_repo
+        self.logger = logging.getLogger(type(self).__name__)
+
+    def register(self, keywords: Dict[str, List[str]],
+                 lemmatized_keywords: Dict[str, List[str]]) -> Tuple[KeywordSet, bool]:
+        """
+        Registers a keyword set, diffed against the latest registered one.
+        :return: The keyword set and whether it was newly created.
+        """
+        version = compute_keyword_set_version(keywords)
+        existing = self.keyword_set_repo.get_by_version(version)
+        if existing:
+            return existing, False
+
+        parent = self.keyword_set_repo.get_latest()
+        keyword_set = KeywordSet(
+            version=version,
+            keywords=keywords,
+            lemmatized_keywords=lemmatized_keywords,
+            parent_version=parent.version if parent else None,
+            diff=diff_keyword_sets(parent.lemmatized_keywords, lemmatized_keywords) if parent else None,
+        )
+        self.keyword_set_repo.create(keyword_set)
+        self.logger.info(f"Registered keyword set {version} (parent {keyword_set.parent_version}).")
+        return keyword_set, True
+
+    def find_affected_complaint_ids(self, keyword_set: KeywordSet) -> List[str]:
+        """
+        Complaints to rescore for the keyword set: those analyzed with its parent whose lemmas
+        touch the diff, plus those analyzed with any other version or before versioning.
+        """
+        lemmas = affected_lemmas(keyword_set.diff) if keyword_set.diff else []
+        matching = self.tender_repo.get_complaint_ids_with_lemmas(lemmas, exclude_version=keyword_set.version)
+
+        known_versions = [v for v in (keyword_set.version, keyword_set.parent_version) if v]
+        stale = self.tender_repo.get_complaint_ids_not_at_versions(known_versions)
+
+        self.logger.info(f"Keyword set {keyword_set.version}: {len(lemmas)} changed lemmas, "
+                         f"{len(matching)} matching complaints, {len(stale)} complaints of other versions.")
+        return sorted(set(matching) | set(stale))
+
+    def advance_unaffected_complaints(self, keyword_set: KeywordSet) -> int:
+        """
+        Moves the complaints analyzed with the keyword set's parent that its diff does not touch to
+        the keyword set, without rescoring them. Left at the parent, the next keyword set would count
+        them as complaints of another version and rescore them all.
+        :return: The number of complaints moved.
+        """
+        if not keyword_set.parent_version:
+            return 0
+        lemmas = affected_lemmas(keyword_set.diff) if keyword_set.diff else []
+        advanced = self.tender_repo.advance_keyword_set_version(keyword_set.parent_version, keyword_set.version,
+                                                                lemmas)
+        self.logger.info(f"Moved {advanced} complaints untouched by the diff from keyword set "
+                         f"{keyword_set.parent_version} to {keyword_set.version}.")
+        return advanced
@@ -0,0 +1,76 @@
+import logging
+import re
+from typing import Dict, Optional
+
+from langdetect import DetectorFactory, detect, LangDetectException
+
+
+class UkrainianLanguageDetector:
+    """
+    Tells Ukrainian text from other Cyrillic languages. Letters only Ukrainian uses (і, ї, є, ґ)
+    and frequent Ukrainian character n-grams are weighed against letters and n-grams Ukrainian
+    lacks (ы, э, ъ, ё, ў, ...). Clear cases are decided from these counts alone, texts that are
+    too short or too mixed to call fall back to langdetect, seeded so results are reproducible.
+    """
+
+    UKRAINIAN_LETTERS = frozenset("іїєґ")
+    # Russian, Belarusian, Bulgarian and South Slavic letters that never occur in Ukrainian
+    FOREIGN_LETTERS = frozenset("ыэъёўђјљњћџѓќѕ")
+    # matched on the text padded with spaces, so word boundaries are part of the n-gram
+    UKRAINIAN_NGRAMS = (" і ", " та ", " що ", " як ", " це ", " від ", " або ", "ння", "ють ")
+    FOREIGN_NGRAMS = (" и ", " что ", " это ", " как ", " или ", " от ", "ый ", "ие ", "ии ", "ия ", "ется ")
+
+    _cyrillic_pattern = re.compile(r"[а-яёіїєґўђјљњћџѓќѕ]")
+    _space_pattern = re.compile(r"\s+")
+
+    def __init__(self, min_letters: int = 20, min_evidence: int = 2, min_share: float = 0.9, seed: int = 0):
+        """
+        :param min_letters: Texts with fewer Cyrillic letters are left to langdetect.
+        :param min_evidence: ...as are texts with fewer marker letters and n-grams than this...
+        :param min_share: ...and texts where neither side holds at least this share of the markers.
+        :param seed: Seed for langdetect, which is random otherwise.
+        """
+        self.min_letters = min_letters
+        self.min_evidence = min_evidence
+        self.min_share = min_share
+        DetectorFactory.seed = seed
+        self.stats: Dict[str, int] = {"ukrainian": 0, "other": 0, "fallback": 0}
+        self.logger = logging.getLogger(type(self).__name__)
+
+    def classify(self, text: str) -> Optional[bool]:
+        """
+        Decides from marker letters and n-grams alone.
+        :return: True for Ukrainian, False for another language, None when the text is ambiguous.
+        """
+        text = text.lower()
+        if len(self._cyrillic_pattern.findall(text)) < self.min_letters:
+            return None
+
+        ukrainian = sum(text.count(letter) for letter in self.UKRAINIAN_LETTERS)
+        foreign = sum(text.count(letter) for letter in self.FOREIGN_LETTERS)
+        padded = f" {self._space_pattern.sub(' ', text)} "
+        ukrainian += sum(padded.count(ngram) for ngram in self.UKRAINIAN_NGRAMS)
+        foreign += sum(padded.count(ngram) for ngram in self.FOREIGN_NGRAMS)
+
+        evidence = ukrainian + foreign
+        if evidence < self.min_evidence:
+            return None
+        if ukrainian >= self.min_share * evidence:
+            return True
+        if foreign >= self.min_share * evidence:
+            return False
+        return None
+
+    def is_ukrainian(self, text: str) -> bool:
+        """Classifies the text, asking langdetect only when the markers are ambiguous."""
+        decision = self.classify(text)
+        if decision is None:
+            self.stats["fallback"] += 1
+            try:
+                return detect(text) == "uk"
+            except LangDetectException as e:
+                self.logger.warning(f"Language detection failed: {e}. Assuming non-Ukrainian text.")
+                return False
+
+        self.stats["ukrainian" if decision else "other"] += 1
+        return decision
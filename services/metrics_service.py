@@ -0,0 +1,69 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import redis
+from sqlalchemy.exc import SQLAlchemyError
+
+from services.analysis_cache import AnalysisCache
+from services.complaint_backlog_service import ComplaintBacklogService
+
+
+class MetricsService:
+    """
+    Renders operational metrics shared by all workers through Redis
+    in the Prometheus text exposition format.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, analysis_cache: AnalysisCache, backlog_service: Optional[ComplaintBacklogService] = None):
+        self.analysis_cache = analysis_cache
+        self.backlog_service = backlog_service
+        self.logger = logging.getLogger(type(self).__name__)
+
+    def render(self) -> str:
+        lines = []
+        try:
+            self._add_analysis_cache_metrics(lines)
+        except redis.RedisError as e:
+            self.logger.warning(f"Could not collect analysis cache metrics: {e}")
+        if self.backlog_service is not None:
+            try:
+                self._add_backlog_metrics(lines)
+            except (redis.RedisError, SQLAlchemyError) as e:
+                self.logger.warning(f"Could not collect analysis backlog metrics: {e}")
+        return "\n".join(lines) + "\n"
+
+    def _add_analysis_cache_metrics(self, lines: List[str]) -> None:
+        stats = self.analysis_cache.stats()
+        self._add_metric(lines, "nlp_analysis_cache_lookups_total", "counter",
+                         "Complaint analysis cache lookups by result.",
+                         [({"result": "local_hit"}, stats["local_hits"]),
+                          ({"result": "redis_hit"}, stats["redis_hits"]),
+                          ({"result": "miss"}, stats["misses"])])
+
+        lookups = sum(stats.values())
+        hit_ratio = (stats["local_hits"] + stats["redis_hits"]) / lookups if lookups else 0.0
+        self._add_metric(lines, "nlp_analysis_cache_hit_ratio", "gauge",
+                         "Share of complaint texts served from the analysis cache.", [({}, hit_ratio)])
+
+    def _add_backlog_metrics(self, lines: List[str]) -> None:
+        backlog = self.backlog_service.backlog()
+        self._add_metric(lines, "nlp_unanalyzed_complaints", "gauge",
+                         "Complaints stored but not analyzed yet.", [({}, backlog["unanalyzed"])])
+        self._add_metric(lines, "nlp_unanalyzed_complaint_oldest_age_seconds", "gauge",
+                         "Age of the oldest complaint not analyzed yet.", [({}, backlog["oldest_age_seconds"])])
+        self._add_metric(lines, "nlp_abandoned_complaints", "gauge",
+                         "Complaints the backlog sweeper stopped re-queueing, their analysis kept failing.",
+                         [({}, backlog["abandoned"])])
+        self._add_metric(lines, "nlp_analysis_queue_length", "gauge",
+                         "Complaints waiting in the NLP batch queue.", [({}, backlog["queued"])])
+
+    @staticmethod
+    def _add_metric(lines: List[str], name: str, metric_type: str, help_text: str,
+                    samples: List[Tuple[Dict[str, str], float]]) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
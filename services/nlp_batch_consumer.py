@@ -0,0 +1,85 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from repositories.lemma_vocabulary_repository import LemmaVocabularyRepository
+from repositories.tender_repository import TenderRepository
+from repositories.violation_score_repository import ViolationScoreRepository
+from services.complaint_analysis_queue import ComplaintAnalysisQueue
+from services.complaint_analysis_service import ComplaintAnalysisService
+from util.db_context_manager import session_scope
+
+
+class NlpBatchConsumer:
+    """
+    Long-running consumer of the complaint analysis queue.
+    Collects pending complaints of many tenders into micro-batches, runs them through
+    nlp.pipe and writes highlights and score updates in one transaction per batch.
+    """
+
+    def __init__(self, queue: ComplaintAnalysisQueue, max_batch_size: int = 64,
+                 max_wait_seconds: float = 2.0, nlp_batch_size: int = 32, max_attempts: int = 3):
+        """
+        :param queue: The queue to consume.
+        :param max_batch_size: A batch is flushed once it holds this many complaints...
+        :param max_wait_seconds: ...or once this much time passed since its first complaint arrived.
+        :param nlp_batch_size: batch_size passed to nlp.pipe.
+        :param max_attempts: Failed batches are re-queued until their items reach this many attempts.
+        """
+        self.queue = queue
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.nlp_batch_size = nlp_batch_size
+        self.max_attempts = max_attempts
+        self.logger = logging.getLogger(type(self).__name__)
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> None:
+        """Consumes the queue until stop_event is set."""
+        self.logger.info(f"NLP batch consumer started (max batch {self.max_batch_size}, "
+                         f"max wait {self.max_wait_seconds}s, nlp.pipe batch {self.nlp_batch_size}).")
+        while stop_event is None or not stop_event.is_set():
+            items = self.queue.pop_batch(self.max_batch_size, self.max_wait_seconds)
+            if items:
+                self.process_batch(items)
+        self.logger.info("NLP batch consumer stopped.")
+
+    def process_batch(self, items: List[Dict]) -> int:
+        """
+        Analyzes one micro-batch.
+        :return: The number of complaints analyzed.
+        """
+        from app import app
+        started = time.perf_counter()
+        complaint_ids = list(dict.fromkeys(item["complaint_id"] for item in items))
+
+        try:
+            with app.app_context(), session_scope() as session:
+                tender_repo = TenderRepository(session)
+                analysis_service = ComplaintAnalysisService(ViolationScoreRepository(session),
+                                                            LemmaVocabularyRepository(session))
+
+                complaints = tender_repo.get_unanalyzed_complaints_for_update(complaint_ids)
+                tender_count = len({c.tender_id for c in complaints})
+                if complaints:
+                    analysis_service.update_violation_scores_batch(complaints, self.nlp_batch_size)
+        except Exception as e:
+            self.logger.error(f"Error analyzing batch of {len(complaint_ids)} complaints: {e}", exc_info=True)
+            self._requeue(items)
+            return 0
+
+        self.logger.info(f"Analyzed {len(complaints)} complaints of {tender_count} tenders "
+                         f"in {time.perf_counter() - started:.2f}s "
+                         f"({len(complaint_ids) - len(complaints)} already analyzed or locked).")
+        return len(complaints)
+
+    def _requeue(self, items: List[Dict]) -> None:
+        retry_items = []
+        for item in items:
+            attempts = item.get("attempts", 0) + 1
+            if attempts < self.max_attempts:
+                retry_items.append({**item, "attempts": attempts})
+            else:
+                self.logger.error(f"Giving up on complaint {item['complaint_id']} of tender "
+                                  f"{item['tender_id']} after {attempts} attempts.")
+        self.queue.push_many(retry_items)
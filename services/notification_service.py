@@ -1,5 +1,9 @@
 import logging
-from datetime import timedelta
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from celery import chord
 
 from repositories.tender_repository import TenderRepository
 from services.datetime_provider import DatetimeProvider
@@ -10,19 +14,23 @@ logger = logging.getLogger(__name__)
 
 class NotificationService:
     def __init__(self, tender_repository: TenderRepository, report_generator: ReportGenerationService,
-                    html_builder: HtmlReportBuilder, datetime_provider: DatetimeProvider, report_interval_min: int = 15):
+                    html_builder: HtmlReportBuilder, datetime_provider: DatetimeProvider, report_interval_min: int = 15,
+                    max_parallel: int = 4):
         self.tender_repo = tender_repository
         self.report_generator = report_generator
         self.html_builder = html_builder
         self.datetime_provider = datetime_provider
         self.report_interval = timedelta(minutes=report_interval_min * 2)
+        self.max_parallel = max(1, max_parallel)
 
     def send_notifications(self):
         """
-        Fetches recently modified tenders, generates reports, and sends
-        notifications to subscribed users.
+        Fetches recently modified tenders and fans out per-tender report generation
+        to a Celery chord. At most `max_parallel` report tasks are dispatched, the chord
+        callback logs a run-level summary.
         """
-        since_date = self.datetime_provider.utc_now() - self.report_interval
+        started_at = self.datetime_provider.utc_now()
+        since_date = started_at - self.report_interval
         logger.info(f"Starting notification process for tenders modified since {since_date}")
 
         try:
@@ -34,34 +42,93 @@ class NotificationService:
                 logger.info("No tenders require notifications.")
                 return
 
-            for tender_id, user_emails in tender_user_map.items():
-                logger.info(f"Processing tender ID: {tender_id} for {len(user_emails)} users.")
-                try:
-                    report_data = self.report_generator.generate_tender_report(
-                        tender_id=tender_id,
-                        new_since=since_date,
-                        changes_since=since_date,
-                        fetch_new_entities=True,
-                        fetch_entity_changes=True
-                    )
-
-                    html_report = self.html_builder.generate_report(report_data)
-                    tender_title = report_data.get("tender_info", f"Tender {tender_id}")
-                    subject = f"Оновлення тендеру: {tender_title}"
-
-                    from tasks import send_batch_email_task
-
-                    send_batch_email_task.apply_async(
-                        args=(user_emails, subject, html_report),
-                        queue='email_queue'
-                    )
-                    
-                except ValueError as e:
-                     logger.error(f"Could not generate report for tender {tender_id}: {e}")
-                except Exception as e:
-                    logger.exception(f"Unexpected error processing tender {tender_id}: {e}")
+            from tasks import send_tender_notifications_task, summarize_notification_run_task
+
+            batches = self.split_into_batches(tender_user_map, self.max_parallel)
+            header = [send_tender_notifications_task.s(batch, since_date) for batch in batches]
+            chord(header)(summarize_notification_run_task.s(started_at))
+
+            logger.info(f"Dispatched {len(tender_user_map)} tenders in {len(batches)} parallel report tasks.")
 
         except Exception as e:
             logger.exception(f"Failed during notification process: {e}")
 
-        logger.info("Notification process finished.")
\ No newline at end of file
+        logger.info("Notification process finished.")
+
+    @staticmethod
+    def split_into_batches(tender_user_map: Dict[str, List[str]],
+                           max_batches: int) -> List[List[Tuple[str, List[str]]]]:
+        """
+        Splits tenders round-robin into at most `max_batches` batches, which bounds
+        the number of report tasks running in parallel.
+        """
+        items = list(tender_user_map.items())
+        batch_count = min(max_batches, len(items))
+        return [items[i::batch_count] for i in range(batch_count)]
+
+    def notify_tender(self, tender_id: str, user_emails: List[str], since_date: datetime) -> Dict:
+        """
+        Generates the report and HTML for a single tender and dispatches the email task.
+        Never raises, so that one failing tender does not abort the chord.
+        :return: A dictionary with the tender status and per-stage timings in seconds.
+        """
+        logger.info(f"Processing tender ID: {tender_id} for {len(user_emails)} users.")
+        result = {"tender_id": tender_id, "status": "failed", "report_seconds": 0.0,
+                  "html_seconds": 0.0, "total_seconds": 0.0}
+        started = time.perf_counter()
+        try:
+            report_data = self.report_generator.generate_tender_report(
+                tender_id=tender_id,
+                new_since=since_date,
+                changes_since=since_date,
+                fetch_new_entities=True,
+                fetch_entity_changes=True
+            )
+            result["report_seconds"] = time.perf_counter() - started
+
+            html_started = time.perf_counter()
+            html_report = self.html_builder.generate_report(report_data)
+            result["html_seconds"] = time.perf_counter() - html_started
+
+            tender_title = report_data.get("tender_info", f"Tender {tender_id}")
+            subject = f"Оновлення тендеру: {tender_title}"
+
+            from tasks import send_batch_email_task
+
+            send_batch_email_task.apply_async(
+                args=(user_emails, subject, html_report),
+                queue='email_queue'
+            )
+            result["status"] = "sent"
+
+        except ValueError as e:
+             logger.error(f"Could not generate report for tender {tender_id}: {e}")
+        except Exception as e:
+            logger.exception(f"Unexpected error processing tender {tender_id}: {e}")
+
+        result["total_seconds"] = time.perf_counter() - started
+        return result
+
+    def summarize_run(self, batch_results: List[List[Dict]], started_at: datetime) -> Dict:
+        """
+        Aggregates per-tender results of a notification run and logs the summary.
+        :param batch_results: Results of the chord header, one list per batch.
+        :param started_at: The moment the run was dispatched.
+        """
+        tender_results = [result for batch in batch_results for result in batch]
+        total_seconds = (self.datetime_provider.utc_now() - started_at).total_seconds()
+
+        summary = {
+            "total_seconds": total_seconds,
+            "tenders": len(tender_results),
+            "sent": sum(1 for r in tender_results if r["status"] == "sent"),
+            "failed": sum(1 for r in tender_results if r["status"] != "sent"),
+            "per_tender": sorted(tender_results, key=lambda r: r["total_seconds"], reverse=True),
+        }
+
+        logger.info(f"Notification run finished in {total_seconds:.2f}s: {summary['sent']} sent, "
+                    f"{summary['failed']} failed out of {summary['tenders']} tenders.")
+        for r in summary["per_tender"]:
+            logger.info(f"Tender {r['tender_id']} ({r['status']}): total {r['total_seconds']:.3f}s, "
+                        f"report {r['report_seconds']:.3f}s, html {r['html_seconds']:.3f}s")
+        return summary
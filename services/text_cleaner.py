@@ -1,8 +1,11 @@
 import re
 import logging
-from langdetect import detect, LangDetectException
+from typing import Iterable, Iterator
+
 import spacy
 
+from services.language_detector import UkrainianLanguageDetector
+
 class TextCleaner:
     """Cleans text by lowercasing, removing numbers, filtering for Ukrainian words,
     removing punctuation, and normalizing whitespace."""
@@ -14,6 +17,7 @@ class TextCleaner:
         self._space_pattern = re.compile(r'\s+')
 
         self._ukr_char_pattern = re.compile(r'[а-яіїєґ]')
+        self.language_detector = UkrainianLanguageDetector()
         self.logger = logging.getLogger(type(self).__name__)
         self.logger.info("TextCleaner initialized.")
 
@@ -27,7 +31,9 @@ class TextCleaner:
 
 
     def _lemmatize(self, text: str) -> str:
-        doc = self.nlp(text)
+        return self._lemmatized_text(self.nlp(text))
+
+    def _lemmatized_text(self, doc) -> str:
         lemmatized = [
             token.lemma_
             for token in doc
@@ -43,6 +49,31 @@ class TextCleaner:
         :param text: The raw text string (e.g., concatenated title and description).
         :return: The cleaned text string containing primarily Ukrainian words.
         """
+        prepared_text = self._prepare(text)
+        if not prepared_text:
+            return ""
+
+        # lemmatize
+        lemmatized_text = self._lemmatize(prepared_text)
+        self.logger.debug(f"Lemmatized text: '{lemmatized_text[:100]}...'")
+
+        return lemmatized_text
+
+    def clean_many(self, texts: Iterable[str], batch_size: int = 64, n_process: int = 1) -> Iterator[str]:
+        """
+        Applies the cleaning pipeline to a stream of texts, lemmatizing them with nlp.pipe.
+        :param texts: The raw text strings.
+        :param batch_size: Texts per nlp.pipe batch.
+        :param n_process: Processes nlp.pipe lemmatizes in.
+        :return: The cleaned texts in input order, empty strings for texts that were filtered out.
+        """
+        # filtered out texts go through the pipe as empty strings, keeping the output aligned with the input
+        prepared_texts = (self._prepare(text) for text in texts)
+        for doc in self.nlp.pipe(prepared_texts, batch_size=batch_size, n_process=n_process):
+            yield self._lemmatized_text(doc)
+
+    def _prepare(self, text: str) -> str:
+        """Everything clean does before lemmatizing."""
         if not isinstance(text, str):
              self.logger.warning(f"Input is not a string: {type(text)}. Returning empty string.")
              return ""
@@ -78,13 +109,8 @@ class TextCleaner:
         self.logger.debug(f"Joined Ukrainian words: '{cleaned_text[:100]}...'")
 
         # check if the text is Ukrainian (cyrillic languages ambiguity)
-        try:
-            lang = detect(cleaned_text)
-            if lang != 'uk':
-                self.logger.debug(f"Detected language is not Ukrainian: {lang}.")
-                return ""
-        except LangDetectException as e:
-            self.logger.warning(f"Language detection failed: {e}. Assuming non-Ukrainian text.")
+        if not self.language_detector.is_ukrainian(cleaned_text):
+            self.logger.debug("Detected language is not Ukrainian.")
             return ""
 
         # remove anything not alphanumeric, whitespace, or Ukrainian letters
@@ -98,8 +124,4 @@ class TextCleaner:
         if not cleaned_text:
              self.logger.debug("Text became empty after cleaning.")
 
-        # lemmatize
-        lemmatized_text = self._lemmatize(cleaned_text)
-        self.logger.debug(f"Lemmatized text: '{lemmatized_text[:100]}...'")
-
-        return lemmatized_text
\ No newline at end of file
+        return cleaned_text
\ No newline at end of file
@@ -0,0 +1,101 @@
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from services.text_cleaner import TextCleaner
+
+# the TextCleaner of a worker process, built once by _init_worker
+_worker_cleaner: Optional[TextCleaner] = None
+
+
+def _init_worker() -> None:
+    global _worker_cleaner
+    _worker_cleaner = TextCleaner()
+
+
+def _worker_ready() -> bool:
+    return _worker_cleaner is not None
+
+
+def _clean_batch(texts: List[str], batch_size: int) -> List[str]:
+    """Runs in a worker process."""
+    return list(_worker_cleaner.clean_many(texts, batch_size=batch_size))
+
+
+class TextCleaningPool:
+    """
+    A cleaning stage that lives as long as a crawl or an export: its worker processes are started
+    once and each loads the spaCy model once, instead of nlp.pipe(n_process=...) starting and
+    stopping its processes for every batch. Batches are cleaned while the caller collects the
+    next ones and come back in submission order, so they can be written to the corpus as they are.
+    With a single process, batches are cleaned by one background thread of the calling process.
+    """
+
+    def __init__(self, processes: int = 1, batch_size: int = 64, cleaner: Optional[TextCleaner] = None) -> None:
+        """
+        :param processes: Worker processes, each with its own TextCleaner.
+        :param batch_size: Texts per nlp.pipe batch within a worker.
+        :param cleaner: The cleaner used with a single process, a new one by default.
+        """
+        self.processes = max(processes, 1)
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(type(self).__name__)
+
+        if self.processes > 1:
+            self._cleaner = None
+            # forked, so worker processes do not re-run the calling script; all of them are forked
+            # on the first submit, which happens here, before the caller starts any threads of its own
+            self._executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                                 mp_context=multiprocessing.get_context("fork"))
+            self._executor.submit(_worker_ready).result()
+        else:
+            self._cleaner = cleaner or TextCleaner()
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="text-cleaner")
+        self.logger.info(f"Text cleaning pool started with {self.processes} process(es).")
+
+    def submit(self, texts: List[str]) -> Future:
+        """:return: A future of the cleaned texts, in input order, empty strings for texts that were filtered out."""
+        if self._cleaner is None:
+            return self._executor.submit(_clean_batch, texts, self.batch_size)
+        return self._executor.submit(lambda: list(self._cleaner.clean_many(texts, batch_size=self.batch_size)))
+
+    def clean_batches(self, batches: Iterable[Tuple[List[str], Any]],
+                      max_pending: Optional[int] = None) -> Iterator[Tuple[List[str], Any, Optional[List[str]]]]:
+        """
+        Cleans (texts, payload) batches concurrently, yielding every batch as soon as it and all
+        batches before it are cleaned. Taking the next batch from batches waits while max_pending
+        batches are being cleaned, so collection never runs far ahead of cleaning.
+        :param max_pending: Batches cleaned at once, twice the number of processes by default.
+        :return: (texts, payload, cleaned texts), cleaned texts are None if cleaning the batch failed.
+        """
+        max_pending = max_pending or 2 * self.processes
+        pending = deque()
+        try:
+            for texts, payload in batches:
+                pending.append((texts, payload, self.submit(texts)))
+                while pending and (len(pending) >= max_pending or pending[0][2].done()):
+                    yield self._result(*pending.popleft())
+            while pending:
+                yield self._result(*pending.popleft())
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+
+    def _result(self, texts: List[str], payload: Any, future: Future) -> Tuple[List[str], Any, Optional[List[str]]]:
+        try:
+            return texts, payload, future.result()
+        except Exception as e:
+            self.logger.error(f"Error cleaning a batch of {len(texts)} texts: {e}", exc_info=True)
+            return texts, payload, None
+
+    def close(self) -> None:
+        """Stops the workers, batches not yet cleaned are dropped."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "TextCleaningPool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
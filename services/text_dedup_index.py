@@ -0,0 +1,67 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import unicodedata
+from pathlib import Path
+from typing import Iterable, List
+
+
+class TextDedupIndex:
+    """
+    Persistent set of texts already added to the corpus, kept in SQLite as hashes of the
+    normalized text (NFC, lowercase, collapsed whitespace), so texts seen in earlier runs
+    or other tenders are skipped before any cleaning or lemmatization is spent on them.
+    """
+
+    # SQLite's default limit of bound parameters per statement is 999 in older builds
+    _QUERY_CHUNK = 500
+    _space_pattern = re.compile(r"\s+")
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger(type(self).__name__)
+
+        self._connection = sqlite3.connect(str(self.path))
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS seen_texts (hash BLOB PRIMARY KEY) WITHOUT ROWID")
+        self._connection.commit()
+        self.logger.info(f"Dedup index '{self.path}' holds {len(self)} texts.")
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM seen_texts").fetchone()[0]
+
+    def __enter__(self) -> "TextDedupIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @classmethod
+    def text_hash(cls, text: str) -> bytes:
+        normalized = cls._space_pattern.sub(" ", unicodedata.normalize("NFC", text).lower()).strip()
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+    def contains(self, text: str) -> bool:
+        return self.contains_many([text])[0]
+
+    def contains_many(self, texts: List[str]) -> List[bool]:
+        """Whether each text, once normalized, was added before."""
+        hashes = [self.text_hash(text) for text in texts]
+        seen = set()
+        for i in range(0, len(hashes), self._QUERY_CHUNK):
+            chunk = hashes[i:i + self._QUERY_CHUNK]
+            rows = self._connection.execute(
+                f"SELECT hash FROM seen_texts WHERE hash IN ({','.join('?' * len(chunk))})", chunk)
+            seen.update(row[0] for row in rows)
+        return [text_hash in seen for text_hash in hashes]
+
+    def add_many(self, texts: Iterable[str]) -> None:
+        """Records the texts as seen, committed at once."""
+        with self._connection:
+            self._connection.executemany("INSERT OR IGNORE INTO seen_texts (hash) VALUES (?)",
+                                         ((self.text_hash(text),) for text in texts))
+
+    def close(self) -> None:
+        self._connection.close()
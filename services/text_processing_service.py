@@ -1,5 +1,7 @@
 import logging
+from itertools import islice
 from pathlib import Path
+from typing import Dict, Iterable, List, Optional
 from services.text_cleaner import TextCleaner
 from services.corpus_writer import CorpusWriter
 
@@ -8,20 +10,22 @@ class TextProcessingService:
     Orchestrates text cleaning and writing to a corpus.
     """
 
-    def __init__(self, corpus_dir: str, max_lines_per_file: int = 1000, file_prefix: str = "corpus_"):
+    def __init__(self, corpus_dir: str, max_lines_per_file: int = 1000, file_prefix: str = "corpus_",
+                 compression: Optional[str] = None):
         """
         Initializes the service with a TextCleaner and CorpusWriter.
 
         :param corpus_dir: The directory for storing corpus files.
         :param max_lines_per_file: Max lines per corpus file for the writer.
         :param file_prefix: Prefix for corpus filenames.
+        :param compression: Corpus shard compression, None, "gzip" or "zstd".
         """
         self.logger = logging.getLogger(type(self).__name__)
         self.logger.info("Initializing TextProcessingService...")
 
         try:
             self.cleaner = TextCleaner()
-            self.writer = CorpusWriter(str(Path(corpus_dir)), max_lines_per_file, file_prefix)
+            self.writer = CorpusWriter(str(Path(corpus_dir)), max_lines_per_file, file_prefix, compression)
             self.logger.info("TextProcessingService initialized successfully.")
         except Exception as e:
             self.logger.exception(f"Failed to initialize TextProcessingService: {e}")
@@ -53,3 +57,68 @@ class TextProcessingService:
         except Exception as e:
             self.logger.error(f"Error during processing or storing text: {e}", exc_info=True)
             return False
+
+
+    def process_many(self, texts: Iterable[str], batch_size: int = 64, n_process: int = 1,
+                     write_batch_size: int = 500, checkpoint_name: Optional[str] = None,
+                     checkpoint: Optional[Dict] = None) -> int:
+        """
+        Cleans a stream of texts with nlp.pipe and writes the non-empty results to the corpus
+        in input order, write_batch_size lines at a time.
+
+        :param texts: The raw text strings to process.
+        :param batch_size: Texts per nlp.pipe batch.
+        :param n_process: Processes the texts are lemmatized in, more use more cores.
+        :param write_batch_size: Cleaned texts collected before each write.
+        :param checkpoint_name: Name the checkpoint is stored under.
+        :param checkpoint: Committed to the corpus manifest with the written texts, only if all were processed.
+        :return: The number of texts processed (written or skipped because they were empty after cleaning).
+        """
+        processed = 0
+        written = 0
+        try:
+            cleaned_texts = self.cleaner.clean_many(texts, batch_size=batch_size, n_process=n_process)
+            while True:
+                batch = list(islice(cleaned_texts, write_batch_size))
+                if not batch:
+                    break
+                written += self.writer.write_many(batch)
+                processed += len(batch)
+            if checkpoint is not None:
+                self.writer.set_checkpoint(checkpoint_name, checkpoint)
+            self.writer.flush()
+        except Exception as e:
+            self.logger.error(f"Error during batch processing after {processed} texts: {e}", exc_info=True)
+
+        self.logger.info(f"Processed {processed} texts, wrote {written} to the corpus.")
+        return processed
+
+    def store_cleaned(self, cleaned_texts: List[str], checkpoint_name: Optional[str] = None,
+                      checkpoint: Optional[Dict] = None) -> bool:
+        """
+        Writes texts cleaned elsewhere, e.g. by a TextCleaningPool, to the corpus in order.
+
+        :param cleaned_texts: Cleaned texts, empty ones are skipped.
+        :param checkpoint_name: Name the checkpoint is stored under.
+        :param checkpoint: Committed to the corpus manifest with the written texts.
+        :return: True if the texts and the checkpoint were written, False otherwise.
+        """
+        try:
+            written = self.writer.write_many(cleaned_texts)
+            if checkpoint is not None:
+                self.writer.set_checkpoint(checkpoint_name, checkpoint)
+            self.writer.flush()
+        except Exception as e:
+            self.logger.error(f"Error storing {len(cleaned_texts)} cleaned texts: {e}", exc_info=True)
+            return False
+
+        self.logger.info(f"Stored {len(cleaned_texts)} cleaned texts, wrote {written} to the corpus.")
+        return True
+
+    def get_checkpoint(self, name: str) -> Optional[Dict]:
+        """The checkpoint stored with the corpus under name, None if there is none."""
+        return self.writer.get_checkpoint(name)
+
+    def close(self) -> None:
+        """Writes texts still buffered by the corpus writer."""
+        self.writer.close()
@@ -1,47 +1,134 @@
-from celery.signals import worker_process_init
+from celery.signals import worker_init, worker_process_init
 import spacy
+import gc
 import os
 import json
 import logging
+import time
+
+from config import Config
+from services.analysis_cache import AnalysisCache
+from services.keyword_matcher import KeywordMatcher
+from util.keyword_sets import compute_keyword_set_version, lemmatize_keywords, load_keyword_artifact
+from util.process_memory import read_memory_usage, format_memory_usage
+from util.topic_model import load_topic_model
 
 NLP_MODEL = None
 LEMMATIZED_KEYWORDS = None
+KEYWORD_MATCHER = None
+KEYWORD_SET_VERSION = None
+ANALYSIS_CACHE = None
+TOPIC_MODEL = None
+
+MODEL_NAME = "uk_core_news_sm"
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "false").lower() == "true"
+
+
+@worker_init.connect
+def preload_nlp_model(**kwargs):
+    """
+    With PRELOAD_NLP_MODEL=true the prefork parent loads the model and keyword index once, before forking.
+    gc.freeze moves everything loaded so far out of the collector's generations, so collections in the
+    children do not touch those objects' headers and their pages stay shared copy-on-write.
+    """
+    logger = logging.getLogger("celery.worker.nlp_loader")
+    if not (_env_flag("LOAD_NLP_MODEL") and _env_flag("PRELOAD_NLP_MODEL")):
+        return
+
+    started = time.perf_counter()
+    _load_nlp_resources(logger)
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded SpaCy model in the parent process in {time.perf_counter() - started:.2f}s "
+                f"({gc.get_freeze_count()} objects frozen), {format_memory_usage(read_memory_usage())}.")
+
 
 @worker_process_init.connect
 def init_nlp_model(**kwargs):
-    global NLP_MODEL, LEMMATIZED_KEYWORDS
+    global NLP_MODEL, LEMMATIZED_KEYWORDS, KEYWORD_MATCHER, KEYWORD_SET_VERSION, ANALYSIS_CACHE, TOPIC_MODEL
     logger = logging.getLogger("celery.worker.nlp_loader")
 
-    if os.environ.get("LOAD_NLP_MODEL", "false").lower() != "true":
+    if not _env_flag("LOAD_NLP_MODEL"):
         logger.info(f"LOAD_NLP_MODEL is '{os.environ.get('LOAD_NLP_MODEL', 'Not Set')}'. Skipping SpaCy model loading for this worker process.")
         NLP_MODEL = None
         LEMMATIZED_KEYWORDS = None
+        KEYWORD_MATCHER = None
+        KEYWORD_SET_VERSION = None
+        ANALYSIS_CACHE = None
+        TOPIC_MODEL = None
         return
 
-    if NLP_MODEL is None:
-        try:
-            logger.info("Loading SpaCy model and keywords for worker process...")
-            NLP_MODEL = spacy.load("uk_core_news_sm", disable=["parser", "ner"])
+    started = time.perf_counter()
+    inherited = NLP_MODEL is not None
+    if not inherited:
+        _load_nlp_resources(logger)
 
-            project_root = os.path.dirname(os.path.abspath(__file__))
-            keywords_path = os.path.join(project_root, 'keywords.json')
+    # created per process, a Redis connection must not be shared with the parent across fork
+    if NLP_MODEL is not None and Config.ANALYSIS_CACHE_ENABLED:
+        ANALYSIS_CACHE = AnalysisCache.from_url(Config.ANALYSIS_CACHE_REDIS_URL,
+                                                Config.ANALYSIS_CACHE_MAX_ENTRIES,
+                                                Config.ANALYSIS_CACHE_TTL_SECONDS)
 
-            if not os.path.exists(keywords_path):
-                logger.error(f"Keywords file not found at: {keywords_path}")
-                LEMMATIZED_KEYWORDS = {}
-                return
+    logger.info(f"NLP resources of process {os.getpid()} ready in {time.perf_counter() - started:.2f}s "
+                f"({'inherited from the parent' if inherited else 'loaded'}), "
+                f"{format_memory_usage(read_memory_usage())}.")
 
-            with open(keywords_path, 'r', encoding='utf-8') as file:
-                keywords_data = json.load(file)
 
+def _load_nlp_resources(logger):
+    global NLP_MODEL, LEMMATIZED_KEYWORDS, KEYWORD_MATCHER, KEYWORD_SET_VERSION
+    _load_topic_model(logger)
+    try:
+        logger.info("Loading SpaCy model and keywords for worker process...")
+        NLP_MODEL = spacy.load(MODEL_NAME, disable=["parser", "ner"])
+
+        project_root = os.path.dirname(os.path.abspath(__file__))
+        keywords_path = os.path.join(project_root, 'keywords.json')
+
+        if not os.path.exists(keywords_path):
+            logger.error(f"Keywords file not found at: {keywords_path}")
             LEMMATIZED_KEYWORDS = {}
-            for domain, words in keywords_data.items():
-                LEMMATIZED_KEYWORDS[domain] = [NLP_MODEL(word)[0].lemma_ for word in words]
-
-            logger.info("SpaCy model and keywords loaded successfully for worker process.")
-        except Exception as e:
-            logger.critical(
-                f"FAILED to load SpaCy model or keywords on worker_process_init: {e}. NLP_MODEL will be None.",
-                exc_info=True)
-            NLP_MODEL = None
-            LEMMATIZED_KEYWORDS = None
\ No newline at end of file
+            return
+
+        with open(keywords_path, 'r', encoding='utf-8') as file:
+            keywords_data = json.load(file)
+
+        artifact = load_keyword_artifact(os.path.join(project_root, 'keywords.lemmatized.json'),
+                                         keywords_data, MODEL_NAME)
+        if artifact:
+            LEMMATIZED_KEYWORDS = artifact["lemmatized_keywords"]
+        else:
+            logger.warning("No up-to-date keywords.lemmatized.json for this keywords.json and model version, "
+                           "lemmatizing keywords now. Run 'python -m topic_modeling.build_keyword_artifact'.")
+            LEMMATIZED_KEYWORDS = lemmatize_keywords(NLP_MODEL, keywords_data)
+        KEYWORD_MATCHER = KeywordMatcher(LEMMATIZED_KEYWORDS)
+        KEYWORD_SET_VERSION = compute_keyword_set_version(keywords_data)
+
+        logger.info(f"SpaCy model and keywords (version {KEYWORD_SET_VERSION}) loaded successfully for worker process.")
+    except Exception as e:
+        logger.critical(
+            f"FAILED to load SpaCy model or keywords on worker_process_init: {e}. NLP_MODEL will be None.",
+            exc_info=True)
+        NLP_MODEL = None
+        LEMMATIZED_KEYWORDS = None
+        KEYWORD_MATCHER = None
+        KEYWORD_SET_VERSION = None
+
+
+def _load_topic_model(logger):
+    """Optional, without it complaints are analyzed but get no topic."""
+    global TOPIC_MODEL
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'topic_model.joblib')
+    try:
+        TOPIC_MODEL = load_topic_model(path)
+    except Exception as e:
+        logger.error(f"Failed to load topic model {path}: {e}. Complaints get no topic.", exc_info=True)
+        TOPIC_MODEL = None
+        return
+    if TOPIC_MODEL is None:
+        logger.warning(f"No topic model for this scikit-learn version at {path}, complaints get no topic. "
+                       f"Run 'python -m topic_modeling.topics_main'.")
+    else:
+        logger.info(f"Topic model {TOPIC_MODEL['version']} with {TOPIC_MODEL['n_topics']} topics loaded.")
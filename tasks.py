@@ -1,7 +1,15 @@
 import logging
+import smtplib
+from datetime import datetime
+from typing import Optional
+
+from celery.signals import worker_process_shutdown
 
 from celery_app import app as celery_app
+from config import Config
 from repositories.tender_repository import TenderRepository
+from services.complaint_analysis_queue import ComplaintAnalysisQueue
+from services.complaint_backlog_service import ComplaintBacklogService
 from services.crawler_service import CrawlerService
 from services.datetime_provider import DatetimeProvider
 from services.email_service import EmailService
@@ -28,6 +36,38 @@ def sync_all_tenders_task():
         crawler_service.sync_all_tenders()
         session.commit()
 
+@celery_app.task(name='tasks.sweep_unanalyzed_complaints_task')
+def sweep_unanalyzed_complaints_task() -> int:
+    with app.app_context(), session_scope() as session:
+        backlog_service = ComplaintBacklogService(
+            tender_repo=TenderRepository(session),
+            analysis_queue=ComplaintAnalysisQueue.from_url(Config.NLP_QUEUE_REDIS_URL),
+            datetime_provider=DatetimeProvider(),
+            min_age_minutes=Config.NLP_SWEEP_MIN_AGE_MINUTES,
+            batch_limit=Config.NLP_SWEEP_BATCH_LIMIT,
+            max_sweeps=Config.NLP_SWEEP_MAX_ATTEMPTS
+        )
+        return backlog_service.sweep()
+
+_email_service: Optional[EmailService] = None
+
+def _get_email_service() -> EmailService:
+    """Returns the email service of this worker process, its SMTP connection is reused across tasks."""
+    global _email_service
+    if _email_service is None:
+        _email_service = EmailService(
+            smtp_server=app.config['SMTP_SERVER'],
+            port=app.config['SMTP_PORT'],
+            sender_email=app.config['SMTP_USER'],
+            password=app.config['SMTP_PASSWORD']
+        )
+    return _email_service
+
+@worker_process_shutdown.connect
+def close_email_connection(**kwargs):
+    if _email_service is not None:
+        _email_service.close()
+
 @celery_app.task(
     name='tasks.send_batch_email_task',
     bind=True,
@@ -36,35 +76,55 @@ def sync_all_tenders_task():
 )
 def send_batch_email_task(self, recipients: list, subject: str, html_body: str):
     """
-    Send one email per recipient over a single SMTP connection.
+    Send one email per recipient over the worker's persistent SMTP connection.
     """
+    logger = logging.getLogger(__name__)
     try:
-        logger = logging.getLogger(__name__)
-        with app.app_context():
-            with EmailService(
-                smtp_server=app.config['SMTP_SERVER'],
-                port=app.config['SMTP_PORT'],
-                sender_email=app.config['SMTP_USER'],
-                password=app.config['SMTP_PASSWORD']
-            ) as email_service:
-                for rcpt in recipients:
-                    try:
-                        email_service.send(rcpt, subject, html_body)
-                    except Exception as e:
-                        rcpt_masked = rcpt[:2] + "****" + rcpt[-2:]
-                        logger.error(f"Failed to send email to {rcpt_masked} {e}", exc_info=True)
+        failed, unsent = _get_email_service().send_batch(recipients, subject, html_body)
     except Exception as exc:
         logger.exception("Batch email task failed, retrying...")
         raise self.retry(exc=exc)
 
+    for rcpt in failed:
+        rcpt_masked = rcpt[:2] + "****" + rcpt[-2:]
+        logger.error(f"Failed to send email to {rcpt_masked}")
+    if unsent:
+        # recipients the email was delivered to before the connection was lost are not retried
+        logger.error(f"SMTP connection lost mid-batch, retrying {len(unsent)} unsent emails...")
+        raise self.retry(args=(unsent, subject, html_body),
+                         exc=smtplib.SMTPServerDisconnected(f"{len(unsent)} emails not sent"))
+
+def _build_notification_service(session) -> NotificationService:
+    return NotificationService(
+        tender_repository=TenderRepository(session),
+        report_generator=ReportGenerationService(session),
+        html_builder=HtmlReportBuilder(),
+        datetime_provider=DatetimeProvider(),
+        report_interval_min=15,
+        max_parallel=app.config['NOTIFICATION_MAX_PARALLEL']
+    )
+
 @celery_app.task(name='tasks.send_notifications_task')
 def send_notifications_task():
     with app.app_context(), session_scope() as session:
-        notification_service = NotificationService(
-            tender_repository=TenderRepository(session),
-            report_generator=ReportGenerationService(session),
-            html_builder=HtmlReportBuilder(),
-            datetime_provider=DatetimeProvider(),
-            report_interval_min=15
-        )
-        notification_service.send_notifications()
\ No newline at end of file
+        notification_service = _build_notification_service(session)
+        notification_service.send_notifications()
+
+@celery_app.task(name='tasks.send_tender_notifications_task')
+def send_tender_notifications_task(tender_batch: list, since_date: datetime) -> list:
+    """
+    Generates reports and dispatches emails for a batch of (tender_id, user_emails) pairs.
+    Returns per-tender timings for the run summary.
+    """
+    with app.app_context(), session_scope() as session:
+        notification_service = _build_notification_service(session)
+        return [
+            notification_service.notify_tender(tender_id, user_emails, since_date)
+            for tender_id, user_emails in tender_batch
+        ]
+
+@celery_app.task(name='tasks.summarize_notification_run_task')
+def summarize_notification_run_task(batch_results: list, started_at: datetime) -> dict:
+    with app.app_context(), session_scope() as session:
+        notification_service = _build_notification_service(session)
+        return notification_service.summarize_run(batch_results, started_at)
@@ -0,0 +1,96 @@
+from unittest.mock import MagicMock
+
+import pytest
+import redis
+
+from services.analysis_cache import AnalysisCache
+from services.metrics_service import MetricsService
+
+
+class InMemoryRedis:
+    """The few Redis commands AnalysisCache uses, backed by dicts."""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode() if isinstance(value, str) else value
+
+    def hincrby(self, key, field, amount):
+        self.hashes.setdefault(key, {})
+        self.hashes[key][field.encode()] = int(self.hashes[key].get(field.encode(), 0)) + amount
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def pipeline(self, transaction=True):
+        redis_client = self
+        pipe = MagicMock()
+        calls = []
+        pipe.set.side_effect = lambda *args, **kwargs: calls.append((redis_client.set, args, kwargs))
+        pipe.hincrby.side_effect = lambda *args, **kwargs: calls.append((redis_client.hincrby, args, kwargs))
+        pipe.execute.side_effect = lambda: [fn(*args, **kwargs) for fn, args, kwargs in calls]
+        return pipe
+
+
+ANALYSIS = {
+    "highlighted_keywords": [{"keyword": "ціна", "domains": ["1"], "startPosition": 5, "length": 4}],
+    "lemmas": ["висока", "ціна"],
+    "tokens": [("висока", 0, 6), ("ціна", 7, 4), (".", 11, 1)],
+}
+
+
+class TestAnalysisCache:
+
+    @pytest.fixture
+    def redis_client(self):
+        return InMemoryRedis()
+
+    @pytest.fixture
+    def cache(self, redis_client):
+        return AnalysisCache(redis_client, max_entries=2)
+
+    def test_round_trip_through_redis(self, redis_client, cache):
+        cache.put_many(["висока ціна."], [ANALYSIS], "v1")
+        other_worker = AnalysisCache(redis_client)
+
+        assert other_worker.get_many(["висока ціна.", "інший текст"], "v1") == [ANALYSIS, None]
+        assert other_worker.stats() == {"local_hits": 0, "redis_hits": 1, "misses": 1}
+
+    def test_keyword_set_version_is_part_of_the_key(self, cache):
+        cache.put_many(["висока ціна."], [ANALYSIS], "v1")
+
+        assert cache.get_many(["висока ціна."], "v2") == [None]
+        assert cache.get_many(["висока ціна."], "v1") == [ANALYSIS]
+        assert cache.stats() == {"local_hits": 1, "redis_hits": 0, "misses": 1}
+
+    def test_local_lru_is_bounded(self, redis_client, cache):
+        cache.put_many(["a", "b", "c"], [ANALYSIS] * 3, "v1")
+        redis_client.values.clear()
+
+        assert cache.get_many(["a", "b", "c"], "v1") == [None, ANALYSIS, ANALYSIS]
+
+    def test_redis_errors_count_as_misses(self):
+        failing = MagicMock()
+        failing.mget.side_effect = redis.ConnectionError("down")
+        failing.pipeline.return_value.execute.side_effect = redis.ConnectionError("down")
+        cache = AnalysisCache(failing)
+
+        assert cache.get_many(["висока ціна."], "v1") == [None]
+        cache.put_many(["висока ціна."], [ANALYSIS], "v1")
+        assert cache.get_many(["висока ціна."], "v1") == [ANALYSIS]
+
+    def test_metrics_export_hit_counts(self, redis_client, cache):
+        cache.put_many(["висока ціна."], [ANALYSIS], "v1")
+        cache.get_many(["висока ціна.", "інший текст", "ще один"], "v1")
+
+        text = MetricsService(cache).render()
+
+        assert 'nlp_analysis_cache_lookups_total{result="local_hit"} 1' in text
+        assert 'nlp_analysis_cache_lookups_total{result="miss"} 2' in text
+        assert "# TYPE nlp_analysis_cache_hit_ratio gauge" in text
+        assert "nlp_analysis_cache_hit_ratio 0.333" in text
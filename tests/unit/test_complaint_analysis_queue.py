@@ -0,0 +1,50 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.complaint_analysis_queue import ComplaintAnalysisQueue
+
+
+class TestComplaintAnalysisQueue:
+
+    @pytest.fixture
+    def mock_redis(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def queue(self, mock_redis):
+        return ComplaintAnalysisQueue(mock_redis, key="test:queue", poll_interval_seconds=0)
+
+    @staticmethod
+    def encoded(complaint_id):
+        return json.dumps({"tender_id": "t1", "complaint_id": complaint_id, "attempts": 0}).encode()
+
+    def test_pop_batch_flushes_on_size(self, queue, mock_redis):
+        mock_redis.blpop.return_value = (b"test:queue", self.encoded("c1"))
+        mock_redis.lpop.side_effect = [[self.encoded("c2"), self.encoded("c3")]]
+
+        batch = queue.pop_batch(max_size=3, max_wait_seconds=10)
+
+        assert [item["complaint_id"] for item in batch] == ["c1", "c2", "c3"]
+        mock_redis.lpop.assert_called_once_with("test:queue", 2)
+
+    def test_pop_batch_flushes_on_time(self, queue, mock_redis):
+        mock_redis.blpop.return_value = (b"test:queue", self.encoded("c1"))
+        mock_redis.lpop.return_value = None
+
+        batch = queue.pop_batch(max_size=100, max_wait_seconds=0)
+
+        assert [item["complaint_id"] for item in batch] == ["c1"]
+
+    def test_pop_batch_empty_queue(self, queue, mock_redis):
+        mock_redis.blpop.return_value = None
+
+        assert queue.pop_batch(max_size=10, max_wait_seconds=1) == []
+        mock_redis.lpop.assert_not_called()
+
+    def test_malformed_items_are_dropped(self, queue, mock_redis):
+        mock_redis.blpop.return_value = (b"test:queue", b"not json")
+        mock_redis.lpop.return_value = None
+
+        assert queue.pop_batch(max_size=10, max_wait_seconds=0) == []
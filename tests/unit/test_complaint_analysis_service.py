@@ -1,14 +1,20 @@
 import pytest
 from unittest.mock import MagicMock
 import math
+import random
+import re
 from collections import namedtuple
 
 from models.complaints import Complaint
-from models import ViolationScore
+from repositories.lemma_vocabulary_repository import LemmaVocabularyRepository
 from repositories.violation_score_repository import ViolationScoreRepository
 from services.complaint_analysis_service import ComplaintAnalysisService
 
 from signals import NLP_MODEL, LEMMATIZED_KEYWORDS
+from sklearn.decomposition import NMF
+from topic_modeling.dtm_cache import make_vectorizer, vectorizer_params
+from util.topic_model import build_topic_model_artifact
+from util.lemma_stream import decode_tokens
 
 MockToken = namedtuple('MockToken', ['lemma_', 'idx', 'text'])
 
@@ -46,6 +52,7 @@ class TestComplaintAnalysisService:
     def mock_nlp_and_keywords(self, mocker):
         """Mocks NLP_MODEL and LEMMATIZED_KEYWORDS from the signals module."""
         mock_nlp = MagicMock(side_effect=mock_spacy_doc_processor)
+        mock_nlp.pipe.side_effect = lambda texts, batch_size: (mock_spacy_doc_processor(t) for t in texts)
         mocker.patch('signals.NLP_MODEL', mock_nlp)
 
         test_keywords = {
@@ -54,39 +61,62 @@ class TestComplaintAnalysisService:
         }
 
         mocker.patch('signals.LEMMATIZED_KEYWORDS', test_keywords)
+        mocker.patch('signals.KEYWORD_SET_VERSION', "v2")
+        mocker.patch('signals.ANALYSIS_CACHE', None)
+        mocker.patch('signals.TOPIC_MODEL', None)
 
         return mock_nlp, test_keywords
 
-    @pytest.fixture
-    def mock_violation_score_repo_existing_score(self):
+    @staticmethod
+    def make_repo(stored_scores):
+        """Repository mock whose add_scores mimics the server-side upsert on an in-memory store."""
         mock_repo = MagicMock(spec=ViolationScoreRepository)
-        mock_existing_score = MagicMock()
-        mock_existing_score.tender_id = "tender123"
-        mock_existing_score.scores = {
-            "0": {"score": 0.0, "keywords": {}},
-            "1": {"score": 0.0, "keywords": {}},
-        }
-        mock_repo.get_by_tender_id.return_value = mock_existing_score
-        mock_repo.update_complaint_highlighted_keywords = MagicMock()
-        mock_repo.flush = MagicMock()
+
+        def add_scores(tender_id, new_domain_data):
+            stored_scores[tender_id] = ComplaintAnalysisService.merge_domain_scores(
+                stored_scores.get(tender_id, {}), new_domain_data)
+            return stored_scores[tender_id]
+
+        mock_repo.add_scores.side_effect = add_scores
         return mock_repo
 
     @pytest.fixture
-    def mock_violation_score_repo(self):  # For new score scenario
-        mock_repo = MagicMock(spec=ViolationScoreRepository)
-        mock_repo.get_by_tender_id.return_value = None
-        mock_repo.update_complaint_highlighted_keywords = MagicMock()
-        mock_repo.create = MagicMock()
+    def mock_lemma_vocabulary_repo(self):
+        """Repository mock keeping an in-memory vocabulary."""
+        vocabulary = {}
+        mock_repo = MagicMock(spec=LemmaVocabularyRepository)
+
+        def get_or_create_ids(lemmas):
+            for lemma in sorted(lemmas):
+                vocabulary.setdefault(lemma, len(vocabulary) + 1)
+            return {lemma: vocabulary[lemma] for lemma in lemmas}
+
+        mock_repo.get_or_create_ids.side_effect = get_or_create_ids
+        mock_repo.get_lemmas.side_effect = lambda ids: {i: l for l, i in vocabulary.items() if i in ids}
         return mock_repo
 
     @pytest.fixture
-    def complaint_analysis_service(self, mock_violation_score_repo, mock_nlp_and_keywords):
-        return ComplaintAnalysisService(mock_violation_score_repo)
+    def mock_violation_score_repo_existing_score(self):
+        return self.make_repo({
+            "tender123": {
+                "0": {"score": 0.0, "keywords": {}},
+                "1": {"score": 0.0, "keywords": {}},
+            }
+        })
+
+    @pytest.fixture
+    def mock_violation_score_repo(self):  # For new score scenario
+        return self.make_repo({})
+
+    @pytest.fixture
+    def complaint_analysis_service(self, mock_violation_score_repo, mock_lemma_vocabulary_repo,
+                                   mock_nlp_and_keywords):
+        return ComplaintAnalysisService(mock_violation_score_repo, mock_lemma_vocabulary_repo)
 
     @pytest.fixture
     def complaint_analysis_service_existing_score(self, mock_violation_score_repo_existing_score,
-                                                  mock_nlp_and_keywords):
-        return ComplaintAnalysisService(mock_violation_score_repo_existing_score)
+                                                  mock_lemma_vocabulary_repo, mock_nlp_and_keywords):
+        return ComplaintAnalysisService(mock_violation_score_repo_existing_score, mock_lemma_vocabulary_repo)
 
     def test_analyze_complaint_text_keyword_found(self, complaint_analysis_service):
         """Test when the keyword is found in the complaint text."""
@@ -114,27 +144,28 @@ class TestComplaintAnalysisService:
         complaint = Complaint(id="complaint1", description="Це дискримінаційний приклад.")
 
         # Act
-        result_score_obj = complaint_analysis_service_existing_score.update_violation_scores(tender_id, complaint)
+        result_scores = complaint_analysis_service_existing_score.update_violation_scores(tender_id, complaint)
 
         # Assert
-        assert result_score_obj is not None
         expected_score_increase = math.log1p(1)
+        mock_violation_score_repo_existing_score.add_scores.assert_called_once_with(
+            tender_id, {"0": {"score": pytest.approx(expected_score_increase), "keywords": {"дискримінаційний": 1}}}
+        )
 
-        assert result_score_obj.scores["0"]["score"] == pytest.approx(expected_score_increase)
-        assert result_score_obj.scores["0"]["keywords"]["дискримінаційний"] == 1
-
-        mock_violation_score_repo_existing_score.get_by_tender_id.assert_called_once_with(tender_id)
+        assert result_scores["0"]["score"] == pytest.approx(expected_score_increase)
+        assert result_scores["0"]["keywords"]["дискримінаційний"] == 1
+        assert result_scores["1"] == {"score": 0.0, "keywords": {}}
 
         expected_highlights = [{
             "keyword": "дискримінаційний", "domains": ["0"],
             "startPosition": 3, "length": len("дискримінаційний")
         }]
-        mock_violation_score_repo_existing_score.update_complaint_highlighted_keywords.assert_called_once_with(
-            complaint,
-            expected_highlights
-        )
-
-        mock_violation_score_repo_existing_score.flush.assert_called_once()
+        stored, version = mock_violation_score_repo_existing_score.update_complaints_analysis.call_args[0]
+        assert stored[0][0] is complaint
+        assert stored[0][1]["highlighted_keywords"] == expected_highlights
+        assert stored[0][1]["lemmas"] == ["дискримінаційний", "приклад", "це"]
+        assert version == "v2"
+        mock_violation_score_repo_existing_score.get_by_tender_id.assert_not_called()
 
     def test_update_violation_scores_new_score(self, complaint_analysis_service, mock_violation_score_repo):
         """Test creating violation scores when no existing score exists."""
@@ -142,25 +173,252 @@ class TestComplaintAnalysisService:
         complaint = Complaint(id="complaint2", description="Це дискримінаційний приклад.")
 
         # Act
-        result_score_obj = complaint_analysis_service.update_violation_scores(tender_id, complaint)
+        result_scores = complaint_analysis_service.update_violation_scores(tender_id, complaint)
 
         # Assert
-        assert result_score_obj is not None
-        assert result_score_obj.tender_id == tender_id
         expected_score = math.log1p(1)
-        assert result_score_obj.scores["0"]["score"] == pytest.approx(expected_score)
-        assert result_score_obj.scores["0"]["keywords"]["дискримінаційний"] == 1
+        assert result_scores["0"]["score"] == pytest.approx(expected_score)
+        assert result_scores["0"]["keywords"]["дискримінаційний"] == 1
 
-        mock_violation_score_repo.get_by_tender_id.assert_called_once_with(tender_id)
+        mock_violation_score_repo.add_scores.assert_called_once()
 
         expected_highlights = [{
             "keyword": "дискримінаційний", "domains": ["0"],
             "startPosition": 3, "length": len("дискримінаційний")
         }]
-        mock_violation_score_repo.update_complaint_highlighted_keywords.assert_called_once_with(
-            complaint,
-            expected_highlights
-        )
+        stored, version = mock_violation_score_repo.update_complaints_analysis.call_args[0]
+        assert stored[0][0] is complaint
+        assert stored[0][1]["highlighted_keywords"] == expected_highlights
+        assert stored[0][1]["lemmas"] == ["дискримінаційний", "приклад", "це"]
+        assert version == "v2"
+
+    def test_update_violation_scores_no_keywords(self, complaint_analysis_service, mock_violation_score_repo):
+        """Test that a complaint without keywords still creates an empty score row."""
+        complaint = Complaint(id="complaint3", description="Текст без ключових слів.")
+
+        result_scores = complaint_analysis_service.update_violation_scores("tender789", complaint)
+
+        assert result_scores == {}
+        mock_violation_score_repo.add_scores.assert_called_once_with("tender789", {})
+
+    def test_analyze_complaint_texts_preserves_order(self, complaint_analysis_service, mock_nlp_and_keywords):
+        """Test batch analysis through nlp.pipe, including empty texts."""
+        mock_nlp, _ = mock_nlp_and_keywords
+
+        result = complaint_analysis_service.analyze_complaint_texts(
+            ["Текст без ключових слів.", "", "Це дискримінаційний приклад."], batch_size=8)
+
+        assert result[0] == []
+        assert result[1] == []
+        assert result[2] == [{"keyword": "дискримінаційний", "domains": ["0"],
+                              "startPosition": 3, "length": len("дискримінаційний")}]
+        mock_nlp.pipe.assert_called_once()
+        mock_nlp.assert_not_called()
+
+    def test_update_violation_scores_batch_aggregates_per_tender(self, complaint_analysis_service,
+                                                                 mock_violation_score_repo):
+        """Test that complaints of several tenders get one score update per tender."""
+        complaints = [
+            Complaint(id="c1", tender_id="tender_b", description="Це дискримінаційний приклад."),
+            Complaint(id="c2", tender_id="tender_a", description="Текст без ключових слів."),
+            Complaint(id="c3", tender_id="tender_b", description="Це дискримінаційний приклад."),
+        ]
 
+        result = complaint_analysis_service.update_violation_scores_batch(complaints, batch_size=8)
+
+        assert list(result) == ["tender_a", "tender_b"]
+        assert result["tender_a"] == {}
+        assert result["tender_b"]["0"]["score"] == pytest.approx(2 * math.log1p(1))
+        assert result["tender_b"]["0"]["keywords"] == {"дискримінаційний": 2}
+
+        stored, version = mock_violation_score_repo.update_complaints_analysis.call_args[0]
+        assert [c.id for c, _ in stored] == ["c1", "c2", "c3"]
+        assert stored[1][1]["highlighted_keywords"] == []
+        assert stored[1][1]["lemmas"] == ["без", "ключовий", "слово", "текст"]
+        assert version == "v2"
+        assert mock_violation_score_repo.add_scores.call_count == 2
+
+    def test_merge_domain_scores_drops_emptied_keywords_and_domains(self):
+        """Test that negative deltas remove keywords and domains, untouched domains stay."""
+        existing = {
+            "0": {"score": 1.0, "keywords": {"a": 1, "b": 2}},
+            "1": {"score": 0.7, "keywords": {"c": 1}},
+            "2": {"score": 0.0, "keywords": {}},
+        }
+        delta = {
+            "0": {"score": -0.5, "keywords": {"a": -1}},
+            "1": {"score": -0.7, "keywords": {"c": -1}},
+        }
 
-        mock_violation_score_repo.create.assert_called_once_with(result_score_obj)
\ No newline at end of file
+        merged = ComplaintAnalysisService.merge_domain_scores(existing, delta)
+
+        assert merged == {
+            "0": {"score": pytest.approx(0.5), "keywords": {"b": 2}},
+            "2": {"score": 0.0, "keywords": {}},
+        }
+        assert existing["0"]["keywords"] == {"a": 1, "b": 2}
+
+    def test_subtract_domain_scores_omits_unchanged(self):
+        """Test that the delta only holds what changed between two scorings."""
+        old = {"0": {"score": math.log1p(1), "keywords": {"a": 1}}}
+        new = {"0": {"score": math.log1p(1), "keywords": {"a": 1}},
+               "1": {"score": math.log1p(1), "keywords": {"a": 1}}}
+
+        assert ComplaintAnalysisService.subtract_domain_scores(new, old) == {
+            "1": {"score": pytest.approx(math.log1p(1)), "keywords": {"a": 1}}}
+        assert ComplaintAnalysisService.subtract_domain_scores(old, old) == {}
+
+    def test_rescore_complaints_applies_only_the_delta(self, complaint_analysis_service, mock_violation_score_repo):
+        """Test that rescoring replaces a complaint's old contribution to its tender's scores."""
+        old_highlights = [{"keyword": "приклад", "domains": ["1"], "startPosition": 20, "length": 7}]
+        mock_violation_score_repo.add_scores("tender_a", {
+            "0": {"score": math.log1p(1), "keywords": {"дискримінаційний": 1}},
+            "1": {"score": math.log1p(1), "keywords": {"приклад": 1}},
+        })
+        mock_violation_score_repo.add_scores.reset_mock()
+        complaints = [
+            # previously matched "приклад" only, the new keyword set matches "дискримінаційний"
+            Complaint(id="c1", tender_id="tender_a", description="Це дискримінаційний приклад.",
+                      highlighted_keywords=old_highlights),
+            # unchanged, must not touch the tender's scores
+            Complaint(id="c2", tender_id="tender_b", description="Текст без ключових слів.",
+                      highlighted_keywords=[]),
+        ]
+
+        result = complaint_analysis_service.rescore_complaints(complaints)
+
+        assert list(result) == ["tender_a"]
+        assert result["tender_a"] == {
+            "0": {"score": pytest.approx(2 * math.log1p(1)), "keywords": {"дискримінаційний": 2}},
+        }
+        mock_violation_score_repo.add_scores.assert_called_once_with("tender_a", {
+            "0": {"score": pytest.approx(math.log1p(1)), "keywords": {"дискримінаційний": 1}},
+            "1": {"score": pytest.approx(-math.log1p(1)), "keywords": {"приклад": -1}},
+        })
+        stored, version = mock_violation_score_repo.update_complaints_analysis.call_args[0]
+        assert [c.id for c, _ in stored] == ["c1", "c2"]
+        assert stored[0][1]["highlighted_keywords"][0]["keyword"] == "дискримінаційний"
+        assert version == "v2"
+
+    def test_stored_lemma_stream_round_trips(self, complaint_analysis_service, mock_violation_score_repo,
+                                             mock_lemma_vocabulary_repo):
+        """Test that the stored lemma stream decodes back to the analyzed tokens."""
+        complaint = Complaint(id="c1", tender_id="t1", description="Це дискримінаційний приклад.")
+
+        complaint_analysis_service.update_violation_scores("t1", complaint)
+
+        lemma_stream = mock_violation_score_repo.update_complaints_analysis.call_args[0][0][0][1]["lemma_stream"]
+        lemmas_by_id = mock_lemma_vocabulary_repo.get_lemmas(range(100))
+        assert decode_tokens(lemma_stream, lemmas_by_id) == [
+            ("це", 0, 2), ("дискримінаційний", 3, 16), ("приклад", 20, 7), (".", 27, 1)]
+
+    def test_rescore_complaints_from_lemma_stream_skips_model(self, complaint_analysis_service,
+                                                              mock_violation_score_repo, mock_nlp_and_keywords):
+        """Test that complaints with a stored lemma stream are rescored without running spaCy."""
+        mock_nlp, _ = mock_nlp_and_keywords
+        complaint = Complaint(id="c1", tender_id="t1", description="Це дискримінаційний приклад.")
+        complaint_analysis_service.update_violation_scores("t1", complaint)
+        lemma_stream = mock_violation_score_repo.update_complaints_analysis.call_args[0][0][0][1]["lemma_stream"]
+        mock_nlp.reset_mock()
+        mock_violation_score_repo.add_scores.reset_mock()
+
+        stale = Complaint(id="c1", tender_id="t1", description="Це дискримінаційний приклад.",
+                          highlighted_keywords=[], lemma_stream=lemma_stream)
+        complaint_analysis_service.rescore_complaints([stale])
+
+        mock_nlp.assert_not_called()
+        mock_nlp.pipe.assert_not_called()
+        mock_violation_score_repo.add_scores.assert_called_once_with(
+            "t1", {"0": {"score": pytest.approx(math.log1p(1)), "keywords": {"дискримінаційний": 1}}})
+        stored = mock_violation_score_repo.update_complaints_analysis.call_args[0][0]
+        assert stored[0][1]["lemma_stream"] is lemma_stream
+
+    def test_cached_texts_skip_the_model(self, mock_violation_score_repo, mock_lemma_vocabulary_repo,
+                                         mock_nlp_and_keywords, mocker):
+        """Test that cached analyses are reused and only missing texts go through nlp.pipe."""
+        mock_nlp, _ = mock_nlp_and_keywords
+        cached = {"highlighted_keywords": [], "lemmas": ["текст"], "tokens": [("текст", 0, 5)]}
+        cache = MagicMock()
+        cache.get_many.return_value = [cached, None]
+        mocker.patch('signals.ANALYSIS_CACHE', cache)
+        service = ComplaintAnalysisService(mock_violation_score_repo, mock_lemma_vocabulary_repo)
+
+        result = service.analyze_complaints(["Текст", "Це дискримінаційний приклад."])
+
+        assert result[0] is cached
+        assert result[1]["highlighted_keywords"][0]["keyword"] == "дискримінаційний"
+        cache.get_many.assert_called_once_with(["текст", "це дискримінаційний приклад."], "v2")
+        mock_nlp.pipe.assert_called_once()
+        cache.put_many.assert_called_once_with(["це дискримінаційний приклад."], [result[1]], "v2")
+
+    def test_highlighted_html_is_stored_with_the_analysis(self, complaint_analysis_service, mock_violation_score_repo):
+        """Test that the rendered complaint HTML is stored next to its highlights."""
+        complaint = Complaint(id="c1", tender_id="t1", description="Це дискримінаційний приклад.")
+
+        complaint_analysis_service.update_violation_scores("t1", complaint)
+
+        html = mock_violation_score_repo.update_complaints_analysis.call_args[0][0][0][1]["highlighted_html"]
+        assert html.startswith('Це <strong class="complaint-keyword"')
+        assert html.endswith('>дискримінаційний</strong> приклад.')
+
+    def test_topics_are_assigned_in_batch_when_a_topic_model_is_loaded(self, mocker, mock_violation_score_repo,
+                                                                     mock_lemma_vocabulary_repo,
+                                                                     mock_nlp_and_keywords):
+        """Test that each stored complaint gets its dominant topic and weights from the loaded topic model."""
+        vectorizer = make_vectorizer(vectorizer_params(max_df=1.0, min_df=1))
+        dtm = vectorizer.fit_transform(["дискримінаційний приклад", "приклад дискримінаційний",
+                                        "текст ключовий слово", "слово текст"])
+        topic_model = build_topic_model_artifact(vectorizer, NMF(n_components=2, init="nndsvda",
+                                                                 random_state=0).fit(dtm))
+        mocker.patch('signals.TOPIC_MODEL', topic_model)
+        service = ComplaintAnalysisService(mock_violation_score_repo, mock_lemma_vocabulary_repo)
+        complaints = [Complaint(id="c1", tender_id="t1", description="Це дискримінаційний приклад."),
+                      Complaint(id="c2", tender_id="t1", description="Текст без ключових слів.")]
+
+        service.update_violation_scores_batch(complaints)
+
+        stored, _ = mock_violation_score_repo.update_complaints_analysis.call_args[0]
+        topics = [results["topic_id"] for _, results in stored]
+        assert sorted(topics) == [0, 1]
+        assert all(results["topic_model_version"] == topic_model["version"] for _, results in stored)
+        assert all(sum(results["topic_weights"]) == pytest.approx(1.0, abs=1e-3) for _, results in stored)
+
+    def test_no_topic_columns_are_stored_without_a_topic_model(self, complaint_analysis_service,
+                                                              mock_violation_score_repo):
+        """Test that topics assigned earlier are kept when the worker has no topic model."""
+        complaint = Complaint(id="c1", tender_id="t1", description="Це дискримінаційний приклад.")
+
+        complaint_analysis_service.update_violation_scores("t1", complaint)
+
+        results = mock_violation_score_repo.update_complaints_analysis.call_args[0][0][0][1]
+        assert "topic_model_version" not in results
+
+    def test_long_texts_are_analyzed_in_chunks_with_identical_output(self, complaint_analysis_service,
+                                                                     mock_nlp_and_keywords):
+        """Test that chunked analysis keeps the original offsets and highlights."""
+        mock_nlp, _ = mock_nlp_and_keywords
+
+        def tokenize(text):
+            return [MockToken(lemma_=m.group(), idx=m.start(), text=m.group()) for m in re.finditer(r"\w+|[^\w\s]", text)]
+
+        seen_lengths = []
+
+        def pipe(texts, batch_size):
+            for t in texts:
+                seen_lengths.append(len(t))
+                yield tokenize(t)
+
+        mock_nlp.pipe.side_effect = pipe
+        rng = random.Random(3)
+        words = ["дискримінаційний", "приклад", "текст.", "\n\n", "слово"]
+        text = " ".join(rng.choice(words) for _ in range(2000))
+
+        complaint_analysis_service.max_chunk_chars = len(text)
+        whole = complaint_analysis_service.analyze_complaints([text])[0]
+        complaint_analysis_service.max_chunk_chars = 300
+        seen_lengths.clear()
+        chunked = complaint_analysis_service.analyze_complaints([text])[0]
+
+        assert chunked == whole
+        assert len(whole["highlighted_keywords"]) > 100
+        assert len(seen_lengths) > 1 and max(seen_lengths) <= 300
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from repositories.tender_repository import TenderRepository
+from services.complaint_analysis_queue import ComplaintAnalysisQueue
+from services.complaint_backlog_service import ComplaintBacklogService
+from services.datetime_provider import DatetimeProvider
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+class TestComplaintBacklogService:
+
+    @pytest.fixture
+    def mock_tender_repo(self):
+        return MagicMock(spec=TenderRepository)
+
+    @pytest.fixture
+    def mock_queue(self):
+        return MagicMock(spec=ComplaintAnalysisQueue)
+
+    @pytest.fixture
+    def service(self, mock_tender_repo, mock_queue):
+        datetime_provider = MagicMock(spec=DatetimeProvider)
+        datetime_provider.utc_now.return_value = NOW
+        return ComplaintBacklogService(mock_tender_repo, mock_queue, datetime_provider,
+                                       min_age_minutes=30, batch_limit=100, max_sweeps=3)
+
+    def test_sweep_requeues_old_unanalyzed_complaints(self, service, mock_tender_repo, mock_queue):
+        mock_tender_repo.get_unanalyzed_complaint_refs.return_value = [("t1", "c1", 0), ("t2", "c2", 1)]
+
+        assert service.sweep() == 2
+
+        mock_tender_repo.get_unanalyzed_complaint_refs.assert_called_once_with(NOW - timedelta(minutes=30), 100, 3)
+        mock_tender_repo.increment_complaint_analysis_sweeps.assert_called_once_with(["c1", "c2"])
+        mock_queue.push_many.assert_called_once_with([
+            {"tender_id": "t1", "complaint_id": "c1", "attempts": 0},
+            {"tender_id": "t2", "complaint_id": "c2", "attempts": 0},
+        ])
+
+    def test_sweep_logs_complaints_requeued_for_the_last_time(self, service, mock_tender_repo, caplog):
+        mock_tender_repo.get_unanalyzed_complaint_refs.return_value = [("t1", "c1", 1), ("t2", "c2", 2)]
+
+        assert service.sweep() == 2
+
+        given_up = [record.getMessage() for record in caplog.records if record.levelname == "ERROR"]
+        assert len(given_up) == 1 and "c2" in given_up[0]
+
+    def test_sweep_without_backlog_queues_nothing(self, service, mock_tender_repo, mock_queue):
+        mock_tender_repo.get_unanalyzed_complaint_refs.return_value = []
+
+        assert service.sweep() == 0
+        mock_queue.push_many.assert_not_called()
+        mock_tender_repo.increment_complaint_analysis_sweeps.assert_not_called()
+
+    def test_backlog_reports_count_oldest_age_and_queue_length(self, service, mock_tender_repo, mock_queue):
+        mock_tender_repo.get_unanalyzed_complaint_stats.return_value = {
+            "count": 5, "oldest_created_at": NOW - timedelta(hours=2), "abandoned": 1}
+        mock_queue.size.return_value = 3
+
+        assert service.backlog() == {"unanalyzed": 5, "oldest_age_seconds": 7200.0, "abandoned": 1, "queued": 3}
+        mock_tender_repo.get_unanalyzed_complaint_stats.assert_called_once_with(3)
+
+    def test_backlog_is_zero_when_everything_is_analyzed(self, service, mock_tender_repo, mock_queue):
+        mock_tender_repo.get_unanalyzed_complaint_stats.return_value = {"count": 0, "oldest_created_at": None,
+                                                                      "abandoned": 0}
+        mock_queue.size.return_value = 0
+
+        assert service.backlog() == {"unanalyzed": 0, "oldest_age_seconds": 0.0, "abandoned": 0, "queued": 0}
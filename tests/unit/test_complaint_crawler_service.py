@@ -0,0 +1,166 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.complaint_crawler_service import ComplaintCrawlerService
+from services.text_dedup_index import TextDedupIndex
+from services.text_processing_service import TextProcessingService
+
+
+class StubDiscoveryClient:
+    """Serves search pages of OCIDs, a tender's UUID is its OCID with a 'uuid-' prefix."""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def fetch_search_page_tender_ids(self, page, query_params=None):
+        return self.pages(page) if callable(self.pages) else (self.pages[page] if page < len(self.pages) else [])
+
+    def fetch_tender_bridge_info(self, ocid):
+        return None if ocid == "broken" else {"id": f"uuid-{ocid}"}
+
+
+class StubLegacyClient:
+
+    def __init__(self, complaints_by_uuid):
+        self.complaints_by_uuid = complaints_by_uuid
+
+    def fetch_tender_details(self, tender_uuid):
+        complaints = self.complaints_by_uuid(tender_uuid) if callable(self.complaints_by_uuid) \
+            else self.complaints_by_uuid.get(tender_uuid, [])
+        return {"complaints": complaints}
+
+
+class StubCleaner:
+    """Leaves texts as they are."""
+
+    def clean_many(self, texts, batch_size=64, n_process=1):
+        return iter(texts)
+
+
+def complaint(title, description="опис"):
+    return {"title": title, "description": description}
+
+
+class TestComplaintCrawlerService:
+
+    @pytest.fixture
+    def mock_text_processor(self):
+        text_processor = MagicMock(spec=TextProcessingService)
+        text_processor.stored = []
+        text_processor.checkpoints = []
+
+        text_processor.cleaner = StubCleaner()
+
+        def store_cleaned(cleaned_texts, checkpoint_name=None, checkpoint=None):
+            text_processor.stored.extend(cleaned_texts)
+            text_processor.checkpoints.append(checkpoint)
+            return True
+
+        text_processor.store_cleaned.side_effect = store_cleaned
+        return text_processor
+
+    def make_crawler(self, text_processor, pages, complaints, **kwargs):
+        return ComplaintCrawlerService(text_processor, discovery_client=StubDiscoveryClient(pages),
+                                       legacy_client=StubLegacyClient(complaints), fetch_workers=4,
+                                       max_pending=2, clean_batch_size=2, page_delay_seconds=0, **kwargs)
+
+    def test_texts_are_gathered_in_tender_order_without_duplicates(self, mock_text_processor):
+        crawler = self.make_crawler(mock_text_processor, [["t1", "t2"], ["broken", "t3"]], {
+            "uuid-t1": [complaint("перша"), complaint("друга")],
+            "uuid-t2": [complaint("перша")],
+            "uuid-t3": [complaint("третя")],
+        })
+
+        processed = crawler.gather_complaint_claim_texts(max_texts=10)
+
+        assert processed == 3
+        assert mock_text_processor.stored == ["перша опис", "друга опис", "третя опис"]
+
+    def test_gathering_stops_at_max_texts_on_endless_pages(self, mock_text_processor):
+        crawler = self.make_crawler(mock_text_processor, lambda page: [f"p{page}t{i}" for i in range(5)],
+                                    lambda uuid: [complaint(uuid)])
+
+        processed = crawler.gather_complaint_claim_texts(max_texts=7)
+
+        assert processed == 7
+        assert mock_text_processor.stored == [f"uuid-p{page}t{i} опис" for page in (0, 1) for i in range(5)][:7]
+
+    def test_texts_in_dedup_index_are_skipped_and_new_ones_added(self, mock_text_processor, tmp_path):
+        with TextDedupIndex(str(tmp_path / "dedup.sqlite3")) as dedup_index:
+            dedup_index.add_many(["стара опис"])
+            crawler = self.make_crawler(mock_text_processor, [["t1"]],
+                                        {"uuid-t1": [complaint("стара"), complaint("нова")]},
+                                        dedup_index=dedup_index)
+
+            assert crawler.gather_complaint_claim_texts(max_texts=10) == 1
+            assert mock_text_processor.stored == ["нова опис"]
+            assert dedup_index.contains("нова опис")
+
+    def test_stop_keeps_texts_collected_so_far(self, mock_text_processor):
+        crawler = None
+
+        def complaints(uuid):
+            if uuid == "uuid-p0t3":
+                crawler.stop()
+            return [complaint(uuid)]
+
+        crawler = self.make_crawler(mock_text_processor, lambda page: [f"p{page}t{i}" for i in range(5)], complaints)
+
+        processed = crawler.gather_complaint_claim_texts(max_texts=100)
+
+        assert 0 < processed < 100
+        expected = [f"uuid-p{page}t{i} опис" for page in range(20) for i in range(5)]
+        assert mock_text_processor.stored == expected[:processed]
+
+    def test_stop_with_a_full_queue_finishes_the_gathering(self, mock_text_processor):
+        store_cleaned = mock_text_processor.store_cleaned.side_effect
+        crawler = None
+
+        def slow_store_cleaned(*args, **kwargs):
+            # the queue of fetched tenders fills up while the first batch is stored, then the gathering is stopped
+            if not mock_text_processor.stored:
+                time.sleep(0.3)
+                crawler.stop()
+                time.sleep(0.3)
+            return store_cleaned(*args, **kwargs)
+
+        mock_text_processor.store_cleaned.side_effect = slow_store_cleaned
+        crawler = self.make_crawler(mock_text_processor, lambda page: [f"p{page}t{i}" for i in range(5)],
+                                    lambda uuid: [complaint(uuid)])
+        result = {}
+        gathering = threading.Thread(
+            target=lambda: result.update(processed=crawler.gather_complaint_claim_texts(max_texts=10000)),
+            daemon=True)
+        gathering.start()
+        gathering.join(timeout=10)
+
+        assert not gathering.is_alive()
+        assert result["processed"] == len(mock_text_processor.stored) > 0
+
+    def test_checkpoint_covers_last_fully_stored_tender(self, mock_text_processor):
+        crawler = self.make_crawler(mock_text_processor, [["t1", "t2"]], {
+            "uuid-t1": [complaint("перша")],
+            "uuid-t2": [complaint("друга"), complaint("третя")],
+        })
+
+        crawler.gather_complaint_claim_texts(max_texts=2)
+
+        # t2 was cut short by max_texts, a resumed run fetches it again
+        assert mock_text_processor.checkpoints[-1] == {"page": 0, "index": 0, "ocid": "t1", "texts_processed": 2}
+
+    def test_resume_continues_after_checkpoint_tender(self, mock_text_processor):
+        crawler = self.make_crawler(mock_text_processor, [["t1", "t2"], ["t3"]], {
+            "uuid-t1": [complaint("перша")],
+            "uuid-t2": [complaint("друга")],
+            "uuid-t3": [complaint("третя")],
+        })
+
+        processed = crawler.gather_complaint_claim_texts(
+            max_texts=10, resume_from={"page": 0, "index": 0, "ocid": "t1", "texts_processed": 5})
+
+        assert processed == 2
+        assert mock_text_processor.stored == ["друга опис", "третя опис"]
+        assert mock_text_processor.checkpoints[-1] == {"page": 1, "index": 0, "ocid": "t3", "texts_processed": 7}
@@ -0,0 +1,34 @@
+from util.complaint_text_render import render_highlighted_html, process_complaint_text
+
+FIELD_MAP = {"0": "Дискримінація", "1": "Ціна"}
+
+
+class TestComplaintTextRender:
+
+    def test_render_highlighted_html(self):
+        text = "Ціна <b>висока</b> & дискримінація"
+        highlights = [
+            {"keyword": "дискримінація", "domains": ["0"], "startPosition": 21, "length": 13},
+            {"keyword": "ціна", "domains": ["1", "7"], "startPosition": 0, "length": 4},
+        ]
+
+        html = render_highlighted_html(text, highlights, FIELD_MAP)
+
+        assert html == (
+            '<strong class="complaint-keyword" data-bs-toggle="tooltip" title="Ціна, Unknown">Ціна</strong>'
+            ' &lt;b&gt;висока&lt;/b&gt; &amp; '
+            '<strong class="complaint-keyword" data-bs-toggle="tooltip" title="Дискримінація">дискримінація</strong>'
+        )
+        assert process_complaint_text(text, highlights, FIELD_MAP) == html
+
+    def test_overlapping_and_out_of_range_highlights_are_skipped(self):
+        highlights = [
+            {"keyword": "ab", "domains": ["0"], "startPosition": 0, "length": 2},
+            {"keyword": "b", "domains": ["0"], "startPosition": 1, "length": 1},
+            {"keyword": "zz", "domains": ["0"], "startPosition": 10, "length": 2},
+        ]
+
+        html = render_highlighted_html("abc", highlights, FIELD_MAP)
+
+        assert html.count("<strong") == 1
+        assert html.endswith("</strong>c")
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from exceptions import CorpusWatermarkMismatchError
+from repositories.tender_repository import TenderRepository
+from services.corpus_export_service import CorpusExportService
+from services.text_dedup_index import TextDedupIndex
+from services.text_processing_service import TextProcessingService
+
+FILTERS = {"date_from": None, "date_to": None, "statuses": None, "general_classifier_id": None}
+
+
+class StubCleaner:
+    """Leaves texts as they are."""
+
+    def clean_many(self, texts, batch_size=64, n_process=1):
+        return iter(texts)
+
+
+def complaint_row(complaint_id, title, description="desc", created_at=None):
+    return SimpleNamespace(id=complaint_id,
+                           created_at=created_at or datetime(2026, 1, complaint_id, tzinfo=timezone.utc),
+                           title=title, description=description)
+
+
+def watermark(complaint_id, texts_processed, filters=FILTERS):
+    created_at = f"2026-01-{complaint_id:02d}T00:00:00+00:00"
+    return {"created_at": created_at, "recent_complaints": [[complaint_id, created_at]], "filters": filters,
+            "texts_processed": texts_processed}
+
+
+class TestCorpusExportService:
+
+    @pytest.fixture
+    def mock_tender_repo(self):
+        return MagicMock(spec=TenderRepository)
+
+    @pytest.fixture
+    def mock_text_processor(self):
+        processor = MagicMock(spec=TextProcessingService)
+        processor.get_checkpoint.return_value = None
+        processor.cleaner = StubCleaner()
+        processor.store_cleaned.return_value = True
+        return processor
+
+    @pytest.fixture
+    def dedup_index(self, tmp_path):
+        with TextDedupIndex(str(tmp_path / "dedup.sqlite3")) as index:
+            yield index
+
+    @pytest.fixture
+    def service(self, mock_tender_repo, mock_text_processor, dedup_index):
+        return CorpusExportService(mock_tender_repo, mock_text_processor, dedup_index)
+
+    def test_export_processes_batches_and_commits_watermarks(self, service, mock_tender_repo, mock_text_processor):
+        mock_tender_repo.iter_complaint_texts.return_value = iter(
+            [complaint_row(1, "a"), complaint_row(2, "b"), complaint_row(3, "c")])
+
+        assert service.export(batch_size=2) == 3
+
+        mock_tender_repo.iter_complaint_texts.assert_called_once_with(
+            created_since=None, date_from=None, date_to=None, statuses=None, general_classifier_id=None, batch_size=2)
+        calls = mock_text_processor.store_cleaned.call_args_list
+        assert [c.args[0] for c in calls] == [["a desc", "b desc"], ["c desc"]]
+        assert calls[-1].kwargs["checkpoint_name"] == CorpusExportService.CHECKPOINT_NAME
+        assert calls[-1].kwargs["checkpoint"] == watermark(3, 3)
+
+    def test_export_continues_after_the_stored_watermark(self, service, mock_tender_repo, mock_text_processor):
+        mock_text_processor.get_checkpoint.return_value = watermark(2, 2)
+        mock_tender_repo.iter_complaint_texts.return_value = iter([complaint_row(3, "c")])
+
+        assert service.export() == 1
+
+        assert mock_tender_repo.iter_complaint_texts.call_args.kwargs["created_since"] == (
+            datetime(2026, 1, 2, tzinfo=timezone.utc) - CorpusExportService.DEFAULT_SAFETY_WINDOW)
+        assert mock_text_processor.store_cleaned.call_args.kwargs["checkpoint"]["texts_processed"] == 3
+
+    def test_complaints_committed_after_the_watermark_are_read_from_the_safety_window(
+            self, service, mock_tender_repo, mock_text_processor):
+        mock_text_processor.get_checkpoint.return_value = watermark(2, 2)
+        late_created_at = datetime(2026, 1, 2, tzinfo=timezone.utc) - timedelta(minutes=10)
+        # the repository returns the window again: complaint 2 was exported, complaint 9 committed late
+        mock_tender_repo.iter_complaint_texts.return_value = iter(
+            [complaint_row(9, "late", created_at=late_created_at), complaint_row(2, "b"), complaint_row(3, "c")])
+
+        assert service.export() == 2
+
+        assert mock_text_processor.store_cleaned.call_args.args[0] == ["late desc", "c desc"]
+        assert mock_text_processor.store_cleaned.call_args.kwargs["checkpoint"] == watermark(3, 4)
+
+    def test_full_export_ignores_the_watermark(self, service, mock_tender_repo, mock_text_processor):
+        mock_text_processor.get_checkpoint.return_value = watermark(2, 2)
+        mock_tender_repo.iter_complaint_texts.return_value = iter([])
+
+        assert service.export(full=True) == 0
+        assert mock_tender_repo.iter_complaint_texts.call_args.kwargs["created_since"] is None
+
+    def test_export_with_other_filters_than_the_watermark_fails(self, service, mock_tender_repo,
+                                                                 mock_text_processor):
+        mock_text_processor.get_checkpoint.return_value = watermark(2, 2)
+
+        with pytest.raises(CorpusWatermarkMismatchError):
+            service.export(statuses=["satisfied"])
+        mock_tender_repo.iter_complaint_texts.assert_not_called()
+
+    def test_export_skips_texts_already_in_the_corpus(self, service, mock_tender_repo, mock_text_processor,
+                                                      dedup_index):
+        dedup_index.add_many(["a desc"])
+        mock_tender_repo.iter_complaint_texts.return_value = iter(
+            [complaint_row(1, "a"), complaint_row(2, "B"), complaint_row(3, "b")])
+
+        assert service.export() == 1
+
+        assert mock_text_processor.store_cleaned.call_args.args[0] == ["B desc"]
+        assert dedup_index.contains("b desc")
+
+    def test_export_skips_repeats_of_batches_still_being_cleaned(self, service, mock_tender_repo,
+                                                                 mock_text_processor):
+        mock_tender_repo.iter_complaint_texts.return_value = iter(
+            [complaint_row(1, "a"), complaint_row(2, "a"), complaint_row(3, "b")])
+
+        assert service.export(batch_size=1) == 2
+
+        assert [c.args[0] for c in mock_text_processor.store_cleaned.call_args_list] == [["a desc"], [], ["b desc"]]
+
+    def test_export_stops_when_a_batch_is_not_stored(self, service, mock_tender_repo,
+                                                     mock_text_processor, dedup_index):
+        mock_text_processor.store_cleaned.side_effect = [True, False, True]
+        mock_tender_repo.iter_complaint_texts.return_value = iter(
+            [complaint_row(1, "a"), complaint_row(2, "b"), complaint_row(3, "c")])
+
+        assert service.export(batch_size=1) == 1
+
+        assert mock_text_processor.store_cleaned.call_count == 2
+        assert dedup_index.contains("a desc")
+        assert not dedup_index.contains("b desc")
+
+    def test_export_stops_when_a_batch_cannot_be_cleaned(self, service, mock_tender_repo, mock_text_processor):
+        mock_text_processor.cleaner = MagicMock()
+        mock_text_processor.cleaner.clean_many.side_effect = ValueError("spaCy failed")
+        mock_tender_repo.iter_complaint_texts.return_value = iter([complaint_row(1, "a")])
+
+        assert service.export() == 0
+        mock_text_processor.store_cleaned.assert_not_called()
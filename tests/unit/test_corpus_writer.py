@@ -0,0 +1,74 @@
+import gzip
+import json
+
+from services.corpus_writer import CorpusWriter
+from util.corpus_shards import iter_corpus_lines
+
+
+class TestCorpusWriter:
+
+    def test_write_many_rolls_over_full_files(self, tmp_path):
+        with CorpusWriter(str(tmp_path), max_lines_per_file=2) as writer:
+            written = writer.write_many(["один", "", "два", "три"])
+
+        assert written == 3
+        assert (tmp_path / "corpus_0000.txt").read_text(encoding="utf-8") == "один\nдва\n"
+        assert (tmp_path / "corpus_0001.txt").read_text(encoding="utf-8") == "три\n"
+
+    def test_lines_are_buffered_until_flush(self, tmp_path):
+        writer = CorpusWriter(str(tmp_path), buffer_lines=3)
+
+        writer.write("один")
+        writer.write("два")
+        assert not (tmp_path / "corpus_0000.txt").exists()
+
+        writer.write("три")
+        assert (tmp_path / "corpus_0000.txt").read_text(encoding="utf-8") == "один\nдва\nтри\n"
+
+    def test_manifest_records_lines_and_checksums(self, tmp_path):
+        with CorpusWriter(str(tmp_path), max_lines_per_file=2, compression="gzip", buffer_lines=1) as writer:
+            writer.write_many(["один", "два", "три"])
+
+        manifest = json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))
+        assert [(s["file"], s["lines"]) for s in manifest["shards"]] == [
+            ("corpus_0000.txt.gz", 2), ("corpus_0001.txt.gz", 1)]
+        assert gzip.decompress((tmp_path / "corpus_0000.txt.gz").read_bytes()) == "один\nдва\n".encode("utf-8")
+        assert list(iter_corpus_lines(tmp_path)) == ["один", "два", "три"]
+
+    def test_restart_continues_in_a_new_shard(self, tmp_path):
+        with CorpusWriter(str(tmp_path), max_lines_per_file=3) as writer:
+            writer.write("один")
+
+        with CorpusWriter(str(tmp_path), max_lines_per_file=3) as writer:
+            assert writer.line_count == 1
+            writer.write("два")
+
+        assert (tmp_path / "corpus_0001.txt").read_text(encoding="utf-8") == "два\n"
+        assert list(iter_corpus_lines(tmp_path)) == ["один", "два"]
+
+    def test_restart_truncates_bytes_missing_from_manifest(self, tmp_path):
+        with CorpusWriter(str(tmp_path)) as writer:
+            writer.write("один")
+        with open(tmp_path / "corpus_0000.txt", "a", encoding="utf-8") as f:
+            f.write("недописаний")
+
+        CorpusWriter(str(tmp_path))
+
+        assert (tmp_path / "corpus_0000.txt").read_text(encoding="utf-8") == "один\n"
+
+    def test_shards_without_manifest_are_adopted(self, tmp_path):
+        (tmp_path / "corpus_0000.txt").write_text("один\nдва\n", encoding="utf-8")
+
+        writer = CorpusWriter(str(tmp_path))
+
+        assert writer.line_count == 2
+        assert writer.current_file_path.name == "corpus_0001.txt"
+        assert json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))["shards"][0]["lines"] == 2
+
+    def test_checkpoint_is_committed_with_flush_and_restored(self, tmp_path):
+        with CorpusWriter(str(tmp_path), buffer_lines=10) as writer:
+            writer.write("один")
+            writer.set_checkpoint("crawler", {"page": 3, "ocid": "UA-1"})
+            assert not (tmp_path / "manifest.json").exists()
+
+        assert CorpusWriter(str(tmp_path)).get_checkpoint("crawler") == {"page": 3, "ocid": "UA-1"}
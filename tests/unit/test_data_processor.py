@@ -5,6 +5,7 @@ import pytest
 
 from models import Tender, TenderChange, Bid, BidChange, Award, Complaint, TenderDocument  # Add other models as needed
 from repositories.tender_repository import TenderRepository
+from services.complaint_analysis_queue import ComplaintAnalysisQueue
 from services.data_processor import DataProcessor
 from schemas.tender_schema import TenderSchema
 from schemas.bid_schema import BidSchema
@@ -163,7 +164,8 @@ class TestDataProcessor:
     def setup_mocks(self):
         """Setup mocks used in most tests"""
         self.mock_repo = MagicMock(spec=TenderRepository)
-        self.processor = DataProcessor(tender_repo=self.mock_repo)
+        self.mock_queue = MagicMock(spec=ComplaintAnalysisQueue)
+        self.processor = DataProcessor(tender_repo=self.mock_repo, analysis_queue=self.mock_queue)
 
         self.processor.legacy_client = MagicMock()
 
@@ -501,4 +503,54 @@ class TestDataProcessor:
         assert gc_id_change.new_value == str(new_gc_id)
         assert gc_id_change.tender_id == tender_uuid
         assert gc_id_change.change_date == date_modified_from_discovery
-        self.mock_repo.commit.assert_called_once()
\ No newline at end of file
+        self.mock_repo.commit.assert_called_once()
+
+    def test_new_complaints_are_queued_for_batch_analysis(self, mock_analyze_task):
+        """Verify that new complaints go to the NLP batch queue instead of per-complaint tasks."""
+        self.processor._new_complaint_ids = ["complaint-1", "complaint-2"]
+
+        self.processor._enqueue_complaint_analysis("tender-uuid")
+
+        self.mock_queue.push_many.assert_called_once_with([
+            {"tender_id": "tender-uuid", "complaint_id": "complaint-1", "attempts": 0},
+            {"tender_id": "tender-uuid", "complaint_id": "complaint-2", "attempts": 0},
+        ])
+        mock_analyze_task.apply_async.assert_not_called()
+
+    def test_new_complaints_of_high_priority_tender_get_dedicated_tasks(self, mock_analyze_task):
+        """Verify that user-requested tenders bypass the batch queue."""
+        self.processor.high_priority = True
+        self.processor._new_complaint_ids = ["complaint-1"]
+
+        self.processor._enqueue_complaint_analysis("tender-uuid")
+
+        self.mock_queue.push_many.assert_not_called()
+        mock_analyze_task.apply_async.assert_called_once_with(
+            args=("tender-uuid", "complaint-1"), queue='default', priority=5)
+
+    def test_queue_failure_falls_back_to_tasks(self, mock_analyze_task):
+        """Verify that complaints are not lost when the batch queue is unavailable."""
+        self.mock_queue.push_many.side_effect = ConnectionError("redis down")
+        self.processor._new_complaint_ids = ["complaint-1"]
+
+        self.processor._enqueue_complaint_analysis("tender-uuid")
+
+        mock_analyze_task.apply_async.assert_called_once_with(
+            args=("tender-uuid", "complaint-1"), queue='default', priority=0)
+
+    @patch('services.data_processor.rescore_complaints_task')
+    def test_changed_description_invalidates_analysis(self, mock_rescore_task, mock_analyze_task):
+        """Verify that a changed description drops stale analysis results and schedules a rescore."""
+        analyzed = MockComplaint(id="complaint-1", description="old", highlighted_keywords=[],
+                                 highlighted_html="old", lemma_stream=b"old", keyword_set_version="v1")
+        pending = MockComplaint(id="complaint-2", description="old", highlighted_keywords=None)
+
+        self.processor._invalidate_complaint_analysis(analyzed)
+        self.processor._invalidate_complaint_analysis(pending)
+        self.processor._enqueue_complaint_analysis("tender-uuid")
+
+        assert analyzed.highlighted_html is None
+        assert analyzed.lemma_stream is None
+        assert analyzed.keyword_set_version is None
+        mock_rescore_task.apply_async.assert_called_once_with(args=(["complaint-1"], None), queue='default')
+        self.mock_queue.push_many.assert_not_called()
@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from services.corpus_writer import CorpusWriter
+from topic_modeling import dtm_cache
+from topic_modeling.dtm_cache import load_dtm, vectorizer_params
+from util.corpus_shards import read_manifest
+
+DOCUMENTS = ["скарга тендер замовник", "замовник відхилити пропозиція", "тендер пропозиція скарга",
+             "учасник скарга замовник"]
+
+
+class TestDtmCache:
+
+    @pytest.fixture
+    def corpus_dir(self, tmp_path):
+        with CorpusWriter(str(tmp_path / "corpus"), compression="gzip") as writer:
+            writer.write_many(DOCUMENTS)
+        return tmp_path / "corpus"
+
+    def test_count_dtm_matches_vocabulary(self, corpus_dir):
+        dtm, feature_names = load_dtm(corpus_dir, vectorizer_params(max_df=1.0, min_df=2))
+
+        assert dtm.shape == (4, 4)
+        assert list(feature_names) == ["замовник", "пропозиція", "скарга", "тендер"]
+        assert dtm[:, list(feature_names).index("скарга")].sum() == 3
+
+    def test_cached_dtm_is_reused_without_vectorizing(self, corpus_dir):
+        params = vectorizer_params(max_df=1.0, min_df=1)
+        dtm, feature_names = load_dtm(corpus_dir, params)
+
+        with patch.object(dtm_cache, "build_dtm") as build_dtm:
+            cached_dtm, cached_feature_names = load_dtm(corpus_dir, params)
+
+        build_dtm.assert_not_called()
+        assert (cached_dtm != dtm).nnz == 0
+        assert list(cached_feature_names) == list(feature_names)
+
+    def test_changed_corpus_or_params_rebuild_the_dtm(self, corpus_dir):
+        params = vectorizer_params(max_df=1.0, min_df=1)
+        load_dtm(corpus_dir, params)
+
+        dtm, _ = load_dtm(corpus_dir, vectorizer_params(max_df=1.0, min_df=1, stop_words=["тендер"]))
+        assert dtm.shape == (4, 5)
+
+        with CorpusWriter(str(corpus_dir), compression="gzip") as writer:
+            writer.write("новий документ")
+        dtm, _ = load_dtm(corpus_dir, params)
+        assert dtm.shape == (5, 8)
+
+    def test_dtm_only_holds_the_lines_of_the_given_manifest(self, corpus_dir):
+        params = vectorizer_params(max_df=1.0, min_df=1)
+        manifest = read_manifest(corpus_dir)
+        with CorpusWriter(str(corpus_dir), compression="gzip") as writer:
+            writer.write("новий документ")
+
+        dtm, _ = load_dtm(corpus_dir, params, manifest=manifest)
+        assert dtm.shape[0] == 4
+
+        # the DTM of the snapshot is not served for the grown corpus
+        dtm, _ = load_dtm(corpus_dir, params)
+        assert dtm.shape[0] == 5
+
+    def test_hashing_dtm_keeps_columns_and_drops_rare_terms(self, corpus_dir):
+        dtm, feature_names = load_dtm(corpus_dir, vectorizer_params(max_df=1.0, min_df=2, hashing=True,
+                                                                    n_features=2 ** 10))
+
+        assert feature_names is None
+        assert dtm.shape == (4, 2 ** 10)
+        assert (dtm.data > 0).all()
+        # "учасник" and "відхилити" occur once, the other four terms are kept
+        assert np.count_nonzero(np.asarray(dtm.sum(axis=0)).ravel()) == 4
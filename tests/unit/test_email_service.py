@@ -0,0 +1,142 @@
+import socketserver
+import threading
+
+import pytest
+
+from services.email_service import EmailService
+
+
+class SmtpStubHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server: accepts AUTH PLAIN, records every message it receives."""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        stub = self.server.stub
+        stub.connections += 1
+        self._reply("220 stub ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self._reply("250-stub")
+                self._reply("250 AUTH PLAIN")
+            elif verb == "AUTH":
+                if stub.reject_logins:
+                    self._reply("535 authentication failed")
+                    continue
+                stub.logins += 1
+                self._reply("235 authenticated")
+            elif verb in ("MAIL", "RCPT", "RSET"):
+                self._reply("250 ok")
+            elif verb == "NOOP":
+                self._reply("250 ok")
+            elif verb == "DATA":
+                self._reply("354 go ahead")
+                data = b""
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk == b".\r\n":
+                        break
+                    data += chunk
+                stub.messages.append(data)
+                self._reply("250 queued")
+                if stub.drop_after_messages and len(stub.messages) >= stub.drop_after_messages:
+                    stub.drop_after_messages = None
+                    stub.reject_logins = stub.reject_logins_after_drop
+                    return
+            elif verb == "QUIT":
+                self._reply("221 bye")
+                return
+            else:
+                self._reply("502 not implemented")
+
+
+class SmtpStub:
+    def __init__(self):
+        self.connections = 0
+        self.logins = 0
+        self.messages = []
+        self.drop_after_messages = None
+        self.reject_logins = False
+        self.reject_logins_after_drop = False
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SmtpStubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestEmailService:
+
+    @pytest.fixture
+    def smtp_stub(self):
+        stub = SmtpStub()
+        yield stub
+        stub.stop()
+
+    @pytest.fixture
+    def email_service(self, smtp_stub):
+        service = EmailService(smtp_server="127.0.0.1", port=smtp_stub.port,
+                               sender_email="sender@example.com", password="secret", use_tls=False)
+        yield service
+        service.close()
+
+    def test_send_batch_reuses_single_connection(self, email_service, smtp_stub):
+        """Test that consecutive batches share one authenticated connection."""
+        failed, unsent = email_service.send_batch(["user1@example.com", "user2@example.com"], "Тема", "<p>Звіт</p>")
+        assert (failed, unsent) == ([], [])
+        failed, unsent = email_service.send_batch(["user3@example.com"], "Тема", "<p>Звіт 2</p>")
+
+        assert (failed, unsent) == ([], [])
+        assert len(smtp_stub.messages) == 3
+        assert smtp_stub.connections == 1
+        assert smtp_stub.logins == 1
+
+    def test_send_batch_only_changes_recipient_header(self, email_service, smtp_stub):
+        """Test that the body is encoded once per batch and only the 'To' header differs."""
+        email_service.send_batch(["user1@example.com", "user2@example.com"], "Тема", "<p>Звіт</p>")
+
+        first, second = smtp_stub.messages
+        assert first.startswith(b"To: user1@example.com\r\n")
+        assert second.startswith(b"To: user2@example.com\r\n")
+        assert first.split(b"\r\n", 1)[1] == second.split(b"\r\n", 1)[1]
+
+    def test_reconnects_after_server_drops_connection(self, email_service, smtp_stub):
+        """Test that a dropped connection is detected by the health check and re-established."""
+        smtp_stub.drop_after_messages = 1
+        email_service.send_batch(["user1@example.com"], "Тема", "<p>Звіт</p>")
+
+        failed, unsent = email_service.send_batch(["user2@example.com"], "Тема", "<p>Звіт</p>")
+
+        assert (failed, unsent) == ([], [])
+        assert len(smtp_stub.messages) == 2
+        assert smtp_stub.connections == 2
+
+    def test_failed_reconnect_mid_batch_returns_the_unsent_recipients(self, email_service, smtp_stub):
+        """Test that recipients delivered to before the connection was lost are not returned for a retry."""
+        smtp_stub.drop_after_messages = 1
+        smtp_stub.reject_logins_after_drop = True
+
+        failed, unsent = email_service.send_batch(["user1@example.com", "user2@example.com", "user3@example.com"],
+                                                  "Тема", "<p>Звіт</p>")
+
+        assert failed == []
+        assert unsent == ["user2@example.com", "user3@example.com"]
+        assert len(smtp_stub.messages) == 1
+        assert email_service.server is None
+
+    def test_missing_credentials(self, smtp_stub):
+        service = EmailService(smtp_server="127.0.0.1", port=smtp_stub.port,
+                               sender_email="", password="", use_tls=False)
+        with pytest.raises(RuntimeError):
+            service.send_batch(["user1@example.com"], "Тема", "<p>Звіт</p>")
@@ -0,0 +1,47 @@
+import pytest
+
+from services.keyword_matcher import KeywordMatcher
+
+
+class TestKeywordMatcher:
+
+    @pytest.fixture
+    def matcher(self):
+        return KeywordMatcher({
+            "0": ["закупівля", "учасник", "тендерний документація"],
+            "1": ["учасник", "договір"],
+        })
+
+    def test_single_lemma_match(self, matcher):
+        tokens = [("це", 0, 2), ("договір", 3, 8), (".", 11, 1)]
+
+        assert matcher.match(tokens) == [
+            {"keyword": "договір", "domains": ["1"], "startPosition": 3, "length": 8}
+        ]
+
+    def test_lemma_in_several_domains(self, matcher):
+        tokens = [("учасник", 0, 9)]
+
+        result = matcher.match(tokens)
+
+        assert len(result) == 1
+        assert result[0]["domains"] == ["0", "1"]
+
+    def test_phrase_match_spans_all_tokens(self, matcher):
+        tokens = [("тендерний", 0, 9), ("документація", 10, 12), ("закупівля", 23, 9)]
+
+        result = matcher.match(tokens)
+
+        assert {"keyword": "тендерний документація", "domains": ["0"],
+                "startPosition": 0, "length": 22} in result
+        assert {"keyword": "закупівля", "domains": ["0"], "startPosition": 23, "length": 9} in result
+        assert len(result) == 2
+
+    def test_partial_phrase_does_not_match(self, matcher):
+        assert matcher.match([("тендерний", 0, 9), ("закупівля", 10, 9)]) == [
+            {"keyword": "закупівля", "domains": ["0"], "startPosition": 10, "length": 9}
+        ]
+        assert matcher.match([("тендерний", 0, 9)]) == []
+
+    def test_lemmas(self, matcher):
+        assert matcher.lemmas == {"закупівля", "учасник", "тендерний", "документація", "договір"}
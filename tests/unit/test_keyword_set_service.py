@@ -0,0 +1,147 @@
+import pytest
+from collections import namedtuple
+from unittest.mock import MagicMock, patch
+
+from models import KeywordSet
+from repositories.keyword_set_repository import KeywordSetRepository
+from repositories.tender_repository import TenderRepository
+from services.keyword_set_service import KeywordSetService
+from util.keyword_sets import compute_keyword_set_version, diff_keyword_sets, affected_lemmas, \
+    build_keyword_artifact, write_keyword_artifact, load_keyword_artifact
+
+MockToken = namedtuple('MockToken', ['lemma_'])
+
+
+class TestKeywordSets:
+
+    def test_version_ignores_key_order(self):
+        assert compute_keyword_set_version({"0": ["a"], "1": ["b"]}) == \
+               compute_keyword_set_version({"1": ["b"], "0": ["a"]})
+        assert compute_keyword_set_version({"0": ["a"]}) != compute_keyword_set_version({"0": ["b"]})
+
+    def test_diff_and_affected_lemmas(self):
+        old = {"0": ["ціна", "висока ціна"], "1": ["строк"]}
+        new = {"0": ["ціна"], "1": ["строк", "ціна"], "2": ["дискримінація"]}
+
+        diff = diff_keyword_sets(old, new)
+
+        assert diff == {"added": ["дискримінація"], "removed": ["висока ціна"], "changed": ["ціна"]}
+        assert affected_lemmas(diff) == ["висока", "дискримінація", "ціна"]
+
+    def test_keyword_artifact_round_trip(self, tmp_path):
+        nlp = MagicMock(side_effect=lambda word: [MockToken(lemma_=w.rstrip("і")) for w in word.split()])
+        keywords = {"0": ["ціні", "високі ціні"]}
+        path = str(tmp_path / "keywords.lemmatized.json")
+
+        write_keyword_artifact(build_keyword_artifact(nlp, "uk_core_news_sm", keywords), path)
+        artifact = load_keyword_artifact(path, keywords, "uk_core_news_sm")
+
+        assert artifact["lemmatized_keywords"] == {"0": ["цін", "висок цін"]}
+        assert artifact["keyword_set_version"] == compute_keyword_set_version(keywords)
+        assert load_keyword_artifact(path, {"0": ["ціні"]}, "uk_core_news_sm") is None
+        with patch("spacy.util.get_package_version", return_value="9.9.9"):
+            assert load_keyword_artifact(path, keywords, "uk_core_news_sm") is None
+        assert load_keyword_artifact(str(tmp_path / "missing.json"), keywords, "uk_core_news_sm") is None
+
+
+class InMemoryComplaints:
+    """The complaint queries of TenderRepository over {id: (lemmas, keyword set version)}."""
+
+    def __init__(self, complaints):
+        self.complaints = {complaint_id: list(values) for complaint_id, values in complaints.items()}
+
+    def get_complaint_ids_with_lemmas(self, lemmas, exclude_version=None):
+        return sorted(complaint_id for complaint_id, (complaint_lemmas, version) in self.complaints.items()
+                      if set(complaint_lemmas) & set(lemmas) and version != exclude_version)
+
+    def get_complaint_ids_not_at_versions(self, versions):
+        return sorted(complaint_id for complaint_id, (_, version) in self.complaints.items()
+                      if version not in versions)
+
+    def advance_keyword_set_version(self, from_version, to_version, changed_lemmas):
+        advanced = [values for values in self.complaints.values()
+                    if values[1] == from_version and not set(values[0]) & set(changed_lemmas)]
+        for values in advanced:
+            values[1] = to_version
+        return len(advanced)
+
+    def rescore(self, complaint_ids, version):
+        for complaint_id in complaint_ids:
+            self.complaints[complaint_id][1] = version
+
+
+class TestKeywordSetService:
+
+    @pytest.fixture
+    def keyword_set_repo(self):
+        return MagicMock(spec=KeywordSetRepository)
+
+    @pytest.fixture
+    def tender_repo(self):
+        return MagicMock(spec=TenderRepository)
+
+    @pytest.fixture
+    def service(self, keyword_set_repo, tender_repo):
+        return KeywordSetService(keyword_set_repo, tender_repo)
+
+    def test_register_first_set_has_no_diff(self, service, keyword_set_repo):
+        keyword_set_repo.get_by_version.return_value = None
+        keyword_set_repo.get_latest.return_value = None
+
+        keyword_set, created = service.register({"0": ["ціна"]}, {"0": ["ціна"]})
+
+        assert created
+        assert keyword_set.parent_version is None
+        assert keyword_set.diff is None
+        keyword_set_repo.create.assert_called_once_with(keyword_set)
+
+    def test_register_diffs_against_latest(self, service, keyword_set_repo):
+        keyword_set_repo.get_by_version.return_value = None
+        keyword_set_repo.get_latest.return_value = KeywordSet(version="old", lemmatized_keywords={"0": ["ціна"]})
+
+        keyword_set, created = service.register({"0": ["строк"]}, {"0": ["строк"]})
+
+        assert created
+        assert keyword_set.parent_version == "old"
+        assert keyword_set.diff == {"added": ["строк"], "removed": ["ціна"], "changed": []}
+
+    def test_register_existing_version_is_reused(self, service, keyword_set_repo):
+        existing = KeywordSet(version=compute_keyword_set_version({"0": ["ціна"]}))
+        keyword_set_repo.get_by_version.return_value = existing
+
+        keyword_set, created = service.register({"0": ["ціна"]}, {"0": ["ціна"]})
+
+        assert keyword_set is existing
+        assert not created
+        keyword_set_repo.create.assert_not_called()
+
+    def test_find_affected_complaint_ids(self, service, tender_repo):
+        tender_repo.get_complaint_ids_with_lemmas.return_value = ["c2", "c1"]
+        tender_repo.get_complaint_ids_not_at_versions.return_value = ["c3", "c1"]
+        keyword_set = KeywordSet(version="new", parent_version="old",
+                                 diff={"added": ["висока ціна"], "removed": [], "changed": []})
+
+        assert service.find_affected_complaint_ids(keyword_set) == ["c1", "c2", "c3"]
+        tender_repo.get_complaint_ids_with_lemmas.assert_called_once_with(["висока", "ціна"], exclude_version="new")
+        tender_repo.get_complaint_ids_not_at_versions.assert_called_once_with(["new", "old"])
+
+    def test_only_complaints_touched_by_each_diff_are_rescored(self, keyword_set_repo):
+        complaints = InMemoryComplaints({
+            "c1": (["ціна"], "A"), "c2": (["строк"], "A"), "c3": (["документ"], "A"), "c4": (["гарантія"], "A")})
+        service = KeywordSetService(keyword_set_repo, complaints)
+        keyword_set_repo.get_by_version.return_value = None
+        sets = [{"0": ["ціна", "строк"]}, {"0": ["ціна", "строк", "документ"]},
+                {"0": ["ціна", "строк", "документ", "гарантія"]}]
+        keyword_set_repo.get_latest.return_value = KeywordSet(version="A", lemmatized_keywords=sets[0])
+
+        rescored = []
+        for keywords in sets[1:]:
+            keyword_set, _ = service.register(keywords, keywords)
+            complaint_ids = service.find_affected_complaint_ids(keyword_set)
+            service.advance_unaffected_complaints(keyword_set)
+            complaints.rescore(complaint_ids, keyword_set.version)
+            rescored.append(complaint_ids)
+            keyword_set_repo.get_latest.return_value = keyword_set
+
+        assert rescored == [["c3"], ["c4"]]
+        assert {version for _, version in complaints.complaints.values()} == {keyword_set.version}
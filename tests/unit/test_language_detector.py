@@ -0,0 +1,40 @@
+from unittest.mock import patch
+
+import pytest
+
+from services.language_detector import UkrainianLanguageDetector
+
+UKRAINIAN = ("Скаржник вважає, що замовник безпідставно відхилив його тендерну пропозицію "
+             "та порушив вимоги тендерної документації.")
+RUSSIAN = ("Заявитель считает, что заказчик необоснованно отклонил его предложение "
+           "и нарушил требования тендерной документации.")
+
+
+class TestUkrainianLanguageDetector:
+
+    @pytest.fixture
+    def detector(self):
+        return UkrainianLanguageDetector()
+
+    def test_ukrainian_letters_decide_without_langdetect(self, detector):
+        with patch("services.language_detector.detect") as mock_detect:
+            assert detector.is_ukrainian(UKRAINIAN) is True
+            mock_detect.assert_not_called()
+        assert detector.stats == {"ukrainian": 1, "other": 0, "fallback": 0}
+
+    def test_russian_markers_decide_without_langdetect(self, detector):
+        with patch("services.language_detector.detect") as mock_detect:
+            assert detector.is_ukrainian(RUSSIAN) is False
+            mock_detect.assert_not_called()
+
+    def test_short_text_is_ambiguous(self, detector):
+        assert detector.classify("договір") is None
+
+    def test_mixed_text_is_ambiguous(self, detector):
+        assert detector.classify(f"{UKRAINIAN} {RUSSIAN}") is None
+
+    def test_ambiguous_text_falls_back_to_langdetect(self, detector):
+        with patch("services.language_detector.detect", return_value="uk") as mock_detect:
+            assert detector.is_ukrainian("договір") is True
+            mock_detect.assert_called_once_with("договір")
+        assert detector.stats["fallback"] == 1
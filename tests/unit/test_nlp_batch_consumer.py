@@ -0,0 +1,39 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.complaint_analysis_queue import ComplaintAnalysisQueue
+from services.nlp_batch_consumer import NlpBatchConsumer
+
+
+class TestNlpBatchConsumer:
+
+    @pytest.fixture
+    def mock_queue(self):
+        return MagicMock(spec=ComplaintAnalysisQueue)
+
+    @pytest.fixture
+    def consumer(self, mock_queue):
+        return NlpBatchConsumer(mock_queue, max_batch_size=10, max_wait_seconds=0.1, max_attempts=3)
+
+    def test_run_processes_batches_until_stopped(self, consumer, mock_queue):
+        stop_event = threading.Event()
+        batch = [{"tender_id": "t1", "complaint_id": "c1", "attempts": 0}]
+        mock_queue.pop_batch.side_effect = [batch, []]
+        consumer.process_batch = MagicMock(side_effect=lambda items: stop_event.set())
+
+        consumer.run(stop_event)
+
+        consumer.process_batch.assert_called_once_with(batch)
+        mock_queue.pop_batch.assert_called_once_with(10, 0.1)
+
+    def test_failed_items_are_requeued_until_max_attempts(self, consumer, mock_queue):
+        consumer._requeue([
+            {"tender_id": "t1", "complaint_id": "c1", "attempts": 0},
+            {"tender_id": "t1", "complaint_id": "c2", "attempts": 2},
+        ])
+
+        mock_queue.push_many.assert_called_once_with([
+            {"tender_id": "t1", "complaint_id": "c1", "attempts": 1},
+        ])
@@ -0,0 +1,46 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from topic_modeling.nmf_sweep import read_shared_dtm, sweep_topic_counts, write_shared_dtm
+
+
+@pytest.fixture
+def dtm():
+    rng = np.random.default_rng(0)
+    # three blocks of documents using mostly disjoint terms
+    blocks = [rng.poisson(3.0, size=(20, 5)) for _ in range(3)]
+    dense = np.zeros((60, 15))
+    for i, block in enumerate(blocks):
+        dense[i * 20:(i + 1) * 20, i * 5:(i + 1) * 5] = block
+    return sparse.csr_matrix(dense)
+
+
+class TestNmfSweep:
+
+    def test_shared_dtm_round_trips_memory_mapped(self, dtm, tmp_path):
+        write_shared_dtm(dtm, tmp_path)
+
+        shared = read_shared_dtm(tmp_path)
+
+        # read-only views of the mapped files, not copies
+        assert not shared.data.flags.owndata and not shared.data.flags.writeable
+        assert not shared.indices.flags.owndata and not shared.indices.flags.writeable
+        assert (shared != dtm).nnz == 0
+
+    def test_sweep_scores_every_topic_count_and_writes_reports(self, dtm, tmp_path):
+        results = sweep_topic_counts(dtm, [4, 2, 3], max_iter=200, max_workers=2, report_dir=tmp_path)
+
+        assert [result["n_components"] for result in results] == [2, 3, 4]
+        assert all(np.isfinite(result["silhouette"]) and np.isfinite(result["davies_bouldin"]) for result in results)
+        assert results[0]["reconstruction_err"] > results[1]["reconstruction_err"]
+
+        with open(tmp_path / "sweep_report.json", encoding="utf-8") as f:
+            assert [row["n_components"] for row in json.load(f)] == [2, 3, 4]
+        with open(tmp_path / "sweep_report.csv", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["n_components"] for row in rows] == ["2", "3", "4"]
+        assert float(rows[1]["silhouette"]) == pytest.approx(results[1]["silhouette"])
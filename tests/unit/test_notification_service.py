@@ -30,13 +30,14 @@ class TestNotificationService:
 
     @pytest.fixture
     def notification_service(self, mock_tender_repo, mock_report_generator,
-                             mock_html_builder, mock_datetime_provider): # mock_email_service removed
+                             mock_html_builder, mock_datetime_provider):
         return NotificationService(
             tender_repository=mock_tender_repo,
             report_generator=mock_report_generator,
             html_builder=mock_html_builder,
             datetime_provider=mock_datetime_provider,
-            report_interval_min=30
+            report_interval_min=30,
+            max_parallel=2
         )
 
     @pytest.fixture
@@ -47,9 +48,18 @@ class TestNotificationService:
     def since_date(self, test_now, notification_service):
         return test_now - notification_service.report_interval
 
-    def test_send_notifications_no_tenders(self, mock_send_task, notification_service, mock_tender_repo, mock_datetime_provider, since_date, test_now): # mock_send_task added, mock_email_service removed
+    @pytest.fixture
+    def mock_chord(self):
+        with patch('services.notification_service.chord') as mock_chord, \
+                patch('tasks.send_tender_notifications_task') as mock_tender_task, \
+                patch('tasks.summarize_notification_run_task') as mock_summary_task:
+            yield mock_chord, mock_tender_task, mock_summary_task
+
+    def test_send_notifications_no_tenders(self, mock_send_task, notification_service, mock_tender_repo,
+                                           mock_datetime_provider, mock_chord, since_date, test_now):
         """Test send_notifications when no modified tenders are found."""
         # Arrange
+        chord_factory, _, _ = mock_chord
         mock_datetime_provider.utc_now.return_value = test_now
         mock_tender_repo.get_modified_tenders_and_subscribed_users.return_value = {}
 
@@ -59,166 +69,129 @@ class TestNotificationService:
         # Assert
         mock_datetime_provider.utc_now.assert_called_once()
         mock_tender_repo.get_modified_tenders_and_subscribed_users.assert_called_once_with(since_date)
-        mock_send_task.apply_async.assert_not_called() # Check that the task was not called
+        chord_factory.assert_not_called()
+        mock_send_task.apply_async.assert_not_called()
 
-    def test_send_notifications_success(self, mock_send_task, notification_service, mock_tender_repo, mock_report_generator, mock_html_builder, mock_datetime_provider, since_date, test_now):
-        """Test successful notification sending for multiple tenders and users."""
+    def test_send_notifications_dispatches_bounded_chord(self, mock_send_task, notification_service, mock_tender_repo,
+                                                         mock_report_generator, mock_datetime_provider, mock_chord,
+                                                         since_date, test_now):
+        """Test that tenders are fanned out to at most max_parallel report tasks with a summary callback."""
         # Arrange
+        chord_factory, mock_tender_task, mock_summary_task = mock_chord
         mock_datetime_provider.utc_now.return_value = test_now
         tender_user_map = {
             "tender_id_1": ["user1@example.com", "user2@example.com"],
-            "tender_id_2": ["user3@example.com"]
+            "tender_id_2": ["user3@example.com"],
+            "tender_id_3": ["user4@example.com"],
         }
-        report_data_1 = {"tender_info": "Tender 1 Info", "tender_changes": [{"field": "value1"}]}
-        report_data_2 = {"tender_info": "Tender 2 Info", "tender_changes": [{"field": "value2"}]}
-        html_report_1 = "<html>Report 1</html>"
-        html_report_2 = "<html>Report 2</html>"
-        subject_1 = "Оновлення тендеру: Tender 1 Info"
-        subject_2 = "Оновлення тендеру: Tender 2 Info"
-
         mock_tender_repo.get_modified_tenders_and_subscribed_users.return_value = tender_user_map
-        mock_report_generator.generate_tender_report.side_effect = [report_data_1, report_data_2]
-        mock_html_builder.generate_report.side_effect = [html_report_1, html_report_2]
 
         # Act
         notification_service.send_notifications()
 
         # Assert
-        mock_datetime_provider.utc_now.assert_called_once()
-        mock_tender_repo.get_modified_tenders_and_subscribed_users.assert_called_once_with(since_date)
-
-        mock_report_generator.generate_tender_report.assert_has_calls([
-            call(tender_id="tender_id_1", new_since=since_date, changes_since=since_date, fetch_new_entities=True, fetch_entity_changes=True),
-            call(tender_id="tender_id_2", new_since=since_date, changes_since=since_date, fetch_new_entities=True, fetch_entity_changes=True)
-        ])
-        mock_html_builder.generate_report.assert_has_calls([
-            call(report_data_1),
-            call(report_data_2)
+        mock_tender_task.s.assert_has_calls([
+            call([("tender_id_1", ["user1@example.com", "user2@example.com"]),
+                  ("tender_id_3", ["user4@example.com"])], since_date),
+            call([("tender_id_2", ["user3@example.com"])], since_date),
         ])
+        assert mock_tender_task.s.call_count == 2
+        chord_factory.assert_called_once_with([mock_tender_task.s.return_value, mock_tender_task.s.return_value])
+        mock_summary_task.s.assert_called_once_with(test_now)
+        chord_factory.return_value.assert_called_once_with(mock_summary_task.s.return_value)
 
-        expected_task_calls = [
-            call(args=(["user1@example.com", "user2@example.com"], subject_1, html_report_1), queue='email_queue'),
-            call(args=(["user3@example.com"], subject_2, html_report_2), queue='email_queue')
-        ]
-        mock_send_task.apply_async.assert_has_calls(expected_task_calls)
+        # reports are generated by the chord tasks, not by the dispatcher
+        mock_report_generator.generate_tender_report.assert_not_called()
+        mock_send_task.apply_async.assert_not_called()
 
-    def test_send_notifications_report_generation_failure(self, mock_send_task, notification_service, mock_tender_repo,
-                                                          mock_html_builder, mock_report_generator,
-                                                          mock_datetime_provider, since_date, test_now):
-        """Test that one failed report generation doesn't stop others."""
+    def test_send_notifications_repo_failure(self, mock_send_task, notification_service, mock_tender_repo,
+                                             mock_datetime_provider, mock_chord, test_now):
+        """Test behavior when the tender repository fails."""
         # Arrange
+        chord_factory, _, _ = mock_chord
         mock_datetime_provider.utc_now.return_value = test_now
-        tender_user_map = {
-            "tender_id_1": ["user1@example.com"],
-            "tender_id_fail": ["user_fail@example.com"],
-            "tender_id_2": ["user2@example.com"]
-        }
-        report_data_1 = {"tender_info": "Tender 1 Info"}
-        report_data_2 = {"tender_info": "Tender 2 Info"}
-        html_report_1 = "<html>Report 1</html>"
-        html_report_2 = "<html>Report 2</html>"
-        subject_1 = "Оновлення тендеру: Tender 1 Info"
-        subject_2 = "Оновлення тендеру: Tender 2 Info"
-
-        mock_tender_repo.get_modified_tenders_and_subscribed_users.return_value = tender_user_map
-        mock_report_generator.generate_tender_report.side_effect = [
-            report_data_1,
-            ValueError("Failed to generate report for tender_id_fail"),
-            report_data_2
-        ]
-        mock_html_builder.generate_report.side_effect = [html_report_1, html_report_2]
+        mock_tender_repo.get_modified_tenders_and_subscribed_users.side_effect = Exception("DB connection error")
 
         # Act
         notification_service.send_notifications()
 
         # Assert
-        mock_report_generator.generate_tender_report.assert_has_calls([
-            call(tender_id="tender_id_1", new_since=since_date, changes_since=since_date, fetch_new_entities=True, fetch_entity_changes=True),
-            call(tender_id="tender_id_fail", new_since=since_date, changes_since=since_date, fetch_new_entities=True, fetch_entity_changes=True),
-            call(tender_id="tender_id_2", new_since=since_date, changes_since=since_date, fetch_new_entities=True, fetch_entity_changes=True)
-        ])
-        mock_html_builder.generate_report.assert_has_calls([
-            call(report_data_1),
-            call(report_data_2)
-        ])
-
-        expected_task_calls = [
-            call(args=(["user1@example.com"], subject_1, html_report_1), queue='email_queue'),
-            call(args=(["user2@example.com"], subject_2, html_report_2), queue='email_queue')
-        ]
-        assert mock_send_task.apply_async.call_count == 2
-        mock_send_task.apply_async.assert_has_calls(expected_task_calls, any_order=False)
-
-
-    def test_send_notifications_unexpected_error_in_loop(self, mock_send_task, notification_service, mock_tender_repo, mock_report_generator, mock_html_builder, mock_datetime_provider, since_date, test_now):
-        """Test handling of unexpected error during processing a single tender in the loop."""
-        mock_datetime_provider.utc_now.return_value = test_now
-        emails_1 = ["user1@example.com"]
-        emails_2 = ["user2@example.com"] # will cause an error after report generation
-        emails_3 = ["user3@example.com"]
-
-        report_data_1 = {"tender_info": "Tender 1 Info"}
-        report_data_2 = {"tender_info": "Tender 2 Info (error after this)"} # report for the failing tender
-        report_data_3 = {"tender_info": "Tender 3 Info"}
-
-        html_report_1 = "<html>Report 1</html>"
-        html_report_2 = "<html>Report 2 (error after this)</html>" # HTML for the failing tender
-        html_report_3 = "<html>Report 3</html>"
+        mock_datetime_provider.utc_now.assert_called_once()
+        mock_tender_repo.get_modified_tenders_and_subscribed_users.assert_called_once()
+        chord_factory.assert_not_called()
+        mock_send_task.apply_async.assert_not_called()
 
-        subject_1 = "Оновлення тендеру: Tender 1 Info"
-        # subject_2 is for the failing tender
-        subject_3 = "Оновлення тендеру: Tender 3 Info"
+    def test_split_into_batches(self, mock_send_task):
+        """Test that the number of batches never exceeds the parallelism bound."""
+        tender_user_map = {f"tender_{i}": [f"user{i}@example.com"] for i in range(5)}
 
+        batches = NotificationService.split_into_batches(tender_user_map, 3)
+        assert len(batches) == 3
+        assert sorted(t for batch in batches for t, _ in batch) == sorted(tender_user_map)
 
-        mock_tender_repo.get_modified_tenders_and_subscribed_users.return_value = {
-            "tender_id_1": emails_1,
-            "tender_id_err": emails_2,
-            "tender_id_3": emails_3
-        }
-        mock_report_generator.generate_tender_report.side_effect = [report_data_1, report_data_2, report_data_3]
-        mock_html_builder.generate_report.side_effect = [html_report_1, html_report_2, html_report_3]
+        assert len(NotificationService.split_into_batches({"tender_0": []}, 3)) == 1
 
-        mock_send_task.apply_async.side_effect = [
-            None,
-            Exception("SMTP server down"),
-            None
-        ]
+    def test_notify_tender_success(self, mock_send_task, notification_service, mock_report_generator,
+                                   mock_html_builder, since_date):
+        """Test generating the report and dispatching the email for a single tender."""
+        # Arrange
+        emails = ["user1@example.com", "user2@example.com"]
+        report_data = {"tender_info": "Tender 1 Info", "tender_changes": [{"field": "value1"}]}
+        html_report = "<html>Report 1</html>"
+        mock_report_generator.generate_tender_report.return_value = report_data
+        mock_html_builder.generate_report.return_value = html_report
 
         # Act
-        notification_service.send_notifications()
+        result = notification_service.notify_tender("tender_id_1", emails, since_date)
 
         # Assert
-        mock_report_generator.generate_tender_report.assert_has_calls([
-            call(tender_id="tender_id_1", new_since=since_date, changes_since=since_date, fetch_new_entities=True, fetch_entity_changes=True),
-            call(tender_id="tender_id_err", new_since=since_date, changes_since=since_date, fetch_new_entities=True, fetch_entity_changes=True),
-            call(tender_id="tender_id_3", new_since=since_date, changes_since=since_date, fetch_new_entities=True, fetch_entity_changes=True)
-        ])
-        mock_html_builder.generate_report.assert_has_calls([
-            call(report_data_1),
-            call(report_data_2),
-            call(report_data_3)
-        ])
-
-        # check that apply_async was attempted for all, but only succeeded for non-erroring ones
-        expected_task_calls = [
-            call(args=(emails_1, subject_1, html_report_1), queue='email_queue'),
-            call(args=(emails_2, "Оновлення тендеру: Tender 2 Info (error after this)", html_report_2), queue='email_queue'),
-            call(args=(emails_3, subject_3, html_report_3), queue='email_queue')
+        mock_report_generator.generate_tender_report.assert_called_once_with(
+            tender_id="tender_id_1", new_since=since_date, changes_since=since_date,
+            fetch_new_entities=True, fetch_entity_changes=True)
+        mock_html_builder.generate_report.assert_called_once_with(report_data)
+        mock_send_task.apply_async.assert_called_once_with(
+            args=(emails, "Оновлення тендеру: Tender 1 Info", html_report), queue='email_queue')
+
+        assert result["tender_id"] == "tender_id_1"
+        assert result["status"] == "sent"
+        assert result["total_seconds"] >= result["report_seconds"] >= 0
+
+    def test_notify_tender_report_generation_failure(self, mock_send_task, notification_service,
+                                                     mock_report_generator, mock_html_builder, since_date):
+        """Test that a failed report generation is reported, not raised."""
+        mock_report_generator.generate_tender_report.side_effect = ValueError("Tender not found")
+
+        result = notification_service.notify_tender("tender_id_fail", ["user@example.com"], since_date)
+
+        assert result["status"] == "failed"
+        mock_html_builder.generate_report.assert_not_called()
+        mock_send_task.apply_async.assert_not_called()
+
+    def test_notify_tender_unexpected_error(self, mock_send_task, notification_service, mock_report_generator,
+                                            mock_html_builder, since_date):
+        """Test handling of unexpected error after the report was generated."""
+        mock_report_generator.generate_tender_report.return_value = {"tender_info": "Tender 2 Info"}
+        mock_html_builder.generate_report.return_value = "<html>Report 2</html>"
+        mock_send_task.apply_async.side_effect = Exception("Broker down")
+
+        result = notification_service.notify_tender("tender_id_err", ["user@example.com"], since_date)
+
+        assert result["status"] == "failed"
+        mock_send_task.apply_async.assert_called_once()
+
+    def test_summarize_run(self, mock_send_task, notification_service, mock_datetime_provider, test_now):
+        """Test the run-level summary aggregated from the chord results."""
+        mock_datetime_provider.utc_now.return_value = test_now + timedelta(seconds=42)
+        batch_results = [
+            [{"tender_id": "t1", "status": "sent", "report_seconds": 1.0, "html_seconds": 0.5, "total_seconds": 1.5}],
+            [{"tender_id": "t2", "status": "failed", "report_seconds": 0.1, "html_seconds": 0.0, "total_seconds": 0.1},
+             {"tender_id": "t3", "status": "sent", "report_seconds": 2.0, "html_seconds": 1.0, "total_seconds": 3.0}],
         ]
-        assert mock_send_task.apply_async.call_count == 3
-        mock_send_task.apply_async.assert_has_calls(expected_task_calls)
-        mock_datetime_provider.utc_now.assert_called_once()
 
-    def test_send_notifications_repo_failure(self, mock_send_task, notification_service, mock_tender_repo, mock_datetime_provider, test_now):
-        """Test behavior when the tender repository fails."""
-        # Arrange
-        mock_datetime_provider.utc_now.return_value = test_now
-        mock_tender_repo.get_modified_tenders_and_subscribed_users.side_effect = Exception("DB connection error")
-
-        # Act
-        notification_service.send_notifications()
+        summary = notification_service.summarize_run(batch_results, test_now)
 
-        # Assert
-        mock_datetime_provider.utc_now.assert_called_once()
-        mock_tender_repo.get_modified_tenders_and_subscribed_users.assert_called_once()
-        mock_send_task.apply_async.assert_not_called() # No emails should be sent
\ No newline at end of file
+        assert summary["total_seconds"] == pytest.approx(42)
+        assert summary["tenders"] == 3
+        assert summary["sent"] == 2
+        assert summary["failed"] == 1
+        assert [r["tender_id"] for r in summary["per_tender"]] == ["t3", "t1", "t2"]
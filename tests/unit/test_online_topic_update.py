@@ -0,0 +1,141 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sklearn.decomposition import NMF
+
+from services.corpus_writer import CorpusWriter
+from topic_modeling.dtm_cache import fitted_vectorizer, load_dtm, vectorizer_params
+from topic_modeling.online_update import corpus_positions, iter_new_documents, promote_candidate, topic_drift, \
+    update_topic_model, write_candidate
+from util.topic_model import build_topic_model_artifact, load_topic_model, write_topic_model
+
+PROCUREMENT = ["тендер", "замовник", "закупівля", "договір", "ціна"]
+APPEAL = ["скарга", "оскарження", "порушення", "учасник", "відхилення"]
+
+
+def documents(words, count, seed):
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(words, size=6)) for _ in range(count)]
+
+
+class TestOnlineTopicUpdate:
+
+    @pytest.fixture
+    def corpus_dir(self, tmp_path):
+        with CorpusWriter(str(tmp_path / "corpus"), max_lines_per_file=50) as writer:
+            writer.write_many(documents(PROCUREMENT, 60, 0) + documents(APPEAL, 60, 1))
+        return tmp_path / "corpus"
+
+    @pytest.fixture
+    def artifact(self, corpus_dir):
+        params = vectorizer_params(max_df=1.0, min_df=1)
+        corpus_lines = corpus_positions(corpus_dir)
+        dtm, feature_names = load_dtm(corpus_dir, params)
+        nmf = NMF(n_components=2, init="nndsvda", random_state=42, max_iter=500).fit(dtm)
+        return build_topic_model_artifact(fitted_vectorizer(params, feature_names), nmf,
+                                          metadata={"corpus_lines": corpus_lines})
+
+    def test_only_lines_added_since_the_positions_are_read(self, corpus_dir):
+        consumed = corpus_positions(corpus_dir)
+        with CorpusWriter(str(corpus_dir), max_lines_per_file=50) as writer:
+            writer.write_many(["новий рядок", "ще один"])
+
+        assert list(iter_new_documents(corpus_dir, consumed)) == ["новий рядок", "ще один"]
+        assert len(list(iter_new_documents(corpus_dir, {}))) == 122
+
+    def test_drift_matches_topics_regardless_of_their_order(self):
+        old = np.array([[1.0, 0.0, 0.0, 0.5], [0.0, 1.0, 0.5, 0.0]])
+        new = np.array([[0.0, 0.9, 0.6, 0.0], [1.0, 0.0, 0.0, 0.4]])
+
+        drift = topic_drift(old, new, ["a", "b", "c", "d"], n_top_words=2)
+
+        assert drift["order"] == [1, 0]
+        assert [t["matched_topic"] for t in drift["topics"]] == [1, 0]
+        assert drift["min_cosine"] > 0.95
+        assert drift["mean_top_words_jaccard"] == 1.0
+
+    def test_update_trains_on_new_lines_and_keeps_topic_ids(self, corpus_dir, artifact):
+        with CorpusWriter(str(corpus_dir), max_lines_per_file=50) as writer:
+            writer.write_many(documents(APPEAL, 80, 2))
+
+        candidate = update_topic_model(artifact, corpus_dir, batch_size=30)
+
+        metadata = candidate["metadata"]
+        assert metadata["update"]["new_documents"] == 80
+        assert metadata["parent_version"] == artifact["version"]
+        assert metadata["corpus_lines"] == corpus_positions(corpus_dir)
+        assert candidate["version"] != artifact["version"]
+        # each topic still describes the same theme after the update
+        old_top = artifact["nmf"].components_.argmax(axis=1)
+        new_top = candidate["nmf"].components_.argmax(axis=1)
+        feature_names = list(artifact["vectorizer"].get_feature_names_out())
+        for old_index, new_index in zip(old_top, new_top):
+            assert (feature_names[old_index] in PROCUREMENT) == (feature_names[new_index] in PROCUREMENT)
+
+    def test_a_second_update_continues_from_the_statistics_of_the_first(self, corpus_dir, artifact):
+        with CorpusWriter(str(corpus_dir), max_lines_per_file=50) as writer:
+            writer.write_many(documents(APPEAL, 80, 2))
+        first = update_topic_model(artifact, corpus_dir, batch_size=30)
+        numerator = first["nmf"]._components_numerator.copy()
+        with CorpusWriter(str(corpus_dir), max_lines_per_file=50) as writer:
+            writer.write_many(documents(PROCUREMENT, 40, 3))
+
+        second = update_topic_model(first, corpus_dir, batch_size=30, forget_factor=0.5)
+
+        assert first["nmf"].n_steps_ == 3
+        assert second["nmf"].n_steps_ == 5
+        assert second["nmf"].forget_factor == 0.5
+        # the first candidate is left as it was
+        np.testing.assert_array_equal(first["nmf"]._components_numerator, numerator)
+        assert second["metadata"]["update"]["new_documents"] == 40
+
+    def test_lines_written_during_an_update_are_left_for_the_next_one(self, corpus_dir, artifact):
+        with CorpusWriter(str(corpus_dir), max_lines_per_file=50) as writer:
+            writer.write_many(documents(APPEAL, 40, 2))
+        positions = corpus_positions(corpus_dir)
+        vectorizer = artifact["vectorizer"]
+
+        class AppendingVectorizer:
+            """Another writer appends to the corpus while the first batch is trained on."""
+
+            def transform(self, batch):
+                if corpus_positions(corpus_dir) == positions:
+                    with CorpusWriter(str(corpus_dir), max_lines_per_file=50) as writer:
+                        writer.write_many(documents(PROCUREMENT, 10, 3))
+                return vectorizer.transform(batch)
+
+            def get_feature_names_out(self):
+                return vectorizer.get_feature_names_out()
+
+        candidate = update_topic_model({**artifact, "vectorizer": AppendingVectorizer()}, corpus_dir, batch_size=30)
+
+        assert candidate["metadata"]["update"]["new_documents"] == 40
+        assert candidate["metadata"]["corpus_lines"] == positions
+        assert len(list(iter_new_documents(corpus_dir, candidate["metadata"]["corpus_lines"]))) == 10
+
+    def test_update_without_new_lines_returns_nothing(self, corpus_dir, artifact):
+        assert update_topic_model(artifact, corpus_dir) is None
+
+    def test_update_of_a_model_without_corpus_positions_fails(self, corpus_dir, artifact):
+        with pytest.raises(ValueError):
+            update_topic_model({**artifact, "metadata": {}}, corpus_dir)
+
+    def test_promote_serves_the_candidate_and_writes_its_keywords(self, corpus_dir, artifact, tmp_path):
+        with CorpusWriter(str(corpus_dir), max_lines_per_file=50) as writer:
+            writer.write_many(documents(PROCUREMENT, 40, 3))
+        candidate_path = write_candidate(update_topic_model(artifact, corpus_dir), tmp_path / "candidates")
+        topic_model_path = tmp_path / "topic_model.joblib"
+        write_topic_model(artifact, str(topic_model_path))
+        assert json.loads((tmp_path / "candidates" / candidate_path.name.replace(".joblib", ".drift.json"))
+                          .read_text(encoding="utf-8"))["parent_version"] == artifact["version"]
+
+        nlp = lambda word: [SimpleNamespace(lemma_=word)]
+        promoted = promote_candidate(candidate_path, topic_model_path, tmp_path / "keywords.json", 3, nlp)
+
+        assert load_topic_model(str(topic_model_path))["version"] == promoted["version"]
+        keywords = json.loads((tmp_path / "keywords.json").read_text(encoding="utf-8"))
+        assert set(keywords) == {"0", "1"} and all(len(words) == 3 for words in keywords.values())
+        lemmatized = json.loads((tmp_path / "keywords.lemmatized.json").read_text(encoding="utf-8"))
+        assert lemmatized["lemmatized_keywords"] == keywords
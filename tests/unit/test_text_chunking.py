@@ -0,0 +1,30 @@
+import random
+
+from util.text_chunking import split_text
+
+
+class TestSplitText:
+
+    def test_short_text_is_one_chunk(self):
+        assert split_text("коротка скарга.", 100) == [(0, "коротка скарга.")]
+
+    def test_prefers_paragraph_then_sentence_boundaries(self):
+        text = "Перше речення. Друге речення.\n\nНовий абзац тут."
+
+        assert split_text(text, 40) == [(0, "Перше речення. Друге речення.\n\n"), (31, "Новий абзац тут.")]
+        assert split_text(text, 20) == [(0, "Перше речення. "), (15, "Друге речення.\n\n"), (31, "Новий абзац тут.")]
+
+    def test_chunks_are_bounded_and_concatenate_back(self):
+        rng = random.Random(7)
+        words = ["скарга", "замовник", "вимога.", "ціна!", "\n", "\n\n", "учасник;"]
+        text = " ".join(rng.choice(words) for _ in range(3000))
+
+        chunks = split_text(text, 500)
+
+        assert "".join(chunk for _, chunk in chunks) == text
+        assert all(len(chunk) <= 500 for _, chunk in chunks)
+        assert all(text[offset:offset + len(chunk)] == chunk for offset, chunk in chunks)
+        assert all(not chunk[0].isspace() for _, chunk in chunks)
+
+    def test_text_without_whitespace_is_cut_hard(self):
+        assert split_text("а" * 25, 10) == [(0, "а" * 10), (10, "а" * 10), (20, "а" * 5)]
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+import services.text_cleaning_pool as text_cleaning_pool
+from services.text_cleaning_pool import TextCleaningPool
+
+
+class UpperCleaner:
+    """Upper-cases texts and records the process it runs in, fails on 'boom'."""
+
+    def clean_many(self, texts, batch_size=64, n_process=1):
+        for text in texts:
+            if text == "boom":
+                raise ValueError("boom")
+            yield f"{text.upper()}@{os.getpid()}"
+
+
+class TestTextCleaningPool:
+
+    def test_batches_are_yielded_in_order_with_their_payloads(self):
+        batches = [([f"text{i}", f"more{i}"], {"batch": i}) for i in range(10)]
+
+        with TextCleaningPool(cleaner=UpperCleaner()) as pool:
+            results = list(pool.clean_batches(iter(batches), max_pending=3))
+
+        assert [payload for _, payload, _ in results] == [{"batch": i} for i in range(10)]
+        assert [[text.split("@")[0] for text in cleaned] for _, _, cleaned in results] == \
+            [[f"TEXT{i}", f"MORE{i}"] for i in range(10)]
+
+    def test_failed_batch_is_yielded_without_cleaned_texts(self):
+        with TextCleaningPool(cleaner=UpperCleaner()) as pool:
+            results = list(pool.clean_batches([(["a"], 0), (["boom"], 1), (["b"], 2)]))
+
+        assert [cleaned is None for _, _, cleaned in results] == [False, True, False]
+
+    def test_worker_processes_are_reused_across_batches(self, monkeypatch):
+        # the workers are forked, so they build the patched cleaner
+        monkeypatch.setattr(text_cleaning_pool, "TextCleaner", UpperCleaner)
+
+        with TextCleaningPool(processes=2) as pool:
+            results = list(pool.clean_batches(([f"text{i}"], i) for i in range(20)))
+
+        pids = {int(cleaned[0].split("@")[1]) for _, _, cleaned in results}
+        assert [cleaned[0].split("@")[0] for _, _, cleaned in results] == [f"TEXT{i}" for i in range(20)]
+        assert os.getpid() not in pids
+        assert 1 <= len(pids) <= 2
+
+    def test_pending_batches_are_cancelled_when_the_consumer_stops(self):
+        with TextCleaningPool(cleaner=UpperCleaner()) as pool:
+            results = pool.clean_batches(([f"text{i}"], i) for i in range(10))
+            assert next(results)[1] == 0
+            results.close()
+
+        with pytest.raises(StopIteration):
+            next(results)
@@ -0,0 +1,25 @@
+from services.text_dedup_index import TextDedupIndex
+
+
+class TestTextDedupIndex:
+
+    def test_added_texts_are_found_after_reopening(self, tmp_path):
+        path = tmp_path / "dedup.sqlite3"
+        with TextDedupIndex(str(path)) as index:
+            index.add_many(["Скарга на рішення", "Вимога щодо документації"])
+
+        with TextDedupIndex(str(path)) as index:
+            assert len(index) == 2
+            assert index.contains_many(["Скарга на рішення", "Інша скарга"]) == [True, False]
+
+    def test_texts_are_compared_normalized(self, tmp_path):
+        with TextDedupIndex(str(tmp_path / "dedup.sqlite3")) as index:
+            index.add_many(["Скарга  на\nрішення "])
+
+            assert index.contains("скарга на рішення")
+
+    def test_adding_a_text_twice_keeps_one_entry(self, tmp_path):
+        with TextDedupIndex(str(tmp_path / "dedup.sqlite3")) as index:
+            index.add_many(["Скарга", "скарга"])
+
+            assert len(index) == 1
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from sklearn.metrics import silhouette_score
+
+from topic_modeling.metrics import cluster_scores, sampled_silhouette, stratified_sample
+
+
+@pytest.fixture
+def clustered():
+    rng = np.random.default_rng(0)
+    # unbalanced clusters: one small topic next to two large ones
+    sizes = [2000, 1500, 60]
+    centers = np.array([[0.0, 0.0], [3.0, 0.0], [0.0, 3.0]])
+    X = np.vstack([rng.normal(center, 1.0, size=(size, 2)) for center, size in zip(centers, sizes)])
+    labels = np.repeat(np.arange(3), sizes)
+    return X, labels
+
+
+class TestTopicMetrics:
+
+    def test_stratified_sample_is_proportional_and_keeps_small_topics(self, clustered):
+        _, labels = clustered
+
+        indices = stratified_sample(labels, 100, random_state=1)
+
+        counts = np.bincount(labels[indices])
+        assert list(counts) == [56, 42, 2]
+        assert len(np.unique(indices)) == len(indices)
+
+    def test_stratified_sample_is_seeded(self, clustered):
+        _, labels = clustered
+        assert (stratified_sample(labels, 100, random_state=3) == stratified_sample(labels, 100, random_state=3)).all()
+
+    def test_sampled_silhouette_interval_covers_the_exact_score(self, clustered):
+        X, labels = clustered
+        exact = silhouette_score(X, labels)
+
+        sampled = sampled_silhouette(X, labels, sample_size=800, random_state=7)
+
+        assert not sampled["exact"]
+        assert sampled["ci_low"] < sampled["silhouette"] < sampled["ci_high"]
+        assert sampled["ci_low"] - 0.02 <= exact <= sampled["ci_high"] + 0.02
+        assert sampled["silhouette"] == pytest.approx(exact, abs=0.05)
+
+    def test_small_inputs_get_the_exact_silhouette(self, clustered):
+        X, labels = clustered
+
+        sampled = sampled_silhouette(X[::10], labels[::10], sample_size=1000)
+
+        assert sampled["exact"]
+        assert sampled["silhouette"] == sampled["ci_low"] == pytest.approx(silhouette_score(X[::10], labels[::10]))
+
+    def test_cluster_scores_report_davies_bouldin_and_silhouette(self, clustered):
+        X, labels = clustered
+
+        scores = cluster_scores(X, labels, silhouette_sample_size=500)
+
+        assert set(scores) == {"davies_bouldin", "silhouette", "silhouette_ci_low", "silhouette_ci_high",
+                               "silhouette_sample_size"}
+        assert scores["davies_bouldin"] > 0
+        assert scores["silhouette_sample_size"] == 500
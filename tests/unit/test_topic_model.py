@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from sklearn.decomposition import NMF
+
+from topic_modeling.dtm_cache import make_vectorizer, vectorizer_params
+from util.topic_model import assign_topics, build_topic_model_artifact, load_topic_model, write_topic_model
+
+DOCUMENTS = [
+    "тендер замовник закупівля договір",
+    "закупівля договір замовник ціна",
+    "скарга оскарження порушення учасник",
+    "оскарження скарга відхилення учасник",
+    "тендер закупівля ціна договір",
+    "порушення скарга оскарження відхилення",
+]
+
+
+@pytest.fixture
+def fitted():
+    vectorizer = make_vectorizer(vectorizer_params(max_df=1.0, min_df=1))
+    dtm = vectorizer.fit_transform(DOCUMENTS)
+    nmf = NMF(n_components=2, random_state=42, init="nndsvda", max_iter=500)
+    nmf.fit(dtm)
+    return vectorizer, nmf
+
+
+class TestTopicModel:
+
+    def test_assigned_topics_agree_with_nmf_transform(self, fitted):
+        vectorizer, nmf = fitted
+        artifact = build_topic_model_artifact(vectorizer, nmf)
+        texts = ["договір закупівля тендер", "скарга учасник порушення", "ціна замовник"]
+
+        assignments = assign_topics(artifact, texts)
+
+        expected = nmf.transform(vectorizer.transform(texts)).argmax(axis=1)
+        assert [topic_id for topic_id, _ in assignments] == list(expected)
+        for _, weights in assignments:
+            assert len(weights) == 2
+            assert sum(weights) == pytest.approx(1.0, abs=1e-3)
+            assert min(weights) >= 0
+
+    def test_texts_without_known_terms_get_no_topic(self, fitted):
+        artifact = build_topic_model_artifact(*fitted)
+
+        assert assign_topics(artifact, ["невідоме слово", ""]) == [(None, []), (None, [])]
+        assert assign_topics(artifact, []) == []
+
+    def test_artifact_round_trips_with_its_version(self, fitted, tmp_path):
+        artifact = build_topic_model_artifact(*fitted, metadata={"corpus": "abc"})
+        path = str(tmp_path / "topic_model.joblib")
+
+        write_topic_model(artifact, path)
+        loaded = load_topic_model(path)
+
+        assert loaded["version"] == artifact["version"]
+        assert loaded["n_topics"] == 2
+        assert loaded["metadata"] == {"corpus": "abc"}
+        assert np.array_equal(loaded["projection"], artifact["projection"])
+
+    def test_artifact_of_another_sklearn_version_is_not_loaded(self, fitted, tmp_path):
+        artifact = {**build_topic_model_artifact(*fitted), "sklearn_version": "0.0.1"}
+        path = str(tmp_path / "topic_model.joblib")
+        write_topic_model(artifact, path)
+
+        assert load_topic_model(path) is None
+        assert load_topic_model(str(tmp_path / "missing.joblib")) is None
@@ -0,0 +1,35 @@
+import json
+import logging
+import sys
+from pathlib import Path
+
+import spacy
+
+from util.keyword_sets import build_keyword_artifact, write_keyword_artifact
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+TOP_LEVEL_DIR = Path(__file__).resolve().parent.parent
+KEYWORDS_PATH = TOP_LEVEL_DIR / "keywords.json"
+ARTIFACT_PATH = TOP_LEVEL_DIR / "keywords.lemmatized.json"
+MODEL_NAME = "uk_core_news_sm"
+
+
+def build(keywords_path: Path = KEYWORDS_PATH, artifact_path: Path = ARTIFACT_PATH, nlp=None) -> dict:
+    """Lemmatizes keywords.json once and writes the artifact workers load at startup."""
+    with open(keywords_path, 'r', encoding='utf-8') as f:
+        keywords = json.load(f)
+    if nlp is None:
+        nlp = spacy.load(MODEL_NAME, disable=["parser", "ner"])
+
+    artifact = build_keyword_artifact(nlp, MODEL_NAME, keywords)
+    write_keyword_artifact(artifact, str(artifact_path))
+    logging.info(f"Keyword artifact {artifact['keyword_set_version']} for {MODEL_NAME} "
+                 f"{artifact['model']['model_version']} (checksum {artifact['model_checksum']}) "
+                 f"written to {artifact_path}")
+    return artifact
+
+
+if __name__ == "__main__":
+    keywords_arg = Path(sys.argv[1]) if len(sys.argv) > 1 else KEYWORDS_PATH
+    build(keywords_arg, keywords_arg.with_suffix(".lemmatized.json"))
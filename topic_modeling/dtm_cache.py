@@ -0,0 +1,168 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+
+from util.corpus_shards import read_manifest, iter_corpus_lines
+
+CACHE_DIR_NAME = "dtm_cache"
+# bumped whenever the cached files or the way they are built change
+CACHE_FORMAT_VERSION = 1
+DEFAULT_HASHING_FEATURES = 2 ** 20
+
+
+def whitespace_tokenizer(doc: str) -> List[str]:
+    """Corpus lines are already cleaned and lemmatized, tokens are separated by spaces."""
+    return doc.split()
+
+
+def identity_preprocessor(doc: str) -> str:
+    return doc
+
+
+def vectorizer_params(max_df: float = 0.95, min_df: int = 2, stop_words: Optional[List[str]] = None,
+                      ngram_range: Tuple[int, int] = (1, 1), hashing: bool = False,
+                      n_features: int = DEFAULT_HASHING_FEATURES) -> Dict:
+    """
+    The parameters a DTM is built with, JSON-friendly so they can key the cache.
+    :param hashing: Use a HashingVectorizer, which keeps no vocabulary in memory, for very large corpora.
+        Its columns have no feature names.
+    :param n_features: Columns of the hashed DTM.
+    """
+    return {
+        "max_df": max_df,
+        "min_df": min_df,
+        "stop_words": sorted(set(stop_words)) if stop_words else None,
+        "ngram_range": list(ngram_range),
+        "hashing": hashing,
+        "n_features": n_features if hashing else None,
+    }
+
+
+def make_vectorizer(params: Dict):
+    """A CountVectorizer, or a HashingVectorizer producing non-negative raw counts NMF can factorize."""
+    common = dict(stop_words=params["stop_words"], ngram_range=tuple(params["ngram_range"]),
+                  token_pattern=None, tokenizer=whitespace_tokenizer, preprocessor=identity_preprocessor)
+    if params["hashing"]:
+        return HashingVectorizer(n_features=params["n_features"], alternate_sign=False, norm=None, **common)
+    return CountVectorizer(max_df=params["max_df"], min_df=params["min_df"], **common)
+
+
+def fitted_vectorizer(params: Dict, feature_names: Optional[np.ndarray]):
+    """
+    A vectorizer producing the columns of a DTM built by load_dtm, e.g. one loaded from the cache,
+    without fitting it again: the count vocabulary is fixed to feature_names, hashing needs none.
+    """
+    vectorizer = make_vectorizer(params)
+    if not params["hashing"]:
+        vectorizer.set_params(vocabulary=list(feature_names))
+        vectorizer.fit([])
+    return vectorizer
+
+
+def iter_documents(corpus_dir: Path, manifest: Optional[Dict] = None) -> Iterator[str]:
+    """Streams the non-empty corpus lines (those the manifest lists), without holding the corpus in memory."""
+    for line in iter_corpus_lines(corpus_dir, manifest):
+        line = line.strip()
+        if line:
+            yield line
+
+
+def corpus_fingerprint(corpus_dir: Path, manifest: Optional[Dict] = None) -> str:
+    """
+    A hash of the shard list in the corpus manifest (names, line counts, sizes and checksums),
+    which changes whenever lines are added. Corpora without a manifest are hashed by content.
+    :param manifest: A manifest already read from corpus_dir, read again by default.
+    """
+    manifest = manifest if manifest is not None else read_manifest(corpus_dir)
+    digest = hashlib.sha256()
+    if manifest is not None:
+        shards = [{key: shard[key] for key in ("file", "lines", "bytes", "sha256")} for shard in manifest["shards"]]
+        digest.update(json.dumps(shards, sort_keys=True).encode("utf-8"))
+    else:
+        for path in sorted(corpus_dir.glob("*.txt")):
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def cache_key(corpus_dir: Path, params: Dict, manifest: Optional[Dict] = None) -> str:
+    key = {"format_version": CACHE_FORMAT_VERSION, "corpus": corpus_fingerprint(corpus_dir, manifest),
+           "params": params}
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def load_dtm(corpus_dir: Path, params: Dict, cache_dir: Optional[Path] = None, rebuild: bool = False,
+             manifest: Optional[Dict] = None) -> Tuple[sparse.csr_matrix, Optional[np.ndarray]]:
+    """
+    The document-term matrix of the corpus and its feature names (None for a hashed DTM).
+    It is read from the cache when one was built from the same corpus with the same params,
+    otherwise the corpus is streamed through the vectorizer once and the result is cached.
+    :param cache_dir: Where DTMs are cached, corpus_dir/dtm_cache by default.
+    :param rebuild: Ignore a cached DTM.
+    :param manifest: The corpus manifest the DTM is keyed by and built from, read once by default, so
+        lines written while the corpus is vectorized are neither in the DTM nor in its key.
+    """
+    cache_dir = cache_dir or corpus_dir / CACHE_DIR_NAME
+    manifest = manifest if manifest is not None else read_manifest(corpus_dir)
+    key = cache_key(corpus_dir, params, manifest)
+    dtm_path = cache_dir / f"dtm_{key}.npz"
+    vocabulary_path = cache_dir / f"vocabulary_{key}.json"
+
+    if not rebuild and dtm_path.exists() and vocabulary_path.exists():
+        logging.info(f"Loading cached Document-Term Matrix {dtm_path}")
+        dtm = sparse.load_npz(dtm_path).tocsr()
+        with open(vocabulary_path, "r", encoding="utf-8") as f:
+            feature_names = json.load(f)["feature_names"]
+        return dtm, np.array(feature_names, dtype=object) if feature_names is not None else None
+
+    dtm, feature_names = build_dtm(corpus_dir, params, manifest)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # written under temporary names first, so an interrupted run never leaves a half-written cache entry
+    tmp_dtm_path = dtm_path.with_name(dtm_path.stem + ".tmp.npz")
+    sparse.save_npz(tmp_dtm_path, dtm)
+    tmp_dtm_path.replace(dtm_path)
+    tmp_vocabulary_path = vocabulary_path.with_name(vocabulary_path.name + ".tmp")
+    with open(tmp_vocabulary_path, "w", encoding="utf-8") as f:
+        json.dump({"params": params, "feature_names": feature_names.tolist() if feature_names is not None else None},
+                  f, ensure_ascii=False)
+    tmp_vocabulary_path.replace(vocabulary_path)
+    logging.info(f"Cached Document-Term Matrix as {dtm_path}")
+    return dtm, feature_names
+
+
+def build_dtm(corpus_dir: Path, params: Dict,
+              manifest: Optional[Dict] = None) -> Tuple[sparse.csr_matrix, Optional[np.ndarray]]:
+    """Streams the corpus (the lines manifest lists) through the vectorizer described by params."""
+    vectorizer = make_vectorizer(params)
+    logging.info(f"Vectorizing corpus {corpus_dir} with {type(vectorizer).__name__}...")
+    if not params["hashing"]:
+        dtm = vectorizer.fit_transform(iter_documents(corpus_dir, manifest))
+        feature_names = vectorizer.get_feature_names_out()
+    else:
+        dtm = _filter_document_frequency(vectorizer.transform(iter_documents(corpus_dir, manifest)),
+                                         params["min_df"], params["max_df"])
+        feature_names = None
+    logging.info(f"Created Document-Term Matrix with shape: {dtm.shape}")
+    return dtm.tocsr(), feature_names
+
+
+def _filter_document_frequency(dtm: sparse.csr_matrix, min_df, max_df) -> sparse.csr_matrix:
+    """
+    Zeroes the columns outside the document frequency bounds, as CountVectorizer does for terms.
+    Columns are kept rather than dropped, so hashed column indices stay valid for new documents.
+    """
+    n_documents = dtm.shape[0]
+    min_count = min_df if isinstance(min_df, int) else min_df * n_documents
+    max_count = max_df if isinstance(max_df, int) else max_df * n_documents
+    document_frequency = np.bincount(dtm.indices, minlength=dtm.shape[1])
+    keep = (document_frequency >= min_count) & (document_frequency <= max_count)
+    dtm = dtm @ sparse.diags(keep.astype(dtm.dtype))
+    dtm.eliminate_zeros()
+    return dtm
@@ -0,0 +1,89 @@
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+from scipy.stats import norm
+from sklearn.metrics import davies_bouldin_score, silhouette_samples, silhouette_score
+
+DEFAULT_SILHOUETTE_SAMPLE_SIZE = 10000
+DEFAULT_CONFIDENCE = 0.95
+
+
+def stratified_sample(labels: np.ndarray, sample_size: int, random_state: int = 42,
+                      min_per_label: int = 2) -> np.ndarray:
+    """
+    Indices of a sample drawn from every label in proportion to its size, so small topics
+    are still represented, each by at least min_per_label documents (or all it has).
+    """
+    rng = np.random.default_rng(random_state)
+    unique_labels, counts = np.unique(labels, return_counts=True)
+    allocation = np.maximum(np.round(sample_size * counts / len(labels)).astype(int), min_per_label)
+    allocation = np.minimum(allocation, counts)
+
+    indices = [rng.choice(np.flatnonzero(labels == label), size=size, replace=False)
+               for label, size in zip(unique_labels, allocation)]
+    return np.sort(np.concatenate(indices))
+
+
+def sampled_silhouette(X, labels: np.ndarray, sample_size: int = DEFAULT_SILHOUETTE_SAMPLE_SIZE,
+                       confidence: float = DEFAULT_CONFIDENCE, random_state: int = 42) -> Dict:
+    """
+    Silhouette score estimated from a stratified-by-label sample, with its confidence interval.
+    Pairwise distances are only computed within the sample, so the cost is bounded by sample_size
+    no matter how many documents there are; below sample_size the exact score is returned.
+
+    The estimate weights each label's mean silhouette by the label's share of all documents and
+    the interval uses the stratified standard error (with finite population correction). It only
+    reflects sampling error: silhouettes are computed against sampled neighbours, not all of them.
+    :return: {"silhouette", "ci_low", "ci_high", "sample_size", "exact"}.
+    """
+    labels = np.asarray(labels)
+    n = len(labels)
+    if n <= sample_size:
+        score = float(silhouette_score(X, labels))
+        return {"silhouette": score, "ci_low": score, "ci_high": score, "sample_size": n, "exact": True}
+
+    indices = stratified_sample(labels, sample_size, random_state)
+    sample_labels = labels[indices]
+    values = silhouette_samples(X[indices], sample_labels)
+
+    estimate = 0.0
+    variance = 0.0
+    for label in np.unique(sample_labels):
+        label_values = values[sample_labels == label]
+        population = np.count_nonzero(labels == label)
+        weight = population / n
+        estimate += weight * label_values.mean()
+        if len(label_values) > 1:
+            fpc = 1 - len(label_values) / population
+            variance += weight ** 2 * label_values.var(ddof=1) / len(label_values) * fpc
+
+    margin = norm.ppf(0.5 + confidence / 2) * np.sqrt(variance)
+    return {"silhouette": float(estimate), "ci_low": float(estimate - margin), "ci_high": float(estimate + margin),
+            "sample_size": len(indices), "exact": False}
+
+
+def cluster_scores(W_normalized, labels: np.ndarray, silhouette_sample_size: Optional[int] =
+                   DEFAULT_SILHOUETTE_SAMPLE_SIZE, confidence: float = DEFAULT_CONFIDENCE,
+                   random_state: int = 42) -> Dict:
+    """
+    Davies-Bouldin index over all documents (linear in their number) and the silhouette score,
+    sampled above silhouette_sample_size documents or exact when it is None.
+    :return: {"davies_bouldin", "silhouette", "silhouette_ci_low", "silhouette_ci_high", "silhouette_sample_size"}.
+    """
+    dbi = float(davies_bouldin_score(W_normalized, labels))
+    if silhouette_sample_size is None:
+        silhouette = float(silhouette_score(W_normalized, labels))
+        sil = {"silhouette": silhouette, "ci_low": silhouette, "ci_high": silhouette, "sample_size": len(labels)}
+    else:
+        sil = sampled_silhouette(W_normalized, labels, silhouette_sample_size, confidence, random_state)
+        if not sil["exact"]:
+            logging.debug(f"Silhouette {sil['silhouette']:.4f} estimated from {sil['sample_size']} documents, "
+                          f"{confidence:.0%} CI [{sil['ci_low']:.4f}, {sil['ci_high']:.4f}]")
+    return {
+        "davies_bouldin": dbi,
+        "silhouette": sil["silhouette"],
+        "silhouette_ci_low": sil["ci_low"],
+        "silhouette_ci_high": sil["ci_high"],
+        "silhouette_sample_size": sil["sample_size"],
+    }
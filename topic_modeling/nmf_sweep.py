@@ -0,0 +1,136 @@
+import csv
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import NMF
+from sklearn.preprocessing import normalize
+from threadpoolctl import threadpool_limits
+
+from topic_modeling.metrics import DEFAULT_SILHOUETTE_SAMPLE_SIZE, cluster_scores
+
+NMF_PARAMS = {
+    "random_state": 42,
+    "init": "nndsvda",
+    "l1_ratio": 1,
+    "tol": 1e-5,
+    "alpha_W": .0,
+    "alpha_H": "same",
+}
+COMPROMISE_WEIGHT = 0.5
+REPORT_FIELDS = ["n_components", "davies_bouldin", "silhouette", "silhouette_ci_low", "silhouette_ci_high",
+                 "silhouette_sample_size", "compromise", "reconstruction_err", "n_iter", "seconds"]
+
+# the DTM a worker process opened from the memory-mapped files, set by _init_worker
+_worker_dtm: Optional[sparse.csr_matrix] = None
+
+
+def sweep_topic_counts(dtm: sparse.spmatrix, n_components_values: Iterable[int], max_iter: int = 10000,
+                       max_workers: Optional[int] = None, report_dir: Optional[Path] = None,
+                       work_dir: Optional[Path] = None, nmf_params: Optional[Dict] = None,
+                       silhouette_sample_size: Optional[int] = DEFAULT_SILHOUETTE_SAMPLE_SIZE) -> List[Dict]:
+    """
+    Fits an NMF model per candidate topic count in a pool of worker processes and scores each.
+    The DTM is written once as .npy files every worker memory-maps read-only, so it is neither
+    pickled per task nor copied per process; each worker only holds its own W and H, so memory
+    grows with max_workers, not with the number of candidates.
+
+    :param n_components_values: The topic counts to try.
+    :param max_workers: Worker processes, os.cpu_count() by default.
+    :param report_dir: Where sweep_report.json and sweep_report.csv are written, nothing is written without it.
+    :param work_dir: Where the memory-mapped DTM files are kept during the sweep, the system temp dir by default.
+    :param nmf_params: NMF parameters other than n_components and max_iter, NMF_PARAMS by default.
+    :param silhouette_sample_size: Documents the silhouette score is estimated from, None for the exact score.
+    :return: One result per topic count, ordered by topic count.
+    """
+    n_components_values = sorted(set(n_components_values))
+    max_workers = min(max_workers or os.cpu_count() or 1, len(n_components_values))
+    nmf_params = {**(nmf_params or NMF_PARAMS), "max_iter": max_iter}
+    logging.info(f"Sweeping NMF over {len(n_components_values)} topic counts with {max_workers} workers...")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="nmf_sweep_", dir=work_dir) as shared_dir:
+        write_shared_dtm(dtm, Path(shared_dir))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(shared_dir,)) as executor:
+            futures = {executor.submit(_fit_and_score, n, nmf_params, silhouette_sample_size): n
+                       for n in n_components_values}
+            for future in as_completed(futures):
+                result = future.result()
+                logging.info(f"n={result['n_components']}: Davies-Bouldin {result['davies_bouldin']:.4f}, "
+                             f"Silhouette {result['silhouette']:.4f} in {result['seconds']:.1f}s")
+                results.append(result)
+
+    results.sort(key=lambda r: r["n_components"])
+    if report_dir is not None:
+        write_sweep_report(results, report_dir)
+    return results
+
+
+def write_shared_dtm(dtm: sparse.spmatrix, shared_dir: Path) -> None:
+    """Saves the CSR arrays as float64/int32 .npy files, the dtypes NMF uses, so workers never copy them."""
+    dtm = sparse.csr_matrix(dtm, dtype=np.float64)
+    np.save(shared_dir / "data.npy", dtm.data)
+    np.save(shared_dir / "indices.npy", dtm.indices)
+    np.save(shared_dir / "indptr.npy", dtm.indptr)
+    np.save(shared_dir / "shape.npy", np.array(dtm.shape))
+
+
+def read_shared_dtm(shared_dir: Path) -> sparse.csr_matrix:
+    shared_dir = Path(shared_dir)
+    arrays = [np.load(shared_dir / f"{name}.npy", mmap_mode="r") for name in ("data", "indices", "indptr")]
+    shape = tuple(np.load(shared_dir / "shape.npy"))
+    return sparse.csr_matrix(tuple(arrays), shape=shape, copy=False)
+
+
+def _init_worker(shared_dir: str) -> None:
+    global _worker_dtm
+    _worker_dtm = read_shared_dtm(Path(shared_dir))
+
+
+def _fit_and_score(n_components: int, nmf_params: Dict, silhouette_sample_size: Optional[int]) -> Dict:
+    """Runs in a worker process, single-threaded so the workers do not oversubscribe the cores."""
+    started = time.perf_counter()
+    with threadpool_limits(limits=1):
+        nmf = NMF(n_components=n_components, **nmf_params)
+        W = nmf.fit_transform(_worker_dtm)
+
+        labels = W.argmax(axis=1)
+        try:
+            scores = cluster_scores(normalize(W), labels, silhouette_sample_size,
+                                    random_state=nmf_params.get("random_state") or 42)
+        except ValueError:
+            # e.g. every document got the same dominant topic
+            scores = {field: np.nan for field in ("davies_bouldin", "silhouette", "silhouette_ci_low",
+                                                  "silhouette_ci_high", "silhouette_sample_size")}
+
+    return {
+        "n_components": n_components,
+        **scores,
+        "compromise": COMPROMISE_WEIGHT * scores["silhouette"] - (1 - COMPROMISE_WEIGHT) * scores["davies_bouldin"],
+        "reconstruction_err": float(nmf.reconstruction_err_),
+        "n_iter": int(nmf.n_iter_),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def write_sweep_report(results: List[Dict], report_dir: Path) -> None:
+    """Writes the results as sweep_report.json and sweep_report.csv, NaN scores as null/empty."""
+    report_dir.mkdir(parents=True, exist_ok=True)
+    rows = [{field: (None if isinstance(result[field], float) and np.isnan(result[field]) else result[field])
+             for field in REPORT_FIELDS} for result in results]
+
+    with open(report_dir / "sweep_report.json", "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2)
+    with open(report_dir / "sweep_report.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Sweep report written to {report_dir}")
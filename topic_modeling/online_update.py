@@ -0,0 +1,196 @@
+import copy
+import json
+import logging
+import shutil
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from sklearn.decomposition import MiniBatchNMF
+from sklearn.preprocessing import normalize
+
+from topic_modeling.build_keyword_artifact import build as build_keyword_artifact
+from topic_modeling.topic_utils import get_topics, write_topics_to_json
+from util.corpus_shards import read_manifest, read_shard_lines
+from util.topic_model import build_topic_model_artifact, load_topic_model, write_topic_model
+
+DRIFT_TOP_WORDS = 15
+
+
+def corpus_positions(corpus_dir: Path, manifest: Optional[Dict] = None) -> Dict[str, int]:
+    """
+    Lines of every shard in the corpus manifest, i.e. how far a model has consumed the corpus.
+    :param manifest: A manifest already read from corpus_dir, read again by default.
+    """
+    manifest = manifest if manifest is not None else read_manifest(corpus_dir)
+    return {shard["file"]: shard["lines"] for shard in manifest["shards"]} if manifest else {}
+
+
+def iter_new_documents(corpus_dir: Path, consumed: Dict[str, int], manifest: Optional[Dict] = None) -> Iterator[str]:
+    """
+    Streams the non-empty corpus lines added since consumed was taken by corpus_positions:
+    lines appended to known shards and all lines of new shards.
+    :param manifest: Only the lines it lists are read, lines written after it was read are left for
+        the next update. The manifest of corpus_dir by default.
+    """
+    manifest = manifest if manifest is not None else read_manifest(corpus_dir)
+    if manifest is None:
+        raise ValueError(f"Corpus {corpus_dir} has no manifest, new lines cannot be told from old ones.")
+    for shard in manifest["shards"]:
+        skip = consumed.get(shard["file"], 0)
+        if shard["lines"] <= skip:
+            continue
+        for line in read_shard_lines(corpus_dir / shard["file"], shard["bytes"])[skip:shard["lines"]]:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def topic_drift(old_components: np.ndarray, new_components: np.ndarray, feature_names: List[str],
+                n_top_words: int = DRIFT_TOP_WORDS) -> Dict:
+    """
+    Matches new topics to old ones one-to-one by the cosine similarity of their term weights
+    (Hungarian algorithm) and measures how much every matched topic moved.
+    :return: {"order": new topic index per old topic, "topics": per old topic its matched new topic,
+              cosine similarity and Jaccard similarity of the top words, "mean_cosine", "min_cosine",
+              "mean_top_words_jaccard"}.
+    """
+    similarity = normalize(old_components) @ normalize(new_components).T
+    old_indices, new_indices = linear_sum_assignment(similarity, maximize=True)
+    vocabulary = np.array(feature_names)
+
+    topics = []
+    for old_index, new_index in zip(old_indices, new_indices):
+        old_words = set(vocabulary[np.argsort(-old_components[old_index])[:n_top_words]])
+        new_words = set(vocabulary[np.argsort(-new_components[new_index])[:n_top_words]])
+        topics.append({
+            "topic": int(old_index),
+            "matched_topic": int(new_index),
+            "cosine": round(float(similarity[old_index, new_index]), 4),
+            "top_words_jaccard": round(len(old_words & new_words) / len(old_words | new_words), 4),
+            "added_words": sorted(new_words - old_words),
+            "removed_words": sorted(old_words - new_words),
+        })
+
+    cosines = [topic["cosine"] for topic in topics]
+    return {
+        "order": [int(i) for i in new_indices],
+        "topics": topics,
+        "mean_cosine": round(float(np.mean(cosines)), 4),
+        "min_cosine": round(float(np.min(cosines)), 4),
+        "mean_top_words_jaccard": round(float(np.mean([topic["top_words_jaccard"] for topic in topics])), 4),
+    }
+
+
+def update_topic_model(artifact: Dict, corpus_dir: Path, batch_size: int = 2000, forget_factor: float = 0.7,
+                       random_state: int = 42) -> Optional[Dict]:
+    """
+    Continues training the artifact's topics on the corpus lines added since it was trained, one
+    MiniBatchNMF.partial_fit step per batch, so the cost is proportional to the new lines. A model
+    updated before keeps its MiniBatchNMF and the statistics it gathered on all earlier lines, which
+    forget_factor weighs against the new ones; a model fitted by topics_main.py starts from its
+    topic-term matrix alone. The vocabulary stays the one of the last full fit: terms it lacks are
+    ignored until topics_main.py refits from scratch.
+    New topics are reordered to match the old ones, so topic ids and keywords.json keys keep their meaning.
+    :param forget_factor: Weight of the statistics gathered so far on every step, lower adapts faster.
+    :return: The updated artifact, its drift against the old one under metadata["drift"];
+             None if no lines were added.
+    """
+    consumed = artifact["metadata"].get("corpus_lines")
+    if consumed is None:
+        raise ValueError("The topic model does not record the corpus lines it was trained on, "
+                         "refit it with topics_main.py.")
+    # the lines trained on and the positions recorded come from the same manifest
+    manifest = read_manifest(corpus_dir)
+    vectorizer = artifact["vectorizer"]
+    old_components = artifact["nmf"].components_
+
+    if isinstance(artifact["nmf"], MiniBatchNMF):
+        # a copy, the served model is used by the workers until the candidate is promoted
+        model = copy.deepcopy(artifact["nmf"])
+        model.set_params(batch_size=batch_size, forget_factor=forget_factor)
+    else:
+        model = MiniBatchNMF(n_components=artifact["n_topics"], init="custom", batch_size=batch_size,
+                             forget_factor=forget_factor, random_state=random_state)
+    documents = iter_new_documents(corpus_dir, consumed, manifest)
+    new_documents = 0
+    while True:
+        batch = list(islice(documents, batch_size))
+        if not batch:
+            break
+        X = vectorizer.transform(batch).astype(np.float64)
+        if not hasattr(model, "components_"):
+            # W only has to be a valid non-negative guess, every step solves it again for the batch
+            model.partial_fit(X, W=np.full((X.shape[0], artifact["n_topics"]), 1.0 / artifact["n_topics"]),
+                              H=old_components.astype(np.float64))
+        else:
+            if new_documents == 0:
+                # partial_fit only derives its step parameters on the first call, here from this update's
+                # batch_size and forget_factor; the gathered statistics are kept
+                model._check_params(X)
+            model.partial_fit(X)
+        new_documents += len(batch)
+        logging.info(f"Updated topics with {new_documents} new documents...")
+
+    if new_documents == 0:
+        logging.info("No corpus lines were added since the topic model was trained.")
+        return None
+
+    feature_names = [str(name) for name in vectorizer.get_feature_names_out()]
+    drift = topic_drift(old_components, model.components_, feature_names)
+    _reorder_topics(model, drift["order"])
+
+    metadata = {
+        **artifact["metadata"],
+        "corpus_lines": corpus_positions(corpus_dir, manifest),
+        "parent_version": artifact["version"],
+        "update": {"new_documents": new_documents, "batch_size": batch_size, "forget_factor": forget_factor},
+        "drift": drift,
+    }
+    return build_topic_model_artifact(vectorizer, model, metadata)
+
+
+def _reorder_topics(model: MiniBatchNMF, order: List[int]) -> None:
+    """Puts the topics in the given order, along with the statistics the next update continues from."""
+    model.components_ = model.components_[order]
+    model._components_numerator = model._components_numerator[order]
+    model._components_denominator = model._components_denominator[order]
+
+
+def write_candidate(artifact: Dict, candidates_dir: Path) -> Path:
+    """
+    Stores an updated model next to its drift report for review, without touching the served model.
+    :return: The candidate's path, to be passed to promote_candidate.
+    """
+    candidates_dir.mkdir(parents=True, exist_ok=True)
+    path = candidates_dir / f"{artifact['version']}.joblib"
+    write_topic_model(artifact, str(path))
+    with open(candidates_dir / f"{artifact['version']}.drift.json", "w", encoding="utf-8") as f:
+        json.dump({"version": artifact["version"], "parent_version": artifact["metadata"]["parent_version"],
+                   **artifact["metadata"]["drift"]}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def promote_candidate(candidate_path: Path, topic_model_path: Path, keywords_path: Path,
+                      n_top_words: int, nlp=None) -> Dict:
+    """
+    Makes a candidate the served topic model: it replaces topic_model_path, its top words replace
+    keywords.json and the lemmatized keyword artifact is rebuilt. Registering the new keyword set
+    and rescoring complaints stays with rescore_main.py, once the workers are restarted.
+    """
+    candidate = load_topic_model(str(candidate_path))
+    if candidate is None:
+        raise ValueError(f"{candidate_path} is not a topic model this scikit-learn version can load.")
+
+    feature_names = candidate["vectorizer"].get_feature_names_out()
+    write_topics_to_json(get_topics(candidate["nmf"], feature_names, n_top_words), keywords_path.parent,
+                         keywords_path.name)
+    build_keyword_artifact(keywords_path, keywords_path.with_suffix(".lemmatized.json"), nlp)
+
+    tmp_path = topic_model_path.with_name(topic_model_path.name + ".tmp")
+    shutil.copyfile(candidate_path, tmp_path)
+    tmp_path.replace(topic_model_path)
+    logging.info(f"Topic model {candidate['version']} promoted to {topic_model_path}.")
+    return candidate
@@ -1,15 +1,16 @@
+import argparse
 import logging
 from pathlib import Path
 
-import numpy as np
-from sklearn.decomposition import NMF
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.metrics import davies_bouldin_score, silhouette_score
-from sklearn.preprocessing import normalize
+from topic_modeling.dtm_cache import load_dtm, vectorizer_params
+from topic_modeling.metrics import DEFAULT_SILHOUETTE_SAMPLE_SIZE
+from topic_modeling.nmf_sweep import COMPROMISE_WEIGHT, sweep_topic_counts
+from topic_modeling.topic_utils import load_stopwords_from_url
 
-from topic_modeling.topic_utils import load_corpus, load_stopwords_from_url
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-CORPUS_DIR = Path(__file__).resolve().parent.parent / "corpus_texts"
+TOP_LEVEL_DIR = Path(__file__).resolve().parent.parent
+CORPUS_DIR = TOP_LEVEL_DIR / "corpus_texts"
 N_TOPICS = 10
 N_TOP_WORDS = 15
 MAX_DF = 0.95
@@ -17,76 +18,15 @@ MIN_DF = 2
 
 STOPWORDS_URL = "https://raw.githubusercontent.com/skupriienko/Ukrainian-Stopwords/refs/heads/master/stopwords_ua.txt"
 
-if __name__ == "__main__":
-    documents = load_corpus(CORPUS_DIR)
-    if not documents:
-        logging.error("No documents loaded. Exiting.")
-        exit(1)
-
-    try:
-        ukrainian_stopwords = load_stopwords_from_url(STOPWORDS_URL)
-        logging.info(f"Loaded {len(ukrainian_stopwords)} stop words.")
-    except Exception as e:
-        logging.warning(f"Could not load NLTK stopwords, proceeding without them: {e}")
-        ukrainian_stopwords = None
-
-
-    logging.info("Initializing CountVectorizer...")
-    vectorizer = CountVectorizer(
-        max_df=MAX_DF,
-        min_df=MIN_DF,
-        stop_words=ukrainian_stopwords,
-        ngram_range=(1, 1),
-        token_pattern=None,
-        tokenizer=lambda doc: doc.split(),
-        preprocessor=lambda doc: doc
-    )
-    logging.info("Fitting CountVectorizer and transforming data...")
-    try:
-        dtm = vectorizer.fit_transform(documents)
-        feature_names = vectorizer.get_feature_names_out()
-        logging.info(f"Created Document-Term Matrix with shape: {dtm.shape}")
-        logging.info(f"Vocabulary size: {len(feature_names)}")
-    except ValueError as e:
-        logging.error(f"Error during vectorization: {e}. Check preprocessing/stopwords.")
-        exit(1)
-
-    dbi_scores = []
-    silhouette_scores = []
-
-    for n in range(2, 21):
-        nmf = NMF(
-            n_components=n,
-            random_state=42,
-            max_iter=10000,
-            init='nndsvda',
-            l1_ratio=1,
-            tol=1e-5,
-            alpha_W=.0,
-            alpha_H="same"
-        )
-        W = nmf.fit_transform(dtm)
-        H = nmf.components_
-
-        labels = W.argmax(axis=1)
-        W_norm = normalize(W)
-        try:
-            dbi = davies_bouldin_score(W_norm, labels)
-            sil = silhouette_score(W_norm, labels)
-        except Exception:
-            dbi = np.nan
-            sil = np.nan
-
-        dbi_scores.append(dbi)
-        silhouette_scores.append(sil)
 
+def plot_sweep(results):
     import matplotlib.pyplot as plt
 
-    x = list(range(2, 21))
+    x = [result["n_components"] for result in results]
 
     plt.figure(figsize=(10, 6), dpi=250)
-    plt.plot(x, dbi_scores, label="Davies–Bouldin Index", marker='s')
-    plt.plot(x, silhouette_scores, label="Silhouette Score", marker='^')
+    plt.plot(x, [result["davies_bouldin"] for result in results], label="Davies–Bouldin Index", marker='s')
+    plt.plot(x, [result["silhouette"] for result in results], label="Silhouette Score", marker='^')
     plt.xlabel("Кількість тем")
     plt.ylabel("Значення метрик кластеризації")
     plt.title("Davies–Bouldin та Silhouette для різної кількості тем")
@@ -95,15 +35,54 @@ if __name__ == "__main__":
     plt.tight_layout()
     plt.show()
 
-    a = 0.5
-    compromise_scores = [a * sil - (1 - a) * dbi for sil, dbi in zip(silhouette_scores, dbi_scores)]
-
     plt.figure(figsize=(10, 6), dpi=250)
-    plt.plot(x, compromise_scores, label=f"Compromise Criterion (a={a})", marker='x')
+    plt.plot(x, [result["compromise"] for result in results],
+             label=f"Compromise Criterion (a={COMPROMISE_WEIGHT})", marker='x')
     plt.xlabel("Кількість тем")
     plt.ylabel("Значення критерію")
     plt.title("Компромісний критерій для різної кількості тем")
     plt.legend()
     plt.grid(True)
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scores NMF topic models for a range of topic counts.")
+    parser.add_argument("--hashing", action="store_true",
+                        help="Vectorize with a HashingVectorizer, for corpora whose vocabulary does not fit in memory.")
+    parser.add_argument("--rebuild-dtm", action="store_true", help="Re-vectorize the corpus even if a cached DTM exists.")
+    parser.add_argument("--min-topics", type=int, default=2)
+    parser.add_argument("--max-topics", type=int, default=20)
+    parser.add_argument("--max-iter", type=int, default=10000, help="NMF iterations per topic count.")
+    parser.add_argument("--workers", type=int, help="Worker processes fitting topic counts in parallel, all cores by default.")
+    parser.add_argument("--report-dir", type=Path, default=TOP_LEVEL_DIR / "topic_sweep",
+                        help="Where sweep_report.json and sweep_report.csv are written.")
+    parser.add_argument("--silhouette-sample-size", type=int, default=DEFAULT_SILHOUETTE_SAMPLE_SIZE,
+                        help="Documents the silhouette score is estimated from, 0 for the exact score.")
+    parser.add_argument("--plot", action="store_true", help="Show the score plots once the sweep is done.")
+    args = parser.parse_args()
+
+    try:
+        ukrainian_stopwords = load_stopwords_from_url(STOPWORDS_URL)
+        logging.info(f"Loaded {len(ukrainian_stopwords)} stop words.")
+    except Exception as e:
+        logging.warning(f"Could not load NLTK stopwords, proceeding without them: {e}")
+        ukrainian_stopwords = None
+
+    params = vectorizer_params(max_df=MAX_DF, min_df=MIN_DF, stop_words=ukrainian_stopwords, hashing=args.hashing)
+    try:
+        dtm, feature_names = load_dtm(CORPUS_DIR, params, rebuild=args.rebuild_dtm)
+        logging.info(f"Document-Term Matrix with shape: {dtm.shape}")
+    except ValueError as e:
+        logging.error(f"Error during vectorization: {e}. Check the corpus/preprocessing/stopwords.")
+        exit(1)
+    if dtm.shape[0] == 0:
+        logging.error("No documents loaded. Exiting.")
+        exit(1)
+
+    results = sweep_topic_counts(dtm, range(args.min_topics, args.max_topics + 1), max_iter=args.max_iter,
+                                 max_workers=args.workers, report_dir=args.report_dir,
+                                 silhouette_sample_size=args.silhouette_sample_size or None)
+    if args.plot:
+        plot_sweep(results)
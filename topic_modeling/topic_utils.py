@@ -8,20 +8,20 @@ import requests
 
 from sklearn.decomposition import NMF
 
+from util.corpus_shards import iter_corpus_lines
+
 
 def load_corpus(corpus_dir: Path) -> list[str]:
-    """Loads all documents from .txt files in the corpus directory."""
+    """Loads all documents from the (possibly compressed) shards listed in the corpus manifest."""
     texts = []
     if not corpus_dir.is_dir():
         logging.error(f"Corpus directory not found: {corpus_dir}")
         return texts
-    for file_path in corpus_dir.glob("*.txt"):
-        logging.info(f"Loading data from: {file_path}")
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                texts.extend(line.strip() for line in f if line.strip())
-        except Exception as e:
-            logging.error(f"Error reading file {file_path}: {e}")
+    logging.info(f"Loading data from: {corpus_dir}")
+    try:
+        texts.extend(line.strip() for line in iter_corpus_lines(corpus_dir) if line.strip())
+    except Exception as e:
+        logging.error(f"Error reading corpus {corpus_dir}: {e}")
     logging.info(f"Loaded {len(texts)} documents.")
     return texts
 
@@ -1,21 +1,27 @@
+import argparse
 import logging
 
 from pathlib import Path
 
 from sklearn.decomposition import NMF
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.metrics import davies_bouldin_score, silhouette_score
 from sklearn.preprocessing import normalize
 from pandas import DataFrame
 import pandas as pd
 
-from topic_modeling.topic_utils import load_corpus, load_stopwords_from_url, display_topics, get_topics, \
+from topic_modeling.build_keyword_artifact import build as build_keyword_artifact
+from topic_modeling.dtm_cache import corpus_fingerprint, fitted_vectorizer, load_dtm, vectorizer_params
+from topic_modeling.metrics import DEFAULT_SILHOUETTE_SAMPLE_SIZE, cluster_scores
+from topic_modeling.online_update import corpus_positions
+from topic_modeling.topic_utils import load_stopwords_from_url, display_topics, get_topics, \
     write_topics_to_json
+from util.corpus_shards import read_manifest
+from util.topic_model import build_topic_model_artifact, write_topic_model
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 TOP_LEVEL_DIR = Path(__file__).resolve().parent.parent
 CORPUS_DIR = TOP_LEVEL_DIR / "corpus_texts"
+TOPIC_MODEL_PATH = TOP_LEVEL_DIR / "topic_model.joblib"
 N_TOPICS = 7 # number of topics from the graph
 N_TOP_WORDS = 10
 MAX_DF = 0.95
@@ -24,10 +30,12 @@ MIN_DF = 20
 STOPWORDS_URL = "https://raw.githubusercontent.com/skupriienko/Ukrainian-Stopwords/refs/heads/master/stopwords_ua.txt"
 
 if __name__ == "__main__":
-    documents = load_corpus(CORPUS_DIR)
-    if not documents:
-        logging.error("No documents loaded. Exiting.")
-        exit(1)
+    parser = argparse.ArgumentParser(description="Fits the topic model and writes keywords.json.")
+    parser.add_argument("--rebuild-dtm", action="store_true", help="Re-vectorize the corpus even if a cached DTM exists.")
+    parser.add_argument("--silhouette-sample-size", type=int, default=DEFAULT_SILHOUETTE_SAMPLE_SIZE,
+                        help="Documents the silhouette score is estimated from, 0 for the exact score.")
+    args = parser.parse_args()
+    args.silhouette_sample_size = args.silhouette_sample_size or None
 
     try:
         ukrainian_stopwords = load_stopwords_from_url(STOPWORDS_URL)
@@ -37,26 +45,20 @@ if __name__ == "__main__":
         logging.warning(f"Could not load NLTK stopwords, proceeding without them: {e}")
         ukrainian_stopwords = None
 
-
-    logging.info("Initializing CountVectorizer...")
-    vectorizer = CountVectorizer(
-        max_df=MAX_DF,
-        min_df=MIN_DF,
-        stop_words=ukrainian_stopwords,
-        ngram_range=(1, 1),
-        token_pattern=None,
-        tokenizer= lambda doc: doc.split(),
-        preprocessor=lambda doc: doc
-    )
-
-    logging.info("Fitting CountVectorizer and transforming data...")
+    params = vectorizer_params(max_df=MAX_DF, min_df=MIN_DF, stop_words=ukrainian_stopwords)
+    # the model is fitted on the lines this manifest lists and records them as consumed,
+    # lines added while fitting are left for the next online update
+    manifest = read_manifest(CORPUS_DIR)
+    corpus_lines = corpus_positions(CORPUS_DIR, manifest)
     try:
-        dtm = vectorizer.fit_transform(documents)
-        feature_names = vectorizer.get_feature_names_out()
-        logging.info(f"Created Document-Term Matrix with shape: {dtm.shape}")
+        dtm, feature_names = load_dtm(CORPUS_DIR, params, rebuild=args.rebuild_dtm, manifest=manifest)
+        logging.info(f"Document-Term Matrix with shape: {dtm.shape}")
         logging.info(f"Vocabulary size: {len(feature_names)}")
     except ValueError as e:
-        logging.error(f"Error during vectorization: {e}. Check preprocessing/stopwords.")
+        logging.error(f"Error during vectorization: {e}. Check the corpus/preprocessing/stopwords.")
+        exit(1)
+    if dtm.shape[0] == 0:
+        logging.error("No documents loaded. Exiting.")
         exit(1)
 
 
@@ -72,29 +74,34 @@ if __name__ == "__main__":
         alpha_H="same"
     )
     logging.info("Fitting NMF model...")
-    nmf_model.fit(dtm)
-    logging.info("NMF model fitting complete.")
-
     W = nmf_model.fit_transform(dtm)
     H = nmf_model.components_
+    logging.info("NMF model fitting complete.")
 
     labels = W.argmax(axis=1)
     W_normalized = normalize(W)
 
-    dbi = davies_bouldin_score(W_normalized, labels)
-    logging.info(f"Davies-Bouldin Index: {dbi:.4f}")
-
-    sil_core = silhouette_score(W_normalized, labels)
-    logging.info(f"Silhouette Score: {sil_core:.4f}")
+    scores = cluster_scores(W_normalized, labels, args.silhouette_sample_size)
+    logging.info(f"Davies-Bouldin Index: {scores['davies_bouldin']:.4f}")
+    logging.info(f"Silhouette Score: {scores['silhouette']:.4f} (95% CI [{scores['silhouette_ci_low']:.4f}, "
+                 f"{scores['silhouette_ci_high']:.4f}], {scores['silhouette_sample_size']} documents)")
 
     logging.info("Displaying top words for each topic:")
     topics = get_topics(nmf_model, feature_names, N_TOP_WORDS)
     display_topics(topics)
     write_topics_to_json(topics, TOP_LEVEL_DIR)
+    build_keyword_artifact()
+
+    # the complaint analysis workers assign new complaints to these topics at ingest time
+    topic_model = build_topic_model_artifact(fitted_vectorizer(params, feature_names), nmf_model, metadata={
+        "vectorizer_params": params, "corpus": corpus_fingerprint(CORPUS_DIR, manifest),
+        "corpus_lines": corpus_lines, "scores": scores})
+    write_topic_model(topic_model, str(TOPIC_MODEL_PATH))
+    logging.info(f"Topic model {topic_model['version']} written to {TOPIC_MODEL_PATH}")
     logging.info("Topic modeling complete.")
 
     corpus_topic_df = DataFrame.from_dict({
-        "Document": range(len(documents)),
+        "Document": range(dtm.shape[0]),
         "Dominant Topic": [topic + 1 for topic in labels],
         "Contribution, %": [max(doc_topics) * 100 for doc_topics in W_normalized],
         "Topic Desc": [", ".join([feature_names[i] for i in H[topic_idx].argsort()[:-N_TOP_WORDS - 1:-1]]) for topic_idx in labels]
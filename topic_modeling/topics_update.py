@@ -0,0 +1,67 @@
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from topic_modeling.online_update import promote_candidate, update_topic_model, write_candidate
+from util.topic_model import load_topic_model
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+TOP_LEVEL_DIR = Path(__file__).resolve().parent.parent
+CORPUS_DIR = TOP_LEVEL_DIR / "corpus_texts"
+TOPIC_MODEL_PATH = TOP_LEVEL_DIR / "topic_model.joblib"
+CANDIDATES_DIR = TOP_LEVEL_DIR / "topic_models"
+KEYWORDS_PATH = TOP_LEVEL_DIR / "keywords.json"
+N_TOP_WORDS = 10
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Updates the topic model with the corpus lines added since it was trained, "
+                    "and promotes reviewed updates to the served model and keywords.json.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    update = commands.add_parser("update", help="Train a candidate model on the new corpus lines and report its drift.")
+    update.add_argument("--batch-size", type=int, default=2000, help="Documents per partial_fit step.")
+    update.add_argument("--forget-factor", type=float, default=0.7,
+                        help="Weight of what the model learned so far on every step, lower adapts faster.")
+
+    promote = commands.add_parser("promote", help="Serve a candidate and write its keywords.json.")
+    promote.add_argument("version", help="The candidate's version, as printed by update.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.command == "update":
+        artifact = load_topic_model(str(TOPIC_MODEL_PATH))
+        if artifact is None:
+            logging.error(f"No topic model at {TOPIC_MODEL_PATH} for this scikit-learn version, run topics_main.py.")
+            return 1
+        candidate = update_topic_model(artifact, CORPUS_DIR, args.batch_size, args.forget_factor)
+        if candidate is None:
+            return 0
+        path = write_candidate(candidate, CANDIDATES_DIR)
+        drift = candidate["metadata"]["drift"]
+        logging.info(f"Candidate {candidate['version']} written to {path}. Drift against {artifact['version']}: "
+                     f"mean cosine {drift['mean_cosine']}, min cosine {drift['min_cosine']}, "
+                     f"mean top words Jaccard {drift['mean_top_words_jaccard']}.")
+        logging.info(json.dumps(drift["topics"], ensure_ascii=False))
+        logging.info(f"Review it, then run 'python -m topic_modeling.topics_update promote {candidate['version']}'.")
+        return 0
+
+    candidate_path = CANDIDATES_DIR / f"{args.version}.joblib"
+    if not candidate_path.exists():
+        logging.error(f"No candidate {args.version} in {CANDIDATES_DIR}.")
+        return 1
+    promote_candidate(candidate_path, TOPIC_MODEL_PATH, KEYWORDS_PATH, N_TOP_WORDS)
+    logging.info("Restart celery_default and nlp_worker so they load the new model and keywords, "
+                 "then run rescore_main.py to register the keyword set and rescore affected complaints.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,38 @@
-def process_complaint_text(text, complaint_keywords, keyword_field_map):
-    original_text = text
-    for kw in sorted(complaint_keywords, key=lambda x: x["startPosition"], reverse=True):
+from html import escape
+
+
+def render_highlighted_html(text, complaint_keywords, keyword_field_map):
+    """
+    Builds the complaint HTML with highlighted keywords in a single pass over the text.
+    Text and tooltips are HTML-escaped, overlapping or out-of-range highlights are skipped.
+    """
+    text = text or ""
+    parts = []
+    position = 0
+    for kw in sorted(complaint_keywords or [], key=lambda x: x["startPosition"]):
         start, length = kw["startPosition"], kw["length"]
         end = start + length
+        if start < position or end > len(text):
+            continue
         domains = [keyword_field_map.get(str(d), "Unknown") for d in kw["domains"]]
         domains_str = ", ".join(domains)
-        actual_word = original_text[start:end]
-        replacement = (
+        parts.append(escape(text[position:start], quote=False))
+        parts.append(
             f'<strong '
             f'class="complaint-keyword" '
             f'data-bs-toggle="tooltip" '
-            f'title="{domains_str}">'
-            f'{actual_word}'
+            f'title="{escape(domains_str)}">'
+            f'{escape(text[start:end], quote=False)}'
             f'</strong>'
         )
-        text = text[:start] + replacement + text[end:]
-    return text
+        position = end
+    parts.append(escape(text[position:], quote=False))
+    return "".join(parts)
+
+
+def process_complaint_text(text, complaint_keywords, keyword_field_map):
+    """Renders complaints whose highlighted HTML was not stored at analysis time."""
+    return render_highlighted_html(text, complaint_keywords, keyword_field_map)
 
 def format_violation_scores(scores, keyword_field_map):
     return {
@@ -0,0 +1,121 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT_VERSION = 1
+
+SHARD_SUFFIXES = {None: ".txt", "gzip": ".txt.gz", "zstd": ".txt.zst"}
+_COMPRESSION_BY_SUFFIX = {"": None, ".gz": "gzip", ".zst": "zstd"}
+
+
+def shard_pattern(file_prefix: str) -> "re.Pattern":
+    """Matches shard file names, group 1 is the shard index and group 2 the compression suffix."""
+    return re.compile(rf"^{re.escape(file_prefix)}(\d+)\.txt(\.gz|\.zst)?$")
+
+
+def compression_of(filename: str) -> Optional[str]:
+    match = re.search(r"\.txt(\.gz|\.zst)?$", filename)
+    return _COMPRESSION_BY_SUFFIX[match.group(1) or ""] if match else None
+
+
+def check_compression(compression: Optional[str]) -> None:
+    if compression not in SHARD_SUFFIXES:
+        raise ValueError(f"Unknown corpus compression '{compression}', expected one of {list(SHARD_SUFFIXES)}.")
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd compressed corpus shards need the zstandard package.")
+
+
+def compress(data: bytes, compression: Optional[str]) -> bytes:
+    """
+    Compresses one batch of lines as a self-contained gzip member or zstd frame,
+    so batches can be appended to a shard and the shard still decompresses as a whole.
+    """
+    if compression == "gzip":
+        return gzip.compress(data)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def decompress(data: bytes, compression: Optional[str]) -> bytes:
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        check_compression(compression)
+        with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True) as reader:
+            return reader.read()
+    return data
+
+
+def read_shard_lines(path: Path, size: Optional[int] = None) -> list:
+    """
+    Reads the lines of a shard.
+    :param size: Only the first size bytes are read, e.g. the part of the shard recorded in the manifest.
+    """
+    with open(path, "rb") as f:
+        data = f.read() if size is None else f.read(size)
+    return decompress(data, compression_of(path.name)).decode("utf-8").splitlines()
+
+
+def scan_shard(path: Path) -> Dict:
+    """Builds the manifest entry of a shard from its contents."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return {
+        "file": path.name,
+        "compression": compression_of(path.name),
+        "lines": len(decompress(data, compression_of(path.name)).decode("utf-8").splitlines()),
+        "bytes": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+
+
+def read_manifest(corpus_dir: Path) -> Optional[Dict]:
+    """The manifest of a corpus directory, None if there is none or it has an unknown format."""
+    try:
+        with open(corpus_dir / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format_version") != MANIFEST_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def write_manifest(corpus_dir: Path, manifest: Dict, fsync: bool = False) -> None:
+    """Replaces the manifest atomically, readers see either the old or the new one."""
+    path = corpus_dir / MANIFEST_NAME
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({**manifest, "format_version": MANIFEST_FORMAT_VERSION}, f, ensure_ascii=False, indent=2)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def iter_corpus_lines(corpus_dir: Path, manifest: Optional[Dict] = None) -> Iterator[str]:
+    """
+    Yields the lines of all shards in a corpus directory. With a manifest only the shards and
+    bytes it records are read, without one (corpora written before manifests) every *.txt file is.
+    :param manifest: A manifest already read from corpus_dir, read again by default.
+    """
+    manifest = manifest if manifest is not None else read_manifest(corpus_dir)
+    if manifest is None:
+        for path in sorted(corpus_dir.glob("*.txt")):
+            yield from read_shard_lines(path)
+        return
+
+    for shard in manifest["shards"]:
+        yield from read_shard_lines(corpus_dir / shard["file"], shard["bytes"])
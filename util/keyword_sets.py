@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Set
+
+ARTIFACT_FORMAT_VERSION = 1
+
+
+def compute_keyword_set_version(keywords: Dict[str, List[str]]) -> str:
+    """Content hash of a keywords.json mapping, stable under key order and whitespace."""
+    canonical = json.dumps(keywords, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def lemmatize_keywords(nlp, keywords: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """
+    Lemmatizes keywords per domain. Multi-word keywords keep every lemma, joined by spaces.
+    """
+    return {
+        domain: [" ".join(token.lemma_.lower() for token in nlp(word)) for word in words]
+        for domain, words in keywords.items()
+    }
+
+
+def _lemma_domains(lemmatized_keywords: Dict[str, List[str]]) -> Dict[str, Set[str]]:
+    result = {}
+    for domain, keywords in lemmatized_keywords.items():
+        for keyword in keywords:
+            result.setdefault(keyword, set()).add(domain)
+    return result
+
+
+def diff_keyword_sets(old_lemmatized: Dict[str, List[str]],
+                      new_lemmatized: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """
+    Compares two lemmatized keyword sets.
+    :return: {"added": [...], "removed": [...], "changed": [...]} keywords,
+             'changed' being keywords that moved between domains.
+    """
+    old_domains = _lemma_domains(old_lemmatized)
+    new_domains = _lemma_domains(new_lemmatized)
+    return {
+        "added": sorted(new_domains.keys() - old_domains.keys()),
+        "removed": sorted(old_domains.keys() - new_domains.keys()),
+        "changed": sorted(kw for kw in old_domains.keys() & new_domains.keys() if old_domains[kw] != new_domains[kw]),
+    }
+
+
+def affected_lemmas(diff: Dict[str, List[str]]) -> List[str]:
+    """Lemmas whose presence in a complaint means its highlights depend on the diff."""
+    lemmas = set()
+    for keywords in diff.values():
+        for keyword in keywords:
+            lemmas.update(keyword.split())
+    return sorted(lemmas)
+
+
+def model_fingerprint(model_name: str) -> Dict[str, Optional[str]]:
+    """Installed version of a spaCy pipeline package and of spaCy itself, both decide the lemmas."""
+    import spacy
+    return {
+        "model": model_name,
+        "model_version": spacy.util.get_package_version(model_name),
+        "spacy_version": spacy.about.__version__,
+    }
+
+
+def model_checksum(fingerprint: Dict[str, Optional[str]]) -> str:
+    canonical = json.dumps(fingerprint, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def build_keyword_artifact(nlp, model_name: str, keywords: Dict[str, List[str]]) -> Dict:
+    """
+    Lemmatizes keywords once into a ready-to-load artifact, versioned by the keyword set
+    and by a checksum of the model that produced the lemmas.
+    """
+    fingerprint = model_fingerprint(model_name)
+    return {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "keyword_set_version": compute_keyword_set_version(keywords),
+        "model": fingerprint,
+        "model_checksum": model_checksum(fingerprint),
+        "lemmatized_keywords": lemmatize_keywords(nlp, keywords),
+    }
+
+
+def write_keyword_artifact(artifact: Dict, path: str) -> None:
+    """Writes the artifact atomically, readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(artifact, file, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_keyword_artifact(path: str, keywords: Dict[str, List[str]], model_name: str) -> Optional[Dict]:
+    """
+    Loads an artifact made by build_keyword_artifact.
+    :return: The artifact, or None if it is missing or was built from other keywords or another model version.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            artifact = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if (artifact.get("format_version") != ARTIFACT_FORMAT_VERSION
+            or artifact.get("keyword_set_version") != compute_keyword_set_version(keywords)
+            or artifact.get("model_checksum") != model_checksum(model_fingerprint(model_name))):
+        return None
+    return artifact
@@ -0,0 +1,70 @@
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# format version, token count
+_HEADER = struct.Struct("<BI")
+FORMAT_VERSION = 1
+_MAX_LENGTH = 0xFFFF
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def encode_lemma_stream(lemma_ids: Sequence[int], starts: Sequence[int], lengths: Sequence[int]) -> bytes:
+    """
+    Packs a complaint's tokens into bytes: lemma vocabulary ids and char offsets as uint32, lengths as uint16.
+    """
+    count = len(lemma_ids)
+    if len(starts) != count or len(lengths) != count:
+        raise ValueError("lemma_ids, starts and lengths must have the same length")
+    return b"".join((
+        _HEADER.pack(FORMAT_VERSION, count),
+        _little_endian(array("I", lemma_ids)),
+        _little_endian(array("I", starts)),
+        _little_endian(array("H", (min(length, _MAX_LENGTH) for length in lengths))),
+    ))
+
+
+def decode_lemma_stream(data: bytes) -> Tuple[array, array, array]:
+    """
+    Unpacks bytes made by encode_lemma_stream.
+    :return: (lemma_ids, starts, lengths)
+    """
+    version, count = _HEADER.unpack_from(data)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported lemma stream format version {version}")
+    ids_end = _HEADER.size + 4 * count
+    starts_end = ids_end + 4 * count
+    if len(data) != starts_end + 2 * count:
+        raise ValueError("Truncated or corrupt lemma stream")
+    return (_from_little_endian("I", data[_HEADER.size:ids_end]),
+            _from_little_endian("I", data[ids_end:starts_end]),
+            _from_little_endian("H", data[starts_end:]))
+
+
+def encode_tokens(tokens: Iterable[Tuple[str, int, int]], vocabulary: Dict[str, int]) -> bytes:
+    """Encodes (lemma, start, length) tokens, vocabulary maps every lemma to its id."""
+    tokens = list(tokens)
+    return encode_lemma_stream([vocabulary[lemma] for lemma, _, _ in tokens],
+                               [start for _, start, _ in tokens],
+                               [length for _, _, length in tokens])
+
+
+def decode_tokens(data: bytes, lemmas_by_id: Dict[int, str]) -> List[Tuple[str, int, int]]:
+    """Decodes a stream back into the (lemma, start, length) tokens KeywordMatcher consumes."""
+    lemma_ids, starts, lengths = decode_lemma_stream(data)
+    return [(lemmas_by_id[lemma_id], start, length) for lemma_id, start, length in zip(lemma_ids, starts, lengths)]
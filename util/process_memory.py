@@ -0,0 +1,31 @@
+import os
+from typing import Dict
+
+_FIELDS = {"Rss": "rss_kb", "Pss": "pss_kb", "Shared_Clean": "shared_clean_kb", "Shared_Dirty": "shared_dirty_kb",
+           "Private_Clean": "private_clean_kb", "Private_Dirty": "private_dirty_kb"}
+
+
+def read_memory_usage(pid: int = None) -> Dict[str, int]:
+    """
+    Memory of a process in kB from /proc/<pid>/smaps_rollup: RSS, PSS (shared pages divided
+    among the processes sharing them) and the shared/private split. Empty where /proc is unavailable.
+    """
+    path = f"/proc/{pid or os.getpid()}/smaps_rollup"
+    usage = {}
+    try:
+        with open(path, "r") as file:
+            for line in file:
+                name, _, rest = line.partition(":")
+                if name in _FIELDS:
+                    usage[_FIELDS[name]] = int(rest.split()[0])
+    except (OSError, ValueError, IndexError):
+        return {}
+    return usage
+
+
+def format_memory_usage(usage: Dict[str, int]) -> str:
+    if not usage:
+        return "memory usage unavailable"
+    shared = usage.get("shared_clean_kb", 0) + usage.get("shared_dirty_kb", 0)
+    return (f"RSS {usage.get('rss_kb', 0) / 1024:.1f} MiB, PSS {usage.get('pss_kb', 0) / 1024:.1f} MiB, "
+            f"shared {shared / 1024:.1f} MiB")
@@ -0,0 +1,42 @@
+import re
+from typing import List, Tuple
+
+# preferred split points, best first: paragraph breaks, line breaks, sentence ends, any whitespace
+_BOUNDARIES = (
+    re.compile(r"\n[^\S\n]*\n\s*"),
+    re.compile(r"\n\s*"),
+    re.compile(r"(?<=[.!?…;])\s+"),
+    re.compile(r"\s+"),
+)
+
+
+def split_text(text: str, max_chars: int) -> List[Tuple[int, str]]:
+    """
+    Splits text into chunks of at most max_chars on the best boundary available, keeping the
+    separating whitespace at the end of the preceding chunk so that tokenizing the chunks
+    yields the same tokens as tokenizing the whole text.
+    :return: (offset of the chunk in text, chunk) pairs, which concatenate back to text.
+    """
+    if len(text) <= max_chars:
+        return [(0, text)]
+
+    chunks = []
+    start = 0
+    while len(text) - start > max_chars:
+        end = _find_split(text, start, start + max_chars)
+        chunks.append((start, text[start:end]))
+        start = end
+    chunks.append((start, text[start:]))
+    return chunks
+
+
+def _find_split(text: str, start: int, limit: int) -> int:
+    for boundary in _BOUNDARIES:
+        split = None
+        for match in boundary.finditer(text, start, limit):
+            # whitespace running past the limit would be cut in two
+            if match.end() > start and not (match.end() == limit and text[limit].isspace()):
+                split = match.end()
+        if split is not None:
+            return split
+    return limit
@@ -0,0 +1,86 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import sklearn
+
+TOPIC_MODEL_FORMAT_VERSION = 1
+
+
+def compute_topic_model_version(feature_names: List[str], components: np.ndarray) -> str:
+    """Content hash of a fitted model's vocabulary and topic-term matrix."""
+    digest = hashlib.sha256()
+    digest.update("\n".join(feature_names).encode("utf-8"))
+    digest.update(np.ascontiguousarray(components, dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def build_topic_model_artifact(vectorizer, nmf, metadata: Optional[Dict] = None) -> Dict:
+    """
+    Bundles a fitted vectorizer and NMF model with the projection assign_topics uses.
+    The projection is the pseudo-inverse of the topic-term matrix H, so the least squares topic
+    weights of a batch X are X @ pinv(H): one sparse-dense product instead of NMF's iterative solver.
+    :param metadata: Anything worth keeping with the model, e.g. vectorizer params and corpus fingerprint.
+    """
+    components = nmf.components_
+    # a HashingVectorizer has no vocabulary
+    feature_names = ([str(name) for name in vectorizer.get_feature_names_out()]
+                     if hasattr(vectorizer, "get_feature_names_out") else [])
+    return {
+        "format_version": TOPIC_MODEL_FORMAT_VERSION,
+        "version": compute_topic_model_version(feature_names, components),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "sklearn_version": sklearn.__version__,
+        "n_topics": components.shape[0],
+        "metadata": metadata or {},
+        "vectorizer": vectorizer,
+        "nmf": nmf,
+        "projection": np.linalg.pinv(components).astype(np.float32),
+    }
+
+
+def write_topic_model(artifact: Dict, path: str) -> None:
+    """Writes the artifact atomically, readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_topic_model(path: str) -> Optional[Dict]:
+    """
+    Loads an artifact made by build_topic_model_artifact.
+    :return: The artifact, or None if it is missing or was pickled by another scikit-learn version.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as file:
+        artifact = joblib.load(file)
+    if (artifact.get("format_version") != TOPIC_MODEL_FORMAT_VERSION
+            or artifact.get("sklearn_version") != sklearn.__version__):
+        return None
+    return artifact
+
+
+def assign_topics(artifact: Dict, lemma_texts: List[str]) -> List[Tuple[Optional[int], List[float]]]:
+    """
+    Topic weights of a batch of lemmatized texts (lemmas separated by spaces), normalized to sum to 1.
+    Negative least squares weights are clipped to 0.
+    :return: Per text, the dominant topic id (the topic's key in keywords.json) and all topic weights;
+             (None, []) for texts sharing no term with the model's vocabulary.
+    """
+    if not lemma_texts:
+        return []
+    weights = np.asarray(artifact["vectorizer"].transform(lemma_texts) @ artifact["projection"])
+    np.clip(weights, 0, None, out=weights)
+    totals = weights.sum(axis=1)
+
+    assignments = []
+    for row, total in zip(weights, totals):
+        if total <= 0:
+            assignments.append((None, []))
+        else:
+            assignments.append((int(row.argmax()), [round(float(w), 4) for w in row / total]))
+    return assignments